@@ -0,0 +1,77 @@
+"""
+Benchmark: cold start — import time, time to ready and first-request latency.
+
+Each run is a fresh interpreter that imports ``main``, enters the app's
+lifespan, waits for the warm-up to finish and then times a first query
+embedding (the first thing /flow/ask does). Runs are repeated with the
+embedding warm-up on and off, so the first-request penalty the warm-up moves
+out of the request path is visible. Run from backend/:
+
+    python -m benchmarks.bench_cold_start --runs 3
+
+Set ``WARMUP_DB=false`` in the environment to measure without a database.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD = r"""
+import asyncio, json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        status = main.app.state.warmup
+        while status.state == "starting":
+            await asyncio.sleep(0.01)
+        ready = time.perf_counter()
+        from services.embeddings import encode_texts
+        await asyncio.to_thread(encode_texts, ["What projects did the candidate lead?"])
+        first = time.perf_counter()
+        return ready, first, status.as_dict()
+
+ready, first, status = asyncio.run(run())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "ready_ms": (ready - started) * 1000,
+    "first_encode_ms": (first - ready) * 1000,
+    "status": status,
+}))
+"""
+
+
+def measure(env: dict) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'warm-up':<8} {'import ms':>10} {'ready ms':>10} {'1st encode ms':>14}")
+    for warm in ("true", "false"):
+        env = dict(os.environ, WARMUP_EMBEDDINGS=warm, WARMUP_VECTORSTORE=warm, TTS_PREWARM="false")
+        runs = [measure(env) for _ in range(args.runs)]
+        failed = [r["status"] for r in runs if r["status"]["status"] != "ready"]
+        if failed:
+            print(f"warm-up failed: {failed[0]}")
+        median = {k: statistics.median(r[k] for r in runs) for k in ("import_ms", "ready_ms", "first_encode_ms")}
+        print(
+            f"{'on' if warm == 'true' else 'off':<8} {median['import_ms']:>10.1f} "
+            f"{median['ready_ms']:>10.1f} {median['first_encode_ms']:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
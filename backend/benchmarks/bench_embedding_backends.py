@@ -0,0 +1,98 @@
+"""
+Benchmark: embedding backends (torch, torch-int8, onnx, onnx-int8) on CPU.
+
+Encodes a synthetic corpus of document chunks with each backend and reports
+throughput (texts/sec) plus retrieval agreement with the full-precision torch
+reference: mean cosine between the two embeddings of the same text, and the
+top-k overlap of the chunks each backend retrieves for a set of queries. Run
+from backend/:
+
+    python -m benchmarks.bench_embedding_backends --chunks 2000 --threads 4
+
+ONNX backends need ``pip install onnxruntime optimum``; missing backends are skipped.
+"""
+
+import argparse
+import random
+import time
+from typing import List
+
+import numpy as np
+
+from services.embeddings import load_encoder
+
+TOPICS = [
+    "built a FastAPI service with async database access and connection pooling",
+    "led migration of a monolith to containerized microservices on Kubernetes",
+    "optimized PostgreSQL queries and added Redis caching for hot endpoints",
+    "trained a text classifier and deployed it behind a REST API",
+    "designed an event pipeline with Kafka consumers and retry queues",
+    "implemented retrieval augmented generation over internal documents",
+    "mentored junior engineers and ran weekly code reviews",
+    "automated CI pipelines with unit, integration and load tests",
+    "reduced cloud costs by right-sizing instances and autoscaling",
+    "wrote a React dashboard for monitoring job throughput",
+]
+QUERIES = [
+    "What databases has the candidate worked with?",
+    "Describe their experience with machine learning",
+    "Did they work on infrastructure or DevOps?",
+    "What frontend work is mentioned?",
+    "How did they improve performance?",
+    "Have they mentored anyone?",
+    "What messaging systems were used?",
+    "Summarize the cloud experience",
+]
+
+
+def make_corpus(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        f"In {2015 + rng.randrange(9)} the author {rng.choice(TOPICS)}, then {rng.choice(TOPICS)}; "
+        f"the team of {rng.randrange(2, 12)} shipped it in {rng.randrange(2, 20)} weeks."
+        for _ in range(n)
+    ]
+
+
+def top_k(queries: np.ndarray, corpus: np.ndarray, k: int) -> List[set]:
+    scores = queries @ corpus.T
+    return [set(np.argsort(-row)[:k].tolist()) for row in scores]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=0, help="intra-op threads (0 = runtime default)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", default=["torch", "torch-int8", "onnx", "onnx-int8"])
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.chunks)
+    reference = None
+    print(f"{args.chunks} chunks, batch {args.batch_size}, threads {args.threads or 'default'}")
+    print(f"{'backend':<11} {'texts/s':>9} {'cosine':>7} {f'top{args.k} overlap':>13}")
+    for backend in ["torch"] + [b for b in args.backends if b != "torch"]:
+        try:
+            encoder = load_encoder(backend, threads=args.threads)
+        except ImportError as e:
+            print(f"{backend:<11} skipped ({e})")
+            continue
+        encoder.encode(corpus[:8], normalize_embeddings=True, batch_size=8)  # warm up
+
+        started = time.perf_counter()
+        docs = np.asarray(encoder.encode(corpus, normalize_embeddings=True, batch_size=args.batch_size), dtype=np.float32)
+        throughput = len(corpus) / (time.perf_counter() - started)
+        queries = np.asarray(encoder.encode(QUERIES, normalize_embeddings=True), dtype=np.float32)
+
+        if reference is None:
+            reference = (docs, queries, top_k(queries, docs, args.k))
+        ref_docs, _, ref_hits = reference
+        cosine = float(np.mean(np.sum(docs * ref_docs, axis=1)))
+        hits = top_k(queries, docs, args.k)
+        overlap = float(np.mean([len(a & b) / args.k for a, b in zip(hits, ref_hits)]))
+        print(f"{backend:<11} {throughput:>9.1f} {cosine:>7.4f} {overlap:>13.2%}")
+
+
+if __name__ == "__main__":
+    main()
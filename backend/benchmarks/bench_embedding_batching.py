@@ -0,0 +1,83 @@
+"""
+Benchmark: per-call query embedding vs the cross-request micro-batcher.
+
+Simulates concurrent /flow/ask traffic: ``--concurrency`` coroutines each embed
+``--requests`` short questions. The direct path encodes one string per call in
+asyncio.to_thread (the old behaviour); the batched path goes through
+EmbeddingBatcher. Run from backend/ on a CPU-only box:
+
+    python -m benchmarks.bench_embedding_batching --concurrency 32 --requests 20
+
+Reports embeddings/sec, p50/p99 latency and the batcher's batch-size stats.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+from services.embeddings import EmbeddingBatcher, _get_sbert_model
+
+QUESTIONS = [
+    "What projects did the candidate lead?",
+    "Summarize the work experience section",
+    "Which databases are mentioned in the resume?",
+    "How many years of Python experience are listed?",
+    "What was the outcome of the caching project?",
+    "List the cloud platforms the author has used",
+]
+
+
+async def drive(embed: Callable[[str], Awaitable[object]], concurrency: int, requests: int) -> List[float]:
+    latencies: List[float] = []
+
+    async def client(offset: int) -> None:
+        for i in range(requests):
+            question = f"{QUESTIONS[(offset + i) % len(QUESTIONS)]} ({offset}-{i})"
+            started = time.perf_counter()
+            await embed(question)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(client(c) for c in range(concurrency)))
+    return latencies
+
+
+def report(name: str, latencies: List[float], elapsed: float) -> None:
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]
+    print(
+        f"{name:<8} {len(latencies) / elapsed:>10.1f} emb/s  "
+        f"p50 {statistics.median(ordered) * 1000:>7.1f} ms  p99 {p99 * 1000:>7.1f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    args = parser.parse_args()
+
+    model = _get_sbert_model()
+    model.encode(["warm up"], normalize_embeddings=True)
+
+    async def direct(text: str):
+        return await asyncio.to_thread(model.encode, [text], normalize_embeddings=True)
+
+    batcher = EmbeddingBatcher(model, window_ms=args.window_ms, max_batch=args.max_batch)
+
+    async def batched(text: str):
+        return await asyncio.wrap_future(batcher.submit([text]))
+
+    print(f"{args.concurrency} clients x {args.requests} requests")
+    for name, embed in (("direct", direct), ("batched", batched)):
+        started = time.perf_counter()
+        latencies = await drive(embed, args.concurrency, args.requests)
+        report(name, latencies, time.perf_counter() - started)
+    print("batcher:", batcher.stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
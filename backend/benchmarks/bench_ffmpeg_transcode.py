@@ -0,0 +1,116 @@
+"""
+Benchmark: ffmpeg tempo conversion, subprocess-per-request (temp files, run on
+the event loop) vs the pooled pipe-based transcoder.
+
+Run from backend/:
+
+    python -m benchmarks.bench_ffmpeg_transcode --requests 200 --concurrency 16
+
+Reports requests/sec and p50/p99 latency for each path. Requires ffmpeg on PATH.
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Awaitable, Callable, List
+
+from tts_service.transcoder import AudioTranscoder, get_ffmpeg_path
+
+
+def make_sample_mp3(seconds: float) -> bytes:
+    """A synthetic speech-length MP3 (sine tone) to transcode."""
+    ffmpeg = get_ffmpeg_path()
+    if not ffmpeg:
+        raise SystemExit("ffmpeg not found on PATH")
+    proc = subprocess.run(
+        [ffmpeg, "-hide_banner", "-loglevel", "error", "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+         "-ac", "1", "-ar", "24000", "-f", "mp3", "pipe:1"],
+        stdout=subprocess.PIPE,
+        check=True,
+    )
+    return proc.stdout
+
+
+def legacy_speed_up(data: bytes, speed: float) -> bytes:
+    """The previous speed_up_wav path: which() + temp in/out files + one blocking subprocess."""
+    ffmpeg_path = shutil.which("ffmpeg")
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp:
+        tmp.write(data)
+    out_path = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3").name
+    try:
+        subprocess.run(
+            [ffmpeg_path, "-y", "-i", tmp.name, "-filter:a", f"atempo={speed}", "-vn", out_path],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        with open(out_path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(tmp.name)
+        os.remove(out_path)
+
+
+async def drive(handler: Callable[[], Awaitable[bytes]], requests: int, concurrency: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one() -> None:
+        async with sem:
+            start = time.perf_counter()
+            await handler()
+            latencies.append(time.perf_counter() - start)
+
+    began = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - began
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=6.0, help="length of the sample clip")
+    parser.add_argument("--speed", type=float, default=1.25)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    sample = make_sample_mp3(args.seconds)
+    transcoder = AudioTranscoder(max_workers=args.workers)
+
+    async def legacy() -> bytes:
+        # Called directly inside the async handler, as the old TTS endpoint did
+        return legacy_speed_up(sample, args.speed)
+
+    async def pooled_mp3() -> bytes:
+        return await transcoder.transcode(sample, args.speed, "mp3")
+
+    async def pooled_opus() -> bytes:
+        return await transcoder.transcode(sample, args.speed, "opus")
+
+    print(f"sample={len(sample)} bytes, requests={args.requests}, concurrency={args.concurrency}, workers={args.workers}")
+    print(f"{'path':<28}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, handler in (
+        ("subprocess-per-request", legacy),
+        ("pooled pipes (mp3)", pooled_mp3),
+        ("pooled pipes (opus 24k)", pooled_opus),
+    ):
+        await handler()  # warm-up
+        r = await drive(handler, args.requests, args.concurrency)
+        print(f"{name:<28}{r['rps']:>10.1f}{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}")
+    transcoder.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
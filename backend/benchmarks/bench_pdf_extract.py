@@ -0,0 +1,112 @@
+"""
+Benchmark: PDF text extraction throughput per parser and worker count.
+
+Generates a corpus of synthetic text PDFs (no extra dependencies) and extracts
+each one with services.pdf_reader.extract_pages, from bytes and from a
+memory-mapped path. Run from backend/:
+
+    python -m benchmarks.bench_pdf_extract --docs 8 --pages 200 --workers 1 2 4
+
+Reports pages/sec for every installed parser (or the ones given with --parsers).
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from services import pdf_reader
+from services.pdf_reader import available_parsers, extract_pages
+
+WORDS = (
+    "retrieval augmented generation interview candidate experience python fastapi "
+    "embedding vector database latency throughput summary project design system"
+).split()
+
+
+def make_pdf(pages: int, lines_per_page: int = 40, seed: int = 0) -> bytes:
+    """A minimal valid PDF with ``pages`` pages of Helvetica text."""
+    objects: List[bytes] = []
+    font_id, pages_id = 3, 2
+    kids = []
+    for p in range(pages):
+        lines = []
+        for l in range(lines_per_page):
+            words = [WORDS[(seed + p * 7 + l * 3 + i) % len(WORDS)] for i in range(10)]
+            lines.append(f"({' '.join(words)}) Tj T*")
+        stream = f"BT /F1 10 Tf 12 TL 50 760 Td {' '.join(lines)} ET".encode()
+        content_id = 4 + 2 * p + 1
+        page_id = 4 + 2 * p
+        kids.append(page_id)
+        objects.append(
+            f"{page_id} 0 obj << /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >> endobj\n".encode()
+        )
+        objects.append(f"{content_id} 0 obj << /Length {len(stream)} >> stream\n".encode() + stream + b"\nendstream endobj\n")
+
+    header = [
+        b"1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n",
+        f"2 0 obj << /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {pages} >> endobj\n".encode(),
+        b"3 0 obj << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> endobj\n",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for obj in header + objects:
+        offsets.append(len(out))
+        out += obj
+    xref_at = len(out)
+    out += f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{o:010d} 00000 n \n".encode() for o in offsets)
+    out += f"trailer << /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def run(corpus: List[bytes], paths: List[str], parser: str, workers: int, from_path: bool) -> float:
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) if workers > 1 else None
+    try:
+        if pool is not None:
+            # Warm the workers so process start-up isn't counted
+            extract_pages(corpus[0], parser=parser, workers=workers, pool=pool)
+        started = time.perf_counter()
+        pages = 0
+        for data, path in zip(corpus, paths):
+            pages += len(extract_pages(path if from_path else data, parser=parser, workers=workers, pool=pool))
+        return pages / (time.perf_counter() - started)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--parsers", nargs="+", default=None)
+    args = parser.parse_args()
+
+    # Always take the parallel path when workers > 1, whatever the document size
+    pdf_reader.PDF_PARALLEL_MIN_PAGES = 1
+    corpus = [make_pdf(args.pages, seed=i) for i in range(args.docs)]
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i, data in enumerate(corpus):
+            path = os.path.join(tmp, f"doc{i}.pdf")
+            with open(path, "wb") as f:
+                f.write(data)
+            paths.append(path)
+
+        print(f"{args.docs} docs x {args.pages} pages, {sum(map(len, corpus)) / 1e6:.1f} MB")
+        print(f"{'parser':<10} {'workers':>7} {'bytes p/s':>10} {'mmap p/s':>10}")
+        for name in args.parsers or available_parsers():
+            for workers in args.workers:
+                in_memory = run(corpus, paths, name, workers, from_path=False)
+                mapped = run(corpus, paths, name, workers, from_path=True)
+                print(f"{name:<10} {workers:>7} {in_memory:>10.1f} {mapped:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
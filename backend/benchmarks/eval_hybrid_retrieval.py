@@ -0,0 +1,137 @@
+"""
+Evaluation: hybrid (BM25 + vector, RRF) vs vector-only retrieval.
+
+Ranks every query both ways over the same chunks and reports recall@k (share
+of a query's relevant chunks found in the top k) plus the context tokens each
+k sends to the LLM. The last line compares hybrid at ``--k`` with vector-only
+at ``--baseline-k`` (the old RAG_TOP_K default). Run from backend/:
+
+    python -m benchmarks.eval_hybrid_retrieval                       # synthetic resume corpus
+    python -m benchmarks.eval_hybrid_retrieval --file-id 12 --queries q.json
+
+With ``--file-id`` the chunks of an ingested file are used, and ``q.json`` lists
+``{"query": "...", "expect": ["substring", ...]}``; a chunk is relevant when it
+contains one of the expected substrings (case-insensitive). Tokens are
+estimated at 4 characters each.
+"""
+
+import argparse
+import json
+import random
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+from services.bm25_index import BM25Index
+from services.embeddings import encode_texts
+from services.hybrid_retriever import rrf_fuse
+
+FILLER = [
+    "worked closely with product and design to ship features on a tight schedule",
+    "improved reliability of backend services and reduced on-call incidents",
+    "owned the data pipeline end to end, from ingestion to reporting",
+    "collaborated with the platform team on deployment and observability",
+    "mentored two engineers and led weekly architecture reviews",
+    "rewrote a legacy module to make it easier to test and extend",
+    "partnered with customers to gather requirements and validate prototypes",
+]
+# Exact tokens a recruiter would ask about, with the question that targets each
+TOKENS = [
+    ("Kafka 3.6", "Which Kafka version did they run?"),
+    ("PyTorch 2.1", "What PyTorch version was used for training?"),
+    ("Terraform 1.5", "Which Terraform release managed the infrastructure?"),
+    ("CUDA 12.2", "What CUDA version did the GPU jobs use?"),
+    ("pgvector", "Did they use pgvector?"),
+    ("FAISS", "Where was FAISS used?"),
+    ("gRPC", "Which services communicated over gRPC?"),
+    ("OAuth2", "How was OAuth2 implemented?"),
+    ("RabbitMQ", "What was RabbitMQ used for?"),
+    ("Celery 5.4", "Which Celery version ran the background jobs?"),
+    ("Next.js 14", "Which Next.js version was the frontend on?"),
+    ("ISO 27001", "Did they work on ISO 27001 compliance?"),
+    ("SOC2", "What SOC2 work is mentioned?"),
+    ("HL7 FHIR", "Have they integrated HL7 FHIR APIs?"),
+    ("k8s HPA", "Did they configure k8s HPA autoscaling?"),
+    ("ONNX Runtime", "Where did they deploy ONNX Runtime?"),
+]
+
+
+def synthetic_corpus(chunks: int, seed: int = 0) -> Tuple[List[str], List[str], List[Tuple[str, Set[str]]]]:
+    rng = random.Random(seed)
+    ids, texts = [], []
+    relevant: Dict[str, Set[str]] = {token: set() for token, _ in TOKENS}
+    for n in range(chunks):
+        sentences = rng.sample(FILLER, 3)
+        if n % 3 == 0:
+            token = TOKENS[(n // 3) % len(TOKENS)][0]
+            sentences.insert(rng.randrange(4), f"the stack included {token}")
+            relevant[token].add(f"doc:{n}")
+        ids.append(f"doc:{n}")
+        texts.append("In this role the candidate " + "; ".join(sentences) + ".")
+    return ids, texts, [(question, relevant[token]) for token, question in TOKENS]
+
+
+def file_corpus(file_id: str, queries_path: str) -> Tuple[List[str], List[str], List[Tuple[str, Set[str]]]]:
+    from services.vectorstore import get_texts
+
+    texts = get_texts(file_id)
+    ids = [f"{file_id}:{n}" for n in range(len(texts))]
+    with open(queries_path) as f:
+        specs = json.load(f)
+    queries = []
+    for spec in specs:
+        expect = [e.lower() for e in spec["expect"]]
+        queries.append((spec["query"], {i for i, t in zip(ids, texts) if any(e in t.lower() for e in expect)}))
+    return ids, texts, [q for q in queries if q[1]]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=480)
+    parser.add_argument("--file-id", default=None)
+    parser.add_argument("--queries", default=None, help="JSON query file (required with --file-id)")
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--ks", type=int, nargs="+", default=[2, 4, 6, 8])
+    parser.add_argument("--k", type=int, default=4, help="hybrid k to compare")
+    parser.add_argument("--baseline-k", type=int, default=6, help="vector-only k to compare against")
+    args = parser.parse_args()
+
+    if args.file_id:
+        ids, texts, queries = file_corpus(args.file_id, args.queries)
+    else:
+        ids, texts, queries = synthetic_corpus(args.chunks)
+    tokens = {i: len(t) / 4 for i, t in zip(ids, texts)}
+    docs = np.asarray(encode_texts(texts), dtype=np.float32)
+    index = BM25Index.build(ids, texts)
+
+    rankings = {"vector": [], "hybrid": []}
+    for query, _ in queries:
+        scores = docs @ np.asarray(encode_texts([query])[0], dtype=np.float32)
+        vector = [ids[i] for i in np.argsort(-scores)[: args.candidates]]
+        lexical = [doc_id for doc_id, _ in index.search(query, args.candidates)]
+        rankings["vector"].append(vector)
+        rankings["hybrid"].append(rrf_fuse([vector, lexical]))
+
+    def evaluate(mode: str, k: int) -> Tuple[float, float]:
+        recall = np.mean([len(set(r[:k]) & rel) / len(rel) for r, (_, rel) in zip(rankings[mode], queries)])
+        context = np.mean([sum(tokens[d] for d in r[:k]) for r in rankings[mode]])
+        return float(recall), float(context)
+
+    print(f"{len(ids)} chunks, {len(queries)} queries, {args.candidates} candidates per ranking")
+    print(f"{'k':>3} {'vector R@k':>11} {'hybrid R@k':>11} {'ctx tokens':>11}")
+    for k in args.ks:
+        vector_recall, context = evaluate("vector", k)
+        hybrid_recall, _ = evaluate("hybrid", k)
+        print(f"{k:>3} {vector_recall:>11.2%} {hybrid_recall:>11.2%} {context:>11.0f}")
+
+    base_recall, base_tokens = evaluate("vector", args.baseline_k)
+    hybrid_recall, hybrid_tokens = evaluate("hybrid", args.k)
+    print(
+        f"vector@{args.baseline_k}: recall {base_recall:.2%}, {base_tokens:.0f} tokens | "
+        f"hybrid@{args.k}: recall {hybrid_recall:.2%}, {hybrid_tokens:.0f} tokens "
+        f"({1 - hybrid_tokens / max(base_tokens, 1e-9):.0%} fewer context tokens)"
+    )
+
+
+if __name__ == "__main__":
+    main()
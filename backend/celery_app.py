@@ -0,0 +1,30 @@
+"""
+Celery worker entry point for background PDF ingestion.
+
+Run with ``celery -A celery_app worker --loglevel=info`` from the backend
+directory, with ``INGEST_QUEUE_BACKEND=celery`` and ``INGEST_JOB_BACKEND=redis``
+set for both the API and the workers.
+"""
+
+import os
+from celery import Celery
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
+
+celery = Celery("ingestion", broker=CELERY_BROKER_URL)
+celery.conf.update(
+    task_acks_late=True,
+    # Ingestion jobs are long and CPU-heavy; take one at a time per worker process
+    worker_prefetch_multiplier=1,
+    task_default_queue="ingestion",
+)
+
+
+@celery.task(name="ingestion.ingest_pdf")
+def ingest_pdf(job_id: str) -> None:
+    from services.ingestion import process_job
+
+    process_job(job_id)
@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncGenerator, Deque, Dict
+
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from services.metrics import observe_stage
+from .session import DATABASE_URL
+
+
+# Async driver used for MySQL URLs (asyncmy or aiomysql); SQLite always uses aiosqlite
+DB_ASYNC_DRIVER = os.getenv("DB_ASYNC_DRIVER", "asyncmy")
+# Optional explicit async URL; by default DATABASE_URL is rewritten to the async driver
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or DATABASE_URL
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+# Seconds to wait for a free pooled connection before failing the request
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+
+_ASYNC_DRIVERS = {"aiosqlite", "asyncmy", "aiomysql", "asyncpg"}
+
+
+def to_async_url(url: str) -> URL:
+    """Swap the sync driver in a database URL for its async counterpart."""
+    parsed = make_url(url)
+    if parsed.get_driver_name() in _ASYNC_DRIVERS:
+        return parsed
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite")
+    if backend in ("mysql", "mariadb"):
+        return parsed.set(drivername=f"{backend}+{DB_ASYNC_DRIVER}")
+    if backend == "postgresql":
+        return parsed.set(drivername="postgresql+asyncpg")
+    raise ValueError(f"No async driver configured for database backend {backend!r}")
+
+
+class PoolStats:
+    """Connection checkout counters and wait times (seconds) for the async pool."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._waits: Deque[float] = deque(maxlen=1000)
+
+    def record(self, wait: float) -> None:
+        observe_stage("db_checkout", wait)
+        with self._lock:
+            self._checkouts += 1
+            self._waits.append(wait)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self._timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(w * 1000 for w in self._waits)
+            checkouts, timeouts = self._checkouts, self._timeouts
+
+        def pct(p: float) -> float:
+            return round(waits[min(len(waits) - 1, int(round(p / 100 * (len(waits) - 1))))], 2) if waits else 0.0
+
+        return {
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_ms_p50": pct(50),
+            "wait_ms_p99": pct(99),
+            "wait_ms_max": round(waits[-1], 2) if waits else 0.0,
+        }
+
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        # Covers both waiting on the queue and opening a new connection under the overflow limit
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.record_timeout()
+            raise
+        pool_stats.record(time.perf_counter() - started)
+        return connection
+
+
+def _engine_kwargs(url: URL) -> Dict[str, Any]:
+    if url.get_backend_name() == "sqlite":
+        if url.database in (None, "", ":memory:"):
+            # An in-memory database only exists on its one connection
+            return {}
+        connect_args = {"timeout": DB_CONNECT_TIMEOUT}
+    else:
+        connect_args = {"connect_timeout": DB_CONNECT_TIMEOUT}
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+        "connect_args": connect_args,
+    }
+
+
+_async_url = to_async_url(ASYNC_DATABASE_URL)
+async_engine = create_async_engine(_async_url, **_engine_kwargs(_async_url))
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def pool_status() -> Dict[str, Any]:
+    """Pool occupancy plus checkout wait statistics."""
+    pool = async_engine.pool
+    status: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=DB_MAX_OVERFLOW,
+        )
+    status.update(pool_stats.snapshot())
+    return status
@@ -1,13 +1,42 @@
-from fastapi import FastAPI
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from routers import uploads
 from routers import flow
-from db.session import engine
-from models import Base  # ensures models are imported and metadata available
+from routers import voice
 from stt_services.routes import router as stt_router
 from tts_service.routes import router as tts_router
+from tts_service.app import prewarm_tts_cache
+from services.interview_engine import InterviewEngine
+from services.summary_engine import SummaryEngine
+from services.rag_pipeline import RATE_LIMIT_ANSWER as RAG_RATE_LIMIT_ANSWER
+from services.warmup import WarmupStatus, start_warmup
+from services.metrics import render as render_metrics
+from db.async_session import async_engine
 
-app = FastAPI(title="Gemini Voice RAG Backend")
+
+def static_tts_phrases():
+    """Fixed answers the engines can emit verbatim; their audio is pre-rendered at startup."""
+    return InterviewEngine.canned_answers() + SummaryEngine.canned_answers() + [RAG_RATE_LIMIT_ANSWER]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema creation, model load and vector store open (see services/warmup.py)
+    app.state.warmup = WarmupStatus()
+    tasks = [await start_warmup(app.state.warmup)]
+    if os.getenv("TTS_PREWARM", "true").lower() in ("1", "true", "yes"):
+        # Runs in the background so startup isn't held up by gTTS round trips
+        tasks.append(asyncio.create_task(prewarm_tts_cache(static_tts_phrases())))
+    yield
+    for task in tasks:
+        task.cancel()
+    await async_engine.dispose()
+
+
+app = FastAPI(title="Gemini Voice RAG Backend", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,12 +48,27 @@ app.add_middleware(
 
 app.include_router(uploads.router)
 app.include_router(flow.router)
+app.include_router(voice.router)
 app.include_router(stt_router)
 app.include_router(tts_router)
 
-# Create tables on startup if they don't exist
-Base.metadata.create_all(bind=engine)
 
 @app.get("/")
 def root():
     return {"status": "ok"}
+
+
+@app.get("/ready")
+def ready(response: Response):
+    """503 until start-up warm-up has finished (or if a step failed), then 200."""
+    status: WarmupStatus = app.state.warmup
+    if status.state != "ready":
+        response.status_code = 503
+    return status.as_dict()
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint (per worker process)."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
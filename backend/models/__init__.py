@@ -1,4 +1,5 @@
 from db.base import Base  # re-export Base for convenience
 from .pdf import PDFFile  # ensure model is imported so metadata is populated
+from .profile import DocumentProfile
 
-__all__ = ["Base", "PDFFile"]
+__all__ = ["Base", "PDFFile", "DocumentProfile"]
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from db.base import Base
+from datetime import datetime
+
+class DocumentProfile(Base):
+    """Summary and interview profile precomputed for a PDFFile at ingestion time."""
+
+    __tablename__ = "document_profiles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    file_id = Column(Integer, ForeignKey("pdf_files.id", ondelete="CASCADE"), nullable=False, unique=True, index=True)
+    content_hash = Column(String(64), nullable=False, index=True)  # sha256 of the uploaded PDF bytes
+    summary = Column(Text, nullable=False)
+    interview_profile = Column(Text, nullable=False)
+    chunk_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
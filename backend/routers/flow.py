@@ -1,7 +1,13 @@
+import asyncio
+import json
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Optional
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Optional
 from services.orchestrator import run_flow
+from services.answer_cache import get_answer_cache
+from services.context_builder import CONTEXT_PACKING, context_stats
+from services.embeddings import EMBED_BATCHING, get_embedding_batcher
 
 router = APIRouter(prefix="/flow", tags=["Flow"])
 
@@ -10,6 +16,10 @@ class FlowRequest(BaseModel):
     file_id: int
     question: str
     conversation_session_id: Optional[str] = None
+    # Returned by the first response; keys this client's question history
+    client_session_id: Optional[str] = Field(None, max_length=64)
+    # Include per-stage timings_ms in the response
+    debug: bool = False
 
 
 @router.post("/ask")
@@ -22,7 +32,9 @@ async def ask_flow(req: FlowRequest):
         result = await run_flow(
             str(req.file_id), 
             req.question, 
-            conversation_session_id=req.conversation_session_id
+            conversation_session_id=req.conversation_session_id,
+            debug=req.debug,
+            client_session_id=req.client_session_id,
         )
         return result
             
@@ -30,3 +42,81 @@ async def ask_flow(req: FlowRequest):
         raise HTTPException(status_code=404, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to run flow: {e}")
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/ask/stream")
+async def ask_flow_stream(req: FlowRequest):
+    """
+    Streaming variant of /flow/ask (Server-Sent Events).
+
+    Events: ``intent`` (resolved intent and session id), ``token`` (answer text
+    chunks), ``reset`` (discard tokens received so far; a fallback follows),
+    ``done`` (the same payload /flow/ask returns) or ``error``.
+    """
+    if not req.question or not req.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+
+    queue: "asyncio.Queue" = asyncio.Queue()
+
+    def emit(event: str, data: Dict[str, Any]) -> None:
+        queue.put_nowait((event, data))
+
+    async def produce() -> None:
+        try:
+            result = await run_flow(
+                str(req.file_id),
+                req.question,
+                conversation_session_id=req.conversation_session_id,
+                emit=emit,
+                debug=req.debug,
+                client_session_id=req.client_session_id,
+            )
+            emit("done", result)
+        except ValueError as ve:
+            emit("error", {"status_code": 404, "detail": str(ve)})
+        except Exception as e:
+            emit("error", {"status_code": 500, "detail": f"Failed to run flow: {e}"})
+        finally:
+            queue.put_nowait(None)
+
+    async def event_stream():
+        task = asyncio.create_task(produce())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                yield _sse(*item)
+        finally:
+            # Client went away: stop generating
+            task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/cache/stats")
+async def answer_cache_stats():
+    """Hit/miss counters for the semantic answer cache."""
+    return get_answer_cache().stats()
+
+
+@router.get("/embeddings/stats")
+async def embedding_batcher_stats():
+    """Batch size and queue delay of the shared embedding batcher."""
+    if not EMBED_BATCHING:
+        return {"enabled": False}
+    return {"enabled": True, **get_embedding_batcher().stats()}
+
+
+@router.get("/context/stats")
+async def context_packing_stats():
+    """Prompt context tokens before and after packing, per intent."""
+    return {"enabled": CONTEXT_PACKING, "intents": context_stats.stats()}
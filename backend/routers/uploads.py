@@ -1,15 +1,9 @@
-from fastapi import FastAPI, UploadFile, File, Depends, APIRouter, HTTPException
-from sqlalchemy.orm import Session
-import cloudinary
-import cloudinary.uploader
-import os
-import uuid
-from db.session import get_db
+from fastapi import UploadFile, File, Depends, APIRouter, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+from db.async_session import get_async_db, pool_status
 from models.pdf import PDFFile
-from services.pdf_reader import extract_text_from_pdf
-from PyPDF2.errors import PdfReadError
-from services.rag_pipeline import astore_embeddings
-from dotenv import load_dotenv
+from services.ingestion import get_job_store, submit_upload
 from utils.cloudinary import ensure_configured as ensure_cloudinary_config
 
 router = APIRouter(prefix="/upload", tags=["Upload"])
@@ -22,61 +16,49 @@ def _configure_cloudinary_if_needed() -> None:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/upload_pdf/")
-async def upload_pdf(file: UploadFile = File(...), db: Session = Depends(get_db)):
+@router.post("/upload_pdf/", status_code=status.HTTP_202_ACCEPTED)
+async def upload_pdf(file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
+    """Accept a PDF and queue it for ingestion; poll ``/upload/jobs/{job_id}`` for progress."""
     _configure_cloudinary_if_needed()
     # Read file into memory once
     contents = await file.read()
+    # Cheap check so obviously wrong files are rejected before a job is queued
+    # (the PDF spec allows the header anywhere in the first 1024 bytes)
+    if b"%PDF-" not in contents[:1024]:
+        raise HTTPException(status_code=400, detail="Invalid or corrupt PDF: missing PDF header")
 
-    # Upload to Cloudinary
-    result = cloudinary.uploader.upload(
-        contents,
-        resource_type="raw",
-        public_id=f"pdfs/{file.filename.split('.')[0]}",
-        unique_filename=False,
-        overwrite=True,
-        filename=file.filename,
-    )
-
-    # Save metadata in DB
-    pdf_record = PDFFile(filename=file.filename, cloud_url=result["secure_url"])
+    # Save metadata in DB; the Cloudinary URL is filled in by the ingestion worker
+    pdf_record = PDFFile(filename=file.filename, cloud_url="")
     db.add(pdf_record)
-    db.commit()
-    db.refresh(pdf_record)
-
-    # Save temporary file for text extraction
-    temp_filename = f"temp_{uuid.uuid4()}.pdf"
-    with open(temp_filename, "wb") as f:
-        f.write(contents)
+    await db.commit()
+    await db.refresh(pdf_record)
 
-    # Extract text and store embeddings
     try:
-        text = extract_text_from_pdf(temp_filename)
-    except PdfReadError as e:
-        # Cleanup and return a 400 error for invalid/corrupt PDFs
-        os.remove(temp_filename)
-        # Also delete the DB record since this PDF isn't usable for RAG
-        db.delete(pdf_record)
-        db.commit()
-        raise HTTPException(status_code=400, detail=f"Invalid or corrupt PDF: {str(e)}")
-
-    if not text.strip():
-        # Cleanup temp file and skip embeddings if no text
-        os.remove(temp_filename)
-        return {
-            "id": pdf_record.id,
-            "url": pdf_record.cloud_url,
-            "message": "PDF uploaded, but no extractable text was found (no embeddings created)",
-        }
-
-    # Offload embeddings to async wrapper so the event loop isn't blocked
-    await astore_embeddings(text, str(pdf_record.id))
-
-    # Remove temp file
-    os.remove(temp_filename)
+        job = await asyncio.to_thread(submit_upload, contents, str(pdf_record.id), file.filename)
+    except Exception as e:
+        await db.delete(pdf_record)
+        await db.commit()
+        raise HTTPException(status_code=503, detail=f"Could not queue PDF for ingestion: {e}")
 
     return {
         "id": pdf_record.id,
-        "url": pdf_record.cloud_url,
-        "message": "PDF uploaded and embeddings stored successfully",
+        "job_id": job.job_id,
+        "status": job.status,
+        "status_url": f"/upload/jobs/{job.job_id}",
+        "message": "PDF accepted; extraction and embedding are running in the background",
     }
+
+
+@router.get("/jobs/{job_id}")
+async def ingestion_status(job_id: str):
+    """Ingestion progress: queued, uploading, extracting, embedding (with chunk counts), ready or failed."""
+    job = await asyncio.to_thread(get_job_store().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired ingestion job")
+    return job.to_dict()
+
+
+@router.get("/db/stats")
+async def db_stats():
+    """Async DB pool occupancy and connection checkout wait times."""
+    return pool_status()
@@ -0,0 +1,64 @@
+import json
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from typing import Optional
+from services.voice_session import VoiceSession
+
+router = APIRouter(prefix="/voice", tags=["Voice"])
+
+
+@router.websocket("/ws")
+async def voice_ws(websocket: WebSocket, file_id: Optional[int] = None, conversation_session_id: Optional[str] = None):
+    """
+    Persistent voice session: audio in, transcript + answer text + audio out.
+
+    Client -> server: binary frames carry the current utterance; JSON messages are
+    ``start``/``config`` (file_id, format, speed, lang, voice, audio_filename,
+    partials), ``end_turn``, ``text`` (typed question) and ``cancel``.
+    Server -> client: ``ready``, ``transcript``, ``intent``, ``token``, ``reset``,
+    ``answer``, ``audio`` (followed by one binary frame), ``audio_reset``,
+    ``turn_end`` and ``error``.
+    """
+    await websocket.accept()
+    session = VoiceSession(
+        websocket.send_json,
+        websocket.send_bytes,
+        file_id=str(file_id) if file_id is not None else None,
+        conversation_session_id=conversation_session_id,
+    )
+    session.ready()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                session.add_audio(message["bytes"])
+                continue
+            try:
+                data = json.loads(message.get("text") or "")
+            except ValueError:
+                session.error(400, "Messages must be JSON text or binary audio")
+                continue
+            if not isinstance(data, dict):
+                session.error(400, "JSON messages must be objects with a \"type\"")
+                continue
+
+            # A bad frame gets an error event; the connection stays up
+            kind = data.get("type")
+            try:
+                if kind in ("start", "config"):
+                    session.configure(data)
+                elif kind == "end_turn":
+                    session.end_turn()
+                elif kind == "text":
+                    session.ask(data.get("question", ""))
+                elif kind == "cancel":
+                    session.cancel()
+                else:
+                    session.error(400, f"Unknown message type: {kind}")
+            except (TypeError, ValueError) as e:
+                session.error(400, f"Invalid {kind} message: {e}")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await session.close()
@@ -0,0 +1,210 @@
+"""
+Answer Cache Service
+
+Semantic cache in front of the RAG and summary flows. Questions are normalized
+and embedded with the existing ``STEmbeddings``; a stored answer is returned when
+a previous question for the same file and intent is within
+``ANSWER_CACHE_THRESHOLD`` cosine similarity.
+
+Entries expire after ``ANSWER_CACHE_TTL_SECONDS`` and the in-process backend
+keeps at most ``ANSWER_CACHE_MAX_ENTRIES`` (LRU). Set ``ANSWER_CACHE_BACKEND=redis``
+to share answers between workers. A file's entries are dropped whenever it is
+re-embedded.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+
+from .embeddings import STEmbeddings
+
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2000"))
+ANSWER_CACHE_MAX_PER_FILE = int(os.getenv("ANSWER_CACHE_MAX_PER_FILE", "200"))
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so trivial variants share an embedding."""
+    text = re.sub(r"[^\w\s']+", " ", question.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def embed_question(question: str) -> List[float]:
+    """Embed the normalized question (blocking; run it in a thread from async code)."""
+    return STEmbeddings().embed_query(normalize_question(question))
+
+
+def _best_match(entries: List[Dict[str, Any]], vector: np.ndarray, threshold: float) -> Optional[Dict[str, Any]]:
+    if not entries:
+        return None
+    matrix = np.asarray([e["vector"] for e in entries], dtype=np.float32)
+    sims = matrix @ vector
+    idx = int(np.argmax(sims))
+    return entries[idx] if sims[idx] >= threshold else None
+
+
+class InMemoryAnswerCacheBackend:
+    """Process-local backend with global LRU and TTL eviction."""
+
+    def __init__(self, ttl_seconds: int = ANSWER_CACHE_TTL_SECONDS, max_entries: int = ANSWER_CACHE_MAX_ENTRIES) -> None:
+        self._ttl = ttl_seconds
+        self._max = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._by_file: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, file_id: str, intent: str, vector: np.ndarray, threshold: float) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cutoff = time.time() - self._ttl
+            candidates = []
+            for entry_id in list(self._by_file.get(file_id, ())):
+                entry = self._entries[entry_id]
+                if entry["created_at"] < cutoff:
+                    self._remove_locked(entry_id)
+                elif entry["intent"] == intent:
+                    candidates.append(entry)
+            match = _best_match(candidates, vector, threshold)
+            if match is not None:
+                self._entries.move_to_end(match["id"])
+            return match
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[entry["id"]] = entry
+            self._by_file.setdefault(entry["file_id"], set()).add(entry["id"])
+            while len(self._entries) > self._max:
+                self._remove_locked(next(iter(self._entries)))
+
+    def invalidate(self, file_id: str) -> None:
+        with self._lock:
+            for entry_id in list(self._by_file.get(file_id, ())):
+                self._remove_locked(entry_id)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def _remove_locked(self, entry_id: str) -> None:
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        ids = self._by_file.get(entry["file_id"])
+        if ids is not None:
+            ids.discard(entry_id)
+            if not ids:
+                del self._by_file[entry["file_id"]]
+
+
+class RedisAnswerCacheBackend:
+    """Redis-compatible backend shared by all workers: one capped list per file, expiring with the TTL."""
+
+    def __init__(
+        self,
+        url: str = os.getenv("ANSWER_CACHE_REDIS_URL", os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")),
+        ttl_seconds: int = ANSWER_CACHE_TTL_SECONDS,
+        max_per_file: int = ANSWER_CACHE_MAX_PER_FILE,
+        prefix: str = "answers:",
+    ) -> None:
+        import redis  # imported lazily; only needed when this backend is selected
+
+        self._client = redis.Redis.from_url(url)
+        self._ttl = ttl_seconds
+        self._max_per_file = max_per_file
+        self._prefix = prefix
+
+    def lookup(self, file_id: str, intent: str, vector: np.ndarray, threshold: float) -> Optional[Dict[str, Any]]:
+        cutoff = time.time() - self._ttl
+        candidates = []
+        for raw in self._client.lrange(self._prefix + file_id, 0, -1):
+            entry = json.loads(raw)
+            if entry["intent"] == intent and entry["created_at"] >= cutoff:
+                candidates.append(entry)
+        return _best_match(candidates, vector, threshold)
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        key = self._prefix + entry["file_id"]
+        payload = dict(entry, vector=[float(x) for x in entry["vector"]])
+        pipe = self._client.pipeline()
+        pipe.lpush(key, json.dumps(payload))
+        pipe.ltrim(key, 0, self._max_per_file - 1)
+        pipe.expire(key, self._ttl)
+        pipe.execute()
+
+    def invalidate(self, file_id: str) -> None:
+        self._client.delete(self._prefix + file_id)
+
+    def size(self) -> int:
+        return -1  # not tracked for the shared backend
+
+
+class AnswerCache:
+    """Semantic answer cache facade with hit/miss counters."""
+
+    def __init__(self, backend, threshold: float = ANSWER_CACHE_THRESHOLD) -> None:
+        self._backend = backend
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, file_id: str, intent: str, vector: List[float]) -> Optional[str]:
+        """Return a cached answer for a semantically equivalent question, if any."""
+        try:
+            entry = self._backend.lookup(str(file_id), intent, np.asarray(vector, dtype=np.float32), self.threshold)
+        except Exception as e:
+            print(f"Answer cache lookup failed: {e}")
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["answer"]
+
+    def put(self, file_id: str, intent: str, question: str, vector: List[float], answer: str) -> None:
+        try:
+            self._backend.add({
+                "id": uuid.uuid4().hex,
+                "file_id": str(file_id),
+                "intent": intent,
+                "question": normalize_question(question),
+                "vector": np.asarray(vector, dtype=np.float32),
+                "answer": answer,
+                "created_at": time.time(),
+            })
+        except Exception as e:
+            print(f"Answer cache store failed: {e}")
+
+    def invalidate(self, file_id: str) -> None:
+        """Drop every cached answer for a file (call after re-embedding it)."""
+        try:
+            self._backend.invalidate(str(file_id))
+        except Exception as e:
+            print(f"Answer cache invalidation failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "enabled": ANSWER_CACHE_ENABLED,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": self._backend.size(),
+            "threshold": self.threshold,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_answer_cache() -> AnswerCache:
+    """Process-wide answer cache configured from ``ANSWER_CACHE_BACKEND``."""
+    name = os.getenv("ANSWER_CACHE_BACKEND", "memory").strip().lower()
+    backend = RedisAnswerCacheBackend() if name == "redis" else InMemoryAnswerCacheBackend()
+    return AnswerCache(backend)
@@ -0,0 +1,212 @@
+"""
+Per-file BM25 lexical index.
+
+Built at ingestion next to the file's Chroma collection, from the same chunks
+and chunk ids, so its rankings can be fused with vector search (see
+hybrid_retriever). The tokenizer keeps exact technical tokens whole
+(``node.js``, ``c++``, ``python3.11``, ``gpt-4``) and also indexes their parts.
+
+On disk an index is one compressed ``.npz`` under ``BM25_DIR``: the chunk ids,
+document lengths, the sorted vocabulary and CSR-style postings (term offsets
+into parallel doc-index / term-frequency arrays). Loaded indexes are kept in an
+LRU of ``BM25_CACHE_MAX_FILES`` files and dropped when the file is re-ingested.
+"""
+
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .vectorstore import collection_name
+
+
+BM25_DIR = os.getenv("BM25_DIR", "./bm25_index")
+BM25_K1 = float(os.getenv("BM25_K1", "1.5"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+BM25_CACHE_MAX_FILES = int(os.getenv("BM25_CACHE_MAX_FILES", "64"))
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#._/-]*[a-z0-9+#]|[a-z0-9]")
+_SEPARATORS = re.compile(r"[._/-]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from had has have how i in is it its of on or that the their "
+    "this to was were what when where which who why with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms; compound tokens are kept whole and also split into their parts."""
+    terms: List[str] = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        terms.append(token)
+        if _SEPARATORS.search(token):
+            terms.extend(p for p in _SEPARATORS.split(token) if p and p != token and p not in _STOPWORDS)
+    return terms
+
+
+class BM25Index:
+    """Immutable BM25 index over one file's chunks."""
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        doc_len: np.ndarray,
+        terms: Sequence[str],
+        offsets: np.ndarray,
+        postings_doc: np.ndarray,
+        postings_tf: np.ndarray,
+    ) -> None:
+        self.ids = list(ids)
+        self._doc_len = doc_len.astype(np.float32)
+        self._avg_len = float(self._doc_len.mean()) if len(self._doc_len) else 0.0
+        self._terms = list(terms)
+        self._term_index = {term: i for i, term in enumerate(self._terms)}
+        self._offsets = offsets
+        self._postings_doc = postings_doc
+        self._postings_tf = postings_tf
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, ids: Sequence[str], texts: Sequence[str]) -> "BM25Index":
+        builder = BM25Builder()
+        builder.add(ids, texts)
+        return builder.build()
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Top ``k`` (chunk id, score) pairs; chunks sharing no term with the query are left out."""
+        n = len(self.ids)
+        if not n:
+            return []
+        scores = np.zeros(n, dtype=np.float32)
+        for term in set(tokenize(query)):
+            i = self._term_index.get(term)
+            if i is None:
+                continue
+            start, end = self._offsets[i], self._offsets[i + 1]
+            docs = self._postings_doc[start:end]
+            tf = self._postings_tf[start:end].astype(np.float32)
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_len[docs] / max(self._avg_len, 1e-9))
+            scores[docs] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        hits = np.flatnonzero(scores)
+        top = hits[np.argsort(-scores[hits], kind="stable")[:k]]
+        return [(self.ids[i], float(scores[i])) for i in top]
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                ids=np.array(self.ids, dtype=str),
+                doc_len=self._doc_len.astype(np.int32),
+                terms=np.array(self._terms, dtype=str),
+                offsets=self._offsets,
+                postings_doc=self._postings_doc,
+                postings_tf=self._postings_tf,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["ids"].tolist(),
+                data["doc_len"],
+                data["terms"].tolist(),
+                data["offsets"],
+                data["postings_doc"],
+                data["postings_tf"],
+            )
+
+
+class BM25Builder:
+    """Accumulates chunks batch by batch (as they are embedded) and freezes them into a BM25Index."""
+
+    def __init__(self) -> None:
+        self._ids: List[str] = []
+        self._doc_len: List[int] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+
+    def add(self, ids: Sequence[str], texts: Sequence[str]) -> None:
+        for chunk_id, text in zip(ids, texts):
+            doc = len(self._ids)
+            terms = tokenize(text)
+            self._ids.append(chunk_id)
+            self._doc_len.append(len(terms))
+            for term, tf in Counter(terms).items():
+                self._postings.setdefault(term, []).append((doc, tf))
+
+    def build(self) -> BM25Index:
+        terms = sorted(self._postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        docs: List[int] = []
+        tfs: List[int] = []
+        for i, term in enumerate(terms):
+            postings = self._postings[term]
+            docs.extend(d for d, _ in postings)
+            tfs.extend(min(tf, 65535) for _, tf in postings)
+            offsets[i + 1] = len(docs)
+        return BM25Index(
+            self._ids,
+            np.array(self._doc_len, dtype=np.int32),
+            terms,
+            offsets,
+            np.array(docs, dtype=np.int32),
+            np.array(tfs, dtype=np.uint16),
+        )
+
+
+def index_path(file_id: str) -> str:
+    return os.path.join(BM25_DIR, f"{collection_name(str(file_id))}.npz")
+
+
+# Loaded indexes keyed by path, with the file mtime they were loaded at; least recently used first
+_loaded: "OrderedDict[str, Tuple[float, BM25Index]]" = OrderedDict()
+_loaded_lock = threading.Lock()
+
+
+def _evict(path: str) -> None:
+    with _loaded_lock:
+        _loaded.pop(path, None)
+
+
+def save_index(file_id: str, index: BM25Index) -> None:
+    path = index_path(file_id)
+    _evict(path)
+    index.save(path)
+
+
+def load_index(file_id: str) -> Optional[BM25Index]:
+    """The file's index, or None if it has none (e.g. ingested before indexes existed)."""
+    path = index_path(file_id)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _loaded_lock:
+        cached = _loaded.get(path)
+        if cached is not None and cached[0] == mtime:
+            _loaded.move_to_end(path)
+            return cached[1]
+    index = BM25Index.load(path)
+    with _loaded_lock:
+        _loaded[path] = (mtime, index)
+        _loaded.move_to_end(path)
+        while len(_loaded) > max(BM25_CACHE_MAX_FILES, 1):
+            _loaded.popitem(last=False)
+    return index
+
+
+def delete_index(file_id: str) -> None:
+    path = index_path(file_id)
+    _evict(path)
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,215 @@
+"""
+Token-budgeted context packing for LLM prompts.
+
+Retrieved chunks used to be joined as-is, so the ingestion overlap between
+neighbouring chunks and near-duplicate chunks were sent to Gemini repeatedly
+and prompt size grew with k. build_context instead:
+
+1. orders the chunks by MMR over their stored embeddings: retrieval rank for
+   relevance, similarity to already picked chunks as the redundancy penalty;
+   chunks at or above ``CONTEXT_DUPLICATE_SIMILARITY`` to a picked one are dropped
+2. packs them in that order into the intent's token budget
+   (``CONTEXT_BUDGET_RAG`` / ``_SUMMARY`` / ``_INTERVIEW``)
+3. restores document order and cuts the text a chunk shares with the chunk
+   right before it
+
+Tokens are estimated at 4 characters each. Per-intent totals of tokens in and
+out are kept for ``/flow/context/stats``.
+"""
+
+import asyncio
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .embeddings import encode_texts
+from .vectorstore import get_collection
+
+
+CONTEXT_PACKING = os.getenv("CONTEXT_PACKING", "true").lower() in ("1", "true", "yes")
+CONTEXT_BUDGETS = {
+    "rag": int(os.getenv("CONTEXT_BUDGET_RAG", "1200")),
+    "summary": int(os.getenv("CONTEXT_BUDGET_SUMMARY", "3000")),
+    "interview": int(os.getenv("CONTEXT_BUDGET_INTERVIEW", "1500")),
+}
+# 1.0 ranks purely by retrieval order; lower values favour diversity
+CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))
+CONTEXT_DUPLICATE_SIMILARITY = float(os.getenv("CONTEXT_DUPLICATE_SIMILARITY", "0.95"))
+# Shortest shared prefix/suffix treated as chunk overlap rather than coincidence
+_MIN_OVERLAP_CHARS = 20
+_MAX_OVERLAP_CHARS = 400
+
+_CHUNK_ID = re.compile(r"^(.*):(\d+)$")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+@dataclass
+class PackedContext:
+    text: str
+    chunks_in: int
+    chunks_used: int
+    tokens_in: int  # the chunks joined as-is
+    tokens_used: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(self.tokens_in - self.tokens_used, 0)
+
+
+class ContextStats:
+    """Per-intent totals of context tokens before and after packing."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, int]] = {}
+
+    def record(self, intent: str, packed: PackedContext) -> None:
+        with self._lock:
+            totals = self._totals.setdefault(intent, {"calls": 0, "tokens_in": 0, "tokens_used": 0, "chunks_in": 0, "chunks_used": 0})
+            totals["calls"] += 1
+            totals["tokens_in"] += packed.tokens_in
+            totals["tokens_used"] += packed.tokens_used
+            totals["chunks_in"] += packed.chunks_in
+            totals["chunks_used"] += packed.chunks_used
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = {}
+            for intent, t in self._totals.items():
+                saved = t["tokens_in"] - t["tokens_used"]
+                out[intent] = {
+                    **t,
+                    "tokens_saved": saved,
+                    "saved_ratio": round(saved / t["tokens_in"], 3) if t["tokens_in"] else 0.0,
+                    "budget": CONTEXT_BUDGETS.get(intent),
+                }
+            return out
+
+
+context_stats = ContextStats()
+
+
+def _position(chunk_id: Optional[str]) -> Optional[tuple]:
+    match = _CHUNK_ID.match(chunk_id or "")
+    return (match.group(1), int(match.group(2))) if match else None
+
+
+def _overlap(previous: str, current: str) -> int:
+    """Length of the longest suffix of ``previous`` that ``current`` starts with."""
+    longest = min(len(previous), len(current), _MAX_OVERLAP_CHARS)
+    for size in range(longest, _MIN_OVERLAP_CHARS - 1, -1):
+        if previous.endswith(current[:size]):
+            return size
+    return 0
+
+
+def _chunk_vectors(file_id: Optional[str], ids: List[Optional[str]], texts: List[str]) -> np.ndarray:
+    """Stored embeddings of the chunks, encoding only the ones the collection can't supply."""
+    found: Dict[str, Any] = {}
+    known = [i for i in ids if i]
+    collection = get_collection(file_id) if file_id is not None and known else None
+    if collection is not None:
+        try:
+            data = collection.get(ids=known, include=["embeddings"])
+            found = dict(zip(data["ids"], data["embeddings"]))
+        except Exception:
+            found = {}
+    missing = [n for n, chunk_id in enumerate(ids) if found.get(chunk_id) is None]
+    encoded = encode_texts([texts[n] for n in missing]) if missing else []
+    rows = [None] * len(ids)
+    for n, chunk_id in enumerate(ids):
+        if found.get(chunk_id) is not None:
+            rows[n] = np.asarray(found[chunk_id], dtype=np.float32)
+    for n, vector in zip(missing, encoded):
+        rows[n] = np.asarray(vector, dtype=np.float32)
+    vectors = np.vstack(rows)
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def _mmr_order(vectors: np.ndarray) -> List[int]:
+    """Chunk indexes by MMR (relevance = retrieval rank), near-duplicates removed."""
+    n = len(vectors)
+    relevance = 1.0 - np.arange(n, dtype=np.float32) / max(n, 1)
+    similarity = vectors @ vectors.T
+    picked: List[int] = []
+    remaining = list(range(n))
+    while remaining:
+        if picked:
+            redundancy = similarity[np.ix_(remaining, picked)].max(axis=1)
+        else:
+            redundancy = np.zeros(len(remaining), dtype=np.float32)
+        keep = redundancy < CONTEXT_DUPLICATE_SIMILARITY
+        remaining = [r for r, k in zip(remaining, keep) if k]
+        if not remaining:
+            break
+        redundancy = redundancy[keep]
+        scores = CONTEXT_MMR_LAMBDA * relevance[remaining] - (1 - CONTEXT_MMR_LAMBDA) * redundancy
+        best = remaining[int(np.argmax(scores))]
+        picked.append(best)
+        remaining.remove(best)
+    return picked
+
+
+def build_context(docs: Sequence[Any], intent: str, file_id: Optional[str] = None, budget: Optional[int] = None) -> PackedContext:
+    """Deduplicated, overlap-free context from ``docs`` (in retrieval order) within the intent's token budget."""
+    items = [
+        (d.page_content, (getattr(d, "metadata", None) or {}).get("chunk_id"))
+        for d in docs
+        if getattr(d, "page_content", None)
+    ]
+    texts = [text for text, _ in items]
+    ids = [chunk_id for _, chunk_id in items]
+    tokens_in = estimate_tokens("\n\n".join(texts))
+    if not CONTEXT_PACKING or not texts:
+        packed = PackedContext("\n\n".join(texts), len(texts), len(texts), tokens_in, tokens_in)
+        context_stats.record(intent, packed)
+        return packed
+
+    budget = budget if budget is not None else CONTEXT_BUDGETS.get(intent, CONTEXT_BUDGETS["rag"])
+    positions = [_position(chunk_id) for chunk_id in ids]
+    index_of = {pos: n for n, pos in enumerate(positions) if pos is not None}
+    # Text each chunk repeats from the chunk right before it, if that one was retrieved too
+    overlaps = [0] * len(texts)
+    for n, pos in enumerate(positions):
+        previous = index_of.get((pos[0], pos[1] - 1)) if pos is not None else None
+        if previous is not None:
+            overlaps[n] = _overlap(texts[previous], texts[n])
+    previous_of = {n: index_of.get((pos[0], pos[1] - 1)) for n, pos in enumerate(positions) if pos is not None}
+
+    selected: List[int] = []
+    used = 0
+    for n in _mmr_order(_chunk_vectors(file_id, ids, texts)):
+        trim = overlaps[n] if previous_of.get(n) in selected else 0
+        cost = estimate_tokens(texts[n][trim:]) + 1
+        if used + cost > budget:
+            if not selected:
+                # Even the best chunk is over budget: send its head rather than nothing
+                texts[n] = texts[n][: budget * 4]
+                selected.append(n)
+                used = budget
+            continue
+        selected.append(n)
+        used += cost
+
+    # Document order reads better and lets adjacent chunks be joined without their overlap
+    ordered = sorted(selected, key=lambda n: positions[n] or ("", n))
+    parts = []
+    for n in ordered:
+        trim = overlaps[n] if previous_of.get(n) in selected else 0
+        parts.append(texts[n][trim:])
+    text = "\n\n".join(p for p in parts if p.strip())
+    packed = PackedContext(text, len(texts), len(selected), tokens_in, estimate_tokens(text))
+    context_stats.record(intent, packed)
+    return packed
+
+
+async def abuild_context(docs: Sequence[Any], intent: str, file_id: Optional[str] = None, budget: Optional[int] = None) -> PackedContext:
+    """build_context off the event loop (it may read embeddings from Chroma or encode)."""
+    return await asyncio.to_thread(build_context, docs, intent, file_id, budget)
@@ -6,20 +6,49 @@ like skills, experience, projects, and education from uploaded documents.
 """
 
 import asyncio
-import os
-from typing import Dict, Any
-from .vectorstore import get_vectorstore, collection_count
-from .embeddings import STEmbeddings
-from .llm import get_gemini_llm
+from typing import Dict, Any, List, Optional, Sequence
+from .vectorstore import collection_count
+from .llm import LLMRateLimitError, ainvoke_llm
+from .metrics import count_fallback
+from .document_profile import aget_profile
+from .context_builder import abuild_context
+from .embeddings import encode_texts
+from .hybrid_retriever import HybridRetriever
+from .timing import stage
 
 
-async def get_retriever(file_id: str):
-    """Get a retriever for the specified file."""
+# Generic analysis the interview prompts fall back to when the document couldn't
+# be analysed; never stored, so the next turn retries the real analysis
+FALLBACK_ANALYSIS = (
+    "KEY SKILLS: General technical and professional skills\n"
+    "EXPERIENCE LEVEL: To be determined through interview\n"
+    "MAIN AREAS: Based on uploaded document content\n"
+    "NOTABLE PROJECTS: Professional experience and achievements"
+)
+
+async def get_retriever(file_id: str) -> HybridRetriever:
+    """Get a retriever for the specified file (hybrid BM25 + vector unless ``RAG_RETRIEVAL=vector``)."""
     if collection_count(str(file_id)) == 0:
         raise ValueError("No embeddings found for this file. Upload and embed first.")
-    vectorstore = get_vectorstore(str(file_id), STEmbeddings())
-    retriever = vectorstore.as_retriever(search_kwargs={"k": int(os.getenv("RAG_TOP_K", "6"))})
-    return retriever
+    return HybridRetriever(str(file_id))
+
+
+async def aretrieve_documents(
+    file_id: str,
+    query: str,
+    query_vector: Optional[Sequence[float]] = None,
+    timings: Optional[Dict[str, float]] = None,
+) -> List[Any]:
+    """Retrieve the top-k chunks for a query without blocking the event loop.
+
+    Pass ``query_vector`` when the question is already embedded to skip a second encode.
+    """
+    retriever = await get_retriever(file_id)
+    if query_vector is None:
+        with stage(timings, "embed"):
+            query_vector = (await asyncio.to_thread(encode_texts, [query]))[0]
+    with stage(timings, "search"):
+        return await asyncio.to_thread(retriever.search, query, query_vector)
 
 
 async def analyze_document_for_interview(file_id: str) -> str:
@@ -27,8 +56,14 @@ async def analyze_document_for_interview(file_id: str) -> str:
     Analyze document content to extract key information for interview context.
     
     Returns structured analysis of skills, experience, projects, and education.
+    Uses the profile precomputed at ingestion when there is one. Returns "" if
+    the analysis failed (e.g. rate limited); prompt with FALLBACK_ANALYSIS then.
     """
     try:
+        profile = await aget_profile(file_id)
+        if profile is not None:
+            return profile.interview_profile
+
         retriever = await get_retriever(file_id)
         
         # Get content for analysis
@@ -36,13 +71,8 @@ async def analyze_document_for_interview(file_id: str) -> str:
             retriever.get_relevant_documents, 
             "skills experience education projects technologies background"
         )
-        document_content = "\n\n".join([
-            d.page_content for d in analysis_docs 
-            if getattr(d, "page_content", None)
-        ])
+        document_content = (await abuild_context(analysis_docs, "interview", str(file_id))).text
 
-        llm = get_gemini_llm()
-        
         # Analyze the document to extract key interview-relevant information
         analysis_prompt = (
             "Analyze this document and extract key information for conducting a relevant interview.\n"
@@ -55,17 +85,11 @@ async def analyze_document_for_interview(file_id: str) -> str:
             f"Document content:\n{document_content}"
         )
         
-        analysis_resp = await asyncio.to_thread(llm.invoke, analysis_prompt)
-        return getattr(analysis_resp, "content", str(analysis_resp))
+        return await ainvoke_llm(analysis_prompt)
         
     except Exception as e:
-        # Return basic fallback analysis
-        return (
-            "KEY SKILLS: General technical and professional skills\n"
-            "EXPERIENCE LEVEL: To be determined through interview\n"
-            "MAIN AREAS: Based on uploaded document content\n"
-            "NOTABLE PROJECTS: Professional experience and achievements"
-        )
+        count_fallback("document_analysis", "rate_limit" if isinstance(e, LLMRateLimitError) else "error")
+        return ""
 
 
 async def get_document_context(file_id: str, query: str) -> str:
@@ -73,9 +97,6 @@ async def get_document_context(file_id: str, query: str) -> str:
     try:
         retriever = await get_retriever(file_id)
         docs = await asyncio.to_thread(retriever.get_relevant_documents, query)
-        return "\n\n".join([
-            d.page_content for d in docs 
-            if getattr(d, "page_content", None)
-        ])
+        return (await abuild_context(docs, "interview", str(file_id))).text
     except Exception:
         return ""
\ No newline at end of file
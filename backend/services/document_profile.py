@@ -0,0 +1,204 @@
+"""
+Document Profile Service
+
+Builds, at ingestion time, a summary of the whole document and the interview
+profile (skills, experience level, areas, projects) that the summary and
+interview flows used to recompute from a handful of retrieved chunks on every
+request. Profiles are stored in ``document_profiles`` next to the PDFFile
+record, keyed by the sha256 of the uploaded bytes so an identical re-upload
+reuses the existing profile without any LLM calls.
+
+The summary is map-reduce: chunks are packed into groups of up to
+``PROFILE_MAP_CHARS`` characters, each group is condensed into notes by a map
+call (``PROFILE_MAP_CONCURRENCY`` at a time), notes are collapsed level by level
+until they fit ``PROFILE_REDUCE_CHARS``, and the final summary and interview
+profile are written from the collapsed notes.
+"""
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+from .answer_cache import get_answer_cache
+from .llm import invoke_llm
+from .metrics import llm_label
+from .timing import stage
+from .vectorstore import get_texts
+
+
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "true").lower() in ("1", "true", "yes")
+PROFILE_MAP_CONCURRENCY = int(os.getenv("PROFILE_MAP_CONCURRENCY", "4"))
+PROFILE_MAP_CHARS = int(os.getenv("PROFILE_MAP_CHARS", "12000"))
+PROFILE_REDUCE_CHARS = int(os.getenv("PROFILE_REDUCE_CHARS", "24000"))
+
+MAP_PROMPT = (
+    "Condense this part of a document into concise notes.\n"
+    "Keep the main topics, key concepts and important details, and list every skill, "
+    "technology, role, project, achievement and education item mentioned.\n"
+    "Use short bullet points; do not add anything that is not in the text.\n\n"
+    "Document part:\n{text}"
+)
+
+COLLAPSE_PROMPT = (
+    "Merge these notes from consecutive parts of one document into a single set of concise notes.\n"
+    "Remove repetition but keep every distinct topic, detail, skill, technology, project and achievement.\n\n"
+    "Notes:\n{text}"
+)
+
+SUMMARY_PROMPT = (
+    "Please provide a comprehensive summary of the document described by the notes below.\n"
+    "Include the main topics, key concepts, and important details.\n"
+    "Structure your response with clear headings and bullet points.\n\n"
+    "Document notes:\n{text}"
+)
+
+INTERVIEW_PROMPT = (
+    "Analyze this document and extract key information for conducting a relevant interview.\n"
+    "Focus on: skills, experience level, technologies mentioned, projects, education, and expertise areas.\n"
+    "Provide a concise analysis in this format:\n"
+    "KEY SKILLS: [list main technical/professional skills]\n"
+    "EXPERIENCE LEVEL: [junior/mid/senior based on content]\n"
+    "MAIN AREAS: [key domains/technologies/subjects]\n"
+    "NOTABLE PROJECTS: [significant work/achievements mentioned]\n\n"
+    "Document notes:\n{text}"
+)
+
+
+@dataclass
+class ProfileData:
+    summary: str
+    interview_profile: str
+    chunk_count: int = 0
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _groups(texts: List[str], max_chars: int) -> List[str]:
+    """Pack consecutive texts into groups of at most ``max_chars`` (a longer text forms its own group)."""
+    groups: List[str] = []
+    current: List[str] = []
+    size = 0
+    for text in texts:
+        if current and size + len(text) > max_chars:
+            groups.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(text)
+        size += len(text) + 2
+    if current:
+        groups.append("\n\n".join(current))
+    return groups
+
+
+def _invoke(prompt: str) -> str:
+    # Pool threads don't inherit the caller's context, so label each call here
+    with llm_label("profile"):
+        return invoke_llm(prompt)
+
+
+def _map(pool: ThreadPoolExecutor, prompt: str, groups: List[str]) -> List[str]:
+    # pool.map keeps document order
+    return list(pool.map(lambda text: _invoke(prompt.format(text=text)), groups))
+
+
+def build_profile(texts: List[str]) -> ProfileData:
+    """Map-reduce summary and interview profile over all of a document's chunks (blocking)."""
+    with stage(None, "profile_build"), \
+            ThreadPoolExecutor(max_workers=max(PROFILE_MAP_CONCURRENCY, 1), thread_name_prefix="profile") as pool:
+        notes = _map(pool, MAP_PROMPT, _groups(texts, PROFILE_MAP_CHARS))
+        while len(notes) > 1 and sum(len(n) for n in notes) > PROFILE_REDUCE_CHARS:
+            groups = _groups(notes, PROFILE_REDUCE_CHARS)
+            if len(groups) == len(notes):
+                break  # every note is already a group on its own; collapsing can't shrink further
+            notes = _map(pool, COLLAPSE_PROMPT, groups)
+        combined = "\n\n".join(notes)
+        summary = pool.submit(_invoke, SUMMARY_PROMPT.format(text=combined))
+        interview = pool.submit(_invoke, INTERVIEW_PROMPT.format(text=combined))
+        return ProfileData(summary.result(), interview.result(), len(texts))
+
+
+def _file_pk(file_id: str) -> Optional[int]:
+    file_id = str(file_id)
+    return int(file_id) if file_id.isdigit() else None
+
+
+def save_profile(file_id: str, content_hash: str, profile: ProfileData) -> None:
+    """Store a file's profile and drop cached answers built from the previous one."""
+    from db.session import SessionLocal
+    from models.profile import DocumentProfile
+
+    with SessionLocal() as db:
+        record = db.query(DocumentProfile).filter_by(file_id=int(file_id)).one_or_none()
+        if record is None:
+            record = DocumentProfile(file_id=int(file_id))
+            db.add(record)
+        record.content_hash = content_hash
+        record.summary = profile.summary
+        record.interview_profile = profile.interview_profile
+        record.chunk_count = profile.chunk_count
+        db.commit()
+    get_answer_cache().invalidate(file_id)
+
+
+def delete_profile(file_id: str) -> None:
+    from db.session import SessionLocal
+    from models.profile import DocumentProfile
+
+    pk = _file_pk(file_id)
+    if pk is None:
+        return
+    with SessionLocal() as db:
+        db.query(DocumentProfile).filter_by(file_id=pk).delete()
+        db.commit()
+
+
+def _profile_for_hash(content_hash: str) -> Optional[ProfileData]:
+    from db.session import SessionLocal
+    from models.profile import DocumentProfile
+
+    with SessionLocal() as db:
+        record = db.query(DocumentProfile).filter_by(content_hash=content_hash).first()
+        if record is None:
+            return None
+        return ProfileData(record.summary, record.interview_profile, record.chunk_count)
+
+
+def profile_document(file_id: str, content_hash: str) -> str:
+    """Build (or reuse by content hash) and store a file's profile; returns ``ready`` or ``reused``."""
+    existing = _profile_for_hash(content_hash)
+    if existing is not None:
+        save_profile(file_id, content_hash, existing)
+        return "reused"
+    texts = get_texts(file_id)
+    if not texts:
+        raise ValueError("No stored chunks to profile")
+    save_profile(file_id, content_hash, build_profile(texts))
+    return "ready"
+
+
+async def aget_profile(file_id: str) -> Optional[ProfileData]:
+    """The stored profile for a file, or None if it hasn't been built (yet)."""
+    from sqlalchemy import select
+
+    from db.async_session import AsyncSessionLocal
+    from models.profile import DocumentProfile
+
+    pk = _file_pk(file_id)
+    if pk is None:
+        return None
+    try:
+        async with AsyncSessionLocal() as db:
+            record = (await db.execute(select(DocumentProfile).where(DocumentProfile.file_id == pk))).scalar_one_or_none()
+    except Exception as e:
+        print(f"Document profile lookup for file {file_id} failed: {e}")
+        return None
+    if record is None:
+        return None
+    return ProfileData(record.summary, record.interview_profile, record.chunk_count)
@@ -1,13 +1,274 @@
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
 from functools import lru_cache
 import os
-from typing import List
-from sentence_transformers import SentenceTransformer
+import queue
+import threading
+import time
+from typing import Any, Deque, Dict, List, Optional
+import numpy as np
+
+from .metrics import observe_embedding_batch, observe_stage, register_queue
+
+
+SBERT_MODEL_NAME = os.getenv("SBERT_MODEL_NAME", "all-MiniLM-L6-v2")
+# Inference backend: torch (reference), torch-int8, onnx or onnx-int8 (ONNX needs onnxruntime + optimum)
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+# Intra-op threads for encoding; 0 keeps the runtime's default
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", str(os.cpu_count() or 0)))
+EMBED_ONNX_DIR = os.getenv("EMBED_ONNX_DIR", "./onnx_models")
+EMBED_MAX_SEQ_LENGTH = int(os.getenv("EMBED_MAX_SEQ_LENGTH", "256"))
+
+# Cross-request micro-batching of encode calls (see EmbeddingBatcher)
+EMBED_BATCHING = os.getenv("EMBED_BATCHING", "true").lower() in ("1", "true", "yes")
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "5"))
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))
+
+
+class OnnxEncoder:
+    """ONNX Runtime encoder with SentenceTransformer's ``encode`` contract (mean pooling).
+
+    The model is exported from the Hugging Face checkpoint with optimum on first
+    use and cached under ``EMBED_ONNX_DIR``; ``quantize`` adds an int8 dynamic
+    quantization pass.
+    """
+
+    def __init__(self, model_name: str, quantize: bool = False, threads: int = 0) -> None:
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        model_dir = _export_onnx(model_name, quantize)
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        filename = "model_quantized.onnx" if quantize else "model.onnx"
+        self._session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, filename), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self._session.get_inputs()}
+        self._tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+    def encode(self, sentences, normalize_embeddings: bool = False, batch_size: int = 32, **_: Any) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        out = []
+        for start in range(0, len(texts), max(batch_size, 1)):
+            tokens = self._tokenizer(
+                texts[start:start + batch_size], padding=True, truncation=True,
+                max_length=EMBED_MAX_SEQ_LENGTH, return_tensors="np",
+            )
+            feeds = {k: v.astype(np.int64) for k, v in tokens.items() if k in self._input_names}
+            hidden = self._session.run(None, feeds)[0]
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            out.append(pooled.astype(np.float32))
+        vectors = np.concatenate(out) if out else np.zeros((0, 0), dtype=np.float32)
+        if normalize_embeddings and len(vectors):
+            vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors[0] if single else vectors
+
+
+def _hub_id(model_name: str) -> str:
+    # SentenceTransformer resolves bare names under the sentence-transformers org
+    return model_name if "/" in model_name or os.path.isdir(model_name) else f"sentence-transformers/{model_name}"
+
+
+def _export_onnx(model_name: str, quantize: bool) -> str:
+    """Export (and optionally quantize) the model once; returns the directory holding the ONNX files."""
+    model_dir = os.path.join(EMBED_ONNX_DIR, _hub_id(model_name).replace("/", "--"))
+    if not os.path.exists(os.path.join(model_dir, "model.onnx")):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        ORTModelForFeatureExtraction.from_pretrained(_hub_id(model_name), export=True).save_pretrained(model_dir)
+        AutoTokenizer.from_pretrained(_hub_id(model_name)).save_pretrained(model_dir)
+    if quantize and not os.path.exists(os.path.join(model_dir, "model_quantized.onnx")):
+        from optimum.onnxruntime import ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+        quantizer = ORTQuantizer.from_pretrained(model_dir, file_name="model.onnx")
+        quantizer.quantize(save_dir=model_dir, quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False))
+    return model_dir
+
+
+def load_encoder(backend: str = EMBED_BACKEND, model_name: str = SBERT_MODEL_NAME, threads: int = EMBED_THREADS):
+    """Build an encoder for ``backend``: ``torch``, ``torch-int8``, ``onnx`` or ``onnx-int8``.
+
+    Every backend exposes SentenceTransformer's ``encode(texts, normalize_embeddings, batch_size)``.
+    """
+    backend = backend.strip().lower()
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxEncoder(model_name, quantize=backend == "onnx-int8", threads=threads)
+    if backend not in ("torch", "torch-int8"):
+        raise ValueError(f"Unknown EMBED_BACKEND: {backend}")
+
+    import torch
+    from sentence_transformers import SentenceTransformer  # heavy; loaded only when a model is built
+
+    if threads:
+        torch.set_num_threads(threads)
+    model = SentenceTransformer(model_name, device="cpu")
+    if backend == "torch-int8":
+        # Dynamic int8 quantization of the Linear layers; activations stay float
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+@lru_cache(maxsize=1)
+def _get_sbert_model():
+    """Process-wide encoder for the configured ``EMBED_BACKEND``."""
+    try:
+        return load_encoder()
+    except ImportError as e:
+        if EMBED_BACKEND.strip().lower() == "torch":
+            raise
+        print(f"Embedding backend {EMBED_BACKEND!r} unavailable ({e}); falling back to torch")
+        return load_encoder("torch")
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+@dataclass
+class _EncodeRequest:
+    texts: List[str]
+    future: Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class EmbeddingBatcher:
+    """Groups encode requests from all threads and coroutines into shared forward passes.
+
+    Callers enqueue texts and get a Future. A dedicated worker thread takes the
+    first waiting request, keeps collecting for up to ``window_ms`` or until
+    ``max_batch`` texts are queued, encodes them in one call and resolves each
+    caller's future with its rows. A request that would push the batch past
+    ``max_batch`` is held back to start the next batch, and a request larger than
+    ``max_batch`` is encoded on its own. Ingestion batches don't come through here
+    at all (see encode_texts), so query encodes never wait behind them.
+    """
+
+    def __init__(self, model, window_ms: float = EMBED_BATCH_WINDOW_MS, max_batch: int = EMBED_MAX_BATCH) -> None:
+        self._model = model
+        self._window = window_ms / 1000
+        self._max_batch = max_batch
+        self._queue: "queue.Queue[_EncodeRequest]" = queue.Queue()
+        # Request taken off the queue that didn't fit the previous batch (worker thread only)
+        self._carry: Optional[_EncodeRequest] = None
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._texts = 0
+        self._batch_sizes: Deque[int] = deque(maxlen=1000)
+        self._queue_delays: Deque[float] = deque(maxlen=1000)
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        """Queue texts for encoding; the future resolves to a (len(texts), dim) array."""
+        request = _EncodeRequest(list(texts), Future())
+        if not request.texts:
+            request.future.set_result(np.zeros((0, 0), dtype=np.float32))
+        else:
+            self._queue.put(request)
+        return request.future
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Blocking encode through the batcher (call from threads, never from the worker)."""
+        return self.submit(texts).result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sizes = list(self._batch_sizes)
+            delays = [d * 1000 for d in self._queue_delays]
+            return {
+                "batches": self._batches,
+                "requests": self._requests,
+                "texts": self._texts,
+                "queued": self._queue.qsize(),
+                "avg_batch_size": round(self._texts / self._batches, 2) if self._batches else 0.0,
+                "max_batch_size": max(sizes) if sizes else 0,
+                "queue_delay_ms_p50": round(_percentile(delays, 50), 2),
+                "queue_delay_ms_p99": round(_percentile(delays, 99), 2),
+            }
+
+    def _collect(self) -> List[_EncodeRequest]:
+        if self._carry is not None:
+            batch, self._carry = [self._carry], None
+        else:
+            batch = [self._queue.get()]
+        count = len(batch[0].texts)
+        deadline = time.perf_counter() + self._window
+        while count < self._max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if count + len(request.texts) > self._max_batch:
+                self._carry = request
+                break
+            batch.append(request)
+            count += len(request.texts)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            texts = [t for request in batch for t in request.texts]
+            try:
+                vectors = self._model.encode(
+                    texts, normalize_embeddings=True, batch_size=min(max(len(texts), 1), self._max_batch)
+                )
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            observe_stage("embed_encode", time.perf_counter() - started)
+            observe_embedding_batch(len(texts))
+            for request in batch:
+                observe_stage("embed_queue", started - request.enqueued_at)
+            offset = 0
+            for request in batch:
+                request.future.set_result(vectors[offset:offset + len(request.texts)])
+                offset += len(request.texts)
+            with self._lock:
+                self._batches += 1
+                self._requests += len(batch)
+                self._texts += len(texts)
+                self._batch_sizes.append(len(texts))
+                self._queue_delays.extend(started - request.enqueued_at for request in batch)
 
 
 @lru_cache(maxsize=1)
-def _get_sbert_model() -> SentenceTransformer:
-    model_name = os.getenv("SBERT_MODEL_NAME", "all-MiniLM-L6-v2")
-    return SentenceTransformer(model_name)
+def get_embedding_batcher() -> EmbeddingBatcher:
+    batcher = EmbeddingBatcher(_get_sbert_model())
+    register_queue("embedding", batcher._queue.qsize)
+    return batcher
+
+
+def encode_texts(texts: List[str], bulk: bool = False) -> np.ndarray:
+    """Normalized embeddings for ``texts`` (blocking), micro-batched with concurrent callers when enabled.
+
+    ``bulk`` document batches (ingestion) are encoded directly on the calling
+    thread so interactive query encodes never queue behind them.
+    """
+    if EMBED_BATCHING and not bulk:
+        return get_embedding_batcher().encode(texts)
+    started = time.perf_counter()
+    vectors = _get_sbert_model().encode(texts, normalize_embeddings=True)
+    observe_stage("embed_encode", time.perf_counter() - started)
+    observe_embedding_batch(len(texts))
+    return vectors
 
 
 class STEmbeddings:
@@ -17,7 +278,7 @@ class STEmbeddings:
         self._model = _get_sbert_model()
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        return self._model.encode(texts, normalize_embeddings=True).tolist()
+        return encode_texts(texts, bulk=True).tolist()
 
     def embed_query(self, text: str) -> List[float]:
-        return self._model.encode([text], normalize_embeddings=True)[0].tolist()
+        return encode_texts([text])[0].tolist()
@@ -0,0 +1,98 @@
+"""
+Hybrid lexical + vector retrieval.
+
+The query is ranked twice over a file's chunks: by embedding similarity in the
+Chroma collection and by BM25 over the file's lexical index (bm25_index). The
+two rankings are merged with reciprocal-rank fusion: a chunk scores
+``sum(1 / (RAG_RRF_K + rank))`` over the rankings it appears in. Chunks that
+match exact tokens (library names, versions, acronyms) get ranked highly even
+when MiniLM places them lower, so a smaller ``RAG_TOP_K`` keeps the same
+recall. Files without a lexical index, and ``RAG_RETRIEVAL=vector``, use the
+vector ranking alone.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .bm25_index import load_index
+from .embeddings import encode_texts
+from .vectorstore import collection_count, get_collection
+
+
+# hybrid (vector + BM25 fused by RRF) or vector
+RAG_RETRIEVAL = os.getenv("RAG_RETRIEVAL", "hybrid").strip().lower()
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "4" if RAG_RETRIEVAL == "hybrid" else "6"))
+# Candidates taken from each ranking before fusion
+RAG_CANDIDATES = int(os.getenv("RAG_CANDIDATES", "20"))
+RAG_RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+
+
+def rrf_fuse(rankings: Iterable[Sequence[str]], k: int = RAG_RRF_K) -> List[str]:
+    """Merge ranked id lists by reciprocal-rank fusion; ties keep first-seen order."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda doc_id: -scores[doc_id])
+
+
+@dataclass
+class Chunk:
+    """A retrieved chunk; same ``page_content``/``metadata`` attributes as a LangChain Document."""
+
+    page_content: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class HybridRetriever:
+    """Per-file retriever with the ``get_relevant_documents`` interface used across the services.
+
+    Queries the Chroma collection directly (no LangChain wrapper) and, when
+    ``lexical`` is on, fuses in the file's BM25 ranking. ``search`` takes a query
+    vector computed elsewhere so a turn embeds its question only once.
+    """
+
+    def __init__(
+        self,
+        file_id: str,
+        k: int = RAG_TOP_K,
+        candidates: int = RAG_CANDIDATES,
+        lexical: bool = RAG_RETRIEVAL == "hybrid",
+    ) -> None:
+        self.file_id = str(file_id)
+        self.k = k
+        self.candidates = candidates
+        self.lexical = lexical
+
+    def get_relevant_documents(self, query: str) -> List[Chunk]:
+        return self.search(query)
+
+    def search(self, query: str, query_vector: Optional[Sequence[float]] = None) -> List[Chunk]:
+        collection = get_collection(self.file_id)
+        count = collection_count(self.file_id)
+        if collection is None or not count:
+            return []
+        if query_vector is None:
+            query_vector = encode_texts([query])[0]
+        result = collection.query(
+            query_embeddings=[[float(x) for x in query_vector]],
+            n_results=min(self.candidates if self.lexical else self.k, count),
+            include=["documents", "metadatas"],
+        )
+        vector_ids = result["ids"][0]
+        texts = dict(zip(vector_ids, result["documents"][0]))
+        metadatas = dict(zip(vector_ids, result["metadatas"][0]))
+
+        index = load_index(self.file_id) if self.lexical else None
+        lexical_ids = [doc_id for doc_id, _ in index.search(query, self.candidates)] if index is not None else []
+        ranked = rrf_fuse([vector_ids, lexical_ids]) if lexical_ids else vector_ids
+        top = ranked[: self.k]
+
+        missing = [doc_id for doc_id in top if doc_id not in texts]
+        if missing:
+            extra = collection.get(ids=missing, include=["documents", "metadatas"])
+            texts.update(zip(extra["ids"], extra["documents"]))
+            metadatas.update(zip(extra["ids"], extra["metadatas"]))
+        # chunk_id lets the context builder find neighbours and stored embeddings
+        return [Chunk(texts[d], {**(metadatas.get(d) or {}), "chunk_id": d}) for d in top if texts.get(d)]
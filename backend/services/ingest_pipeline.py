@@ -0,0 +1,184 @@
+"""
+Streaming ingestion pipeline: extract -> chunk -> embed -> upsert.
+
+Pages are pulled one at a time from pdf_reader.iter_pages and chunked
+incrementally, keeping the chunk overlap across page boundaries. A producer
+thread hands fixed-size chunk batches to the embedding stage through a bounded
+queue, so parsing runs ahead of embedding by at most ``INGEST_QUEUE_DEPTH``
+batches and memory stays flat however large the document is. Each batch is
+upserted as soon as it is embedded, so the first chunks are retrievable while
+the rest of the file is still being processed.
+"""
+
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+from .answer_cache import get_answer_cache
+from .bm25_index import BM25Builder, delete_index, save_index
+from .embeddings import STEmbeddings
+from .metrics import count_ingested, observe_stage
+from .pdf_reader import PageText, PdfSource, iter_pages
+from .vectorstore import delete_collection, upsert_texts
+
+
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "1000"))
+INGEST_CHUNK_OVERLAP = int(os.getenv("INGEST_CHUNK_OVERLAP", "100"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+# Chunk batches buffered between extraction and embedding
+INGEST_QUEUE_DEPTH = int(os.getenv("INGEST_QUEUE_DEPTH", "4"))
+
+_DONE = object()
+
+T = TypeVar("T")
+
+
+@dataclass
+class IngestProgress:
+    pages_total: int = 0
+    pages_done: int = 0
+    chunks_done: int = 0
+
+
+def iter_chunks(
+    pages: Iterable[PageText],
+    chunk_size: int = INGEST_CHUNK_SIZE,
+    chunk_overlap: int = INGEST_CHUNK_OVERLAP,
+) -> Iterator[str]:
+    """Split page texts into chunks incrementally.
+
+    Pages are joined with newlines, as the whole-document splitter did. Only a few
+    chunks' worth of text is buffered: the last chunk of each split may continue
+    on the next page, so it stays in the buffer (with its overlap) and is split
+    again together with the following text.
+    """
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    buffer = ""
+    for page in pages:
+        if not page.text:
+            continue
+        buffer = f"{buffer}\n{page.text}" if buffer else page.text
+        if len(buffer) < 4 * chunk_size:
+            continue
+        chunks = splitter.split_text(buffer)
+        yield from chunks[:-1]
+        buffer = chunks[-1]
+    if buffer:
+        yield from splitter.split_text(buffer)
+
+
+def _timed(source: Iterable[T], spent: Dict[str, float], key: str) -> Iterator[T]:
+    """Yield from ``source``, adding the time spent producing each item to ``spent[key]``."""
+    items = iter(source)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(items)
+        except StopIteration:
+            return
+        finally:
+            spent[key] += time.perf_counter() - started
+        yield item
+
+
+def ingest_pages(
+    pages: Iterable[PageText],
+    file_id: str,
+    on_progress: Optional[Callable[[IngestProgress], None]] = None,
+    progress: Optional[IngestProgress] = None,
+    embedding: Optional[STEmbeddings] = None,
+) -> IngestProgress:
+    """Chunk, embed and upsert pages into the file's collection, batch by batch.
+
+    Chunking runs on a producer thread; embedding and upserts run on the calling
+    thread. ``on_progress`` is called after every upserted batch. The file's BM25
+    index is built from the same batches and saved once every chunk is stored.
+    """
+    file_id = str(file_id)
+    progress = progress or IngestProgress()
+    embedding = embedding or STEmbeddings()
+    batches: "queue.Queue" = queue.Queue(maxsize=INGEST_QUEUE_DEPTH)
+    stop = threading.Event()
+    lexical = BM25Builder()
+    # Seconds spent pulling pages (extraction) and chunks (chunking + extraction)
+    spent = {"extract": 0.0, "split": 0.0}
+
+    def put(item) -> bool:
+        # Blocks while the embedder is behind (backpressure); gives up once it has stopped
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def counted(source: Iterable[PageText]) -> Iterator[PageText]:
+        for page in source:
+            progress.pages_done = page.page
+            yield page
+
+    def produce() -> None:
+        try:
+            batch: List[str] = []
+            pages_in = _timed(counted(pages), spent, "extract")
+            for chunk in _timed(iter_chunks(pages_in), spent, "split"):
+                batch.append(chunk)
+                if len(batch) >= EMBED_BATCH_SIZE:
+                    if not put(batch):
+                        return
+                    batch = []
+            if batch and not put(batch):
+                return
+            put(_DONE)
+        except BaseException as e:
+            put(e)
+
+    # Start from an empty collection so a retried job doesn't leave stale chunks behind
+    delete_collection(file_id)
+    delete_index(file_id)
+    producer = threading.Thread(target=produce, name=f"ingest-{file_id}", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = batches.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            ids = [f"{file_id}:{progress.chunks_done + i}" for i in range(len(item))]
+            upsert_texts(file_id, item, ids, embedding)
+            lexical.add(ids, item)
+            progress.chunks_done += len(item)
+            if on_progress is not None:
+                on_progress(progress)
+        if progress.chunks_done:
+            save_index(file_id, lexical.build())
+        observe_stage("pdf_extract", spent["extract"])
+        observe_stage("chunking", max(spent["split"] - spent["extract"], 0.0))
+        count_ingested(progress.pages_done, progress.chunks_done)
+    finally:
+        stop.set()
+        producer.join()
+        # Answers computed against the previous content are no longer valid
+        get_answer_cache().invalidate(file_id)
+    return progress
+
+
+def ingest_pdf(
+    source: PdfSource,
+    file_id: str,
+    on_progress: Optional[Callable[[IngestProgress], None]] = None,
+) -> IngestProgress:
+    """Stream a PDF (path or bytes) through extraction, chunking, embedding and upserts."""
+    progress = IngestProgress()
+
+    def set_total(page_count: int) -> None:
+        progress.pages_total = page_count
+
+    return ingest_pages(iter_pages(source, on_page_count=set_total), file_id, on_progress, progress)
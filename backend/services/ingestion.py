@@ -0,0 +1,314 @@
+"""
+PDF Ingestion Jobs
+
+Uploads are accepted immediately and processed in the background: the endpoint
+stages the PDF bytes under ``INGEST_STAGING_DIR`` and records a job; a worker
+then uploads the file to Cloudinary and streams it through extraction,
+chunking and embedding (see ingest_pipeline), updating the job as it goes
+(queued -> uploading -> extracting -> embedding -> ready, or failed). Once the
+file is ready the worker builds its document profile (see document_profile),
+tracked separately in the job's ``profile`` field.
+
+The queue is selected with ``INGEST_QUEUE_BACKEND``:
+
+- ``inprocess`` (default) – a bounded thread pool inside the API process
+- ``celery`` – Celery workers (``celery -A celery_app worker``); the staging
+  directory must be shared with the workers
+
+Job status lives in ``INGEST_JOB_BACKEND`` (``memory`` or ``redis``); use
+``redis`` whenever jobs run in another process. With the celery queue an
+unreachable Redis is an error rather than a silent fallback, since the API and
+the workers would each keep their own job table.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from PyPDF2.errors import PdfReadError
+
+from .metrics import register_queue
+
+
+INGEST_QUEUE_BACKEND = os.getenv("INGEST_QUEUE_BACKEND", "inprocess")
+INGEST_JOB_BACKEND = os.getenv("INGEST_JOB_BACKEND", "memory")
+INGEST_STAGING_DIR = os.getenv("INGEST_STAGING_DIR", "./uploads")
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_JOB_TTL_SECONDS = int(os.getenv("INGEST_JOB_TTL_SECONDS", "86400"))
+INGEST_REDIS_URL = os.getenv("INGEST_REDIS_URL", "redis://localhost:6379/0")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IngestionJob:
+    """Progress of one PDF ingestion."""
+
+    job_id: str
+    file_id: str
+    filename: str
+    status: str = "queued"
+    url: Optional[str] = None
+    pages_total: int = 0
+    pages_done: int = 0
+    chunks_total: int = 0  # known once the last page is chunked
+    chunks_done: int = 0
+    message: str = ""
+    error: Optional[str] = None
+    profile: str = ""  # pending -> building -> ready | reused | failed ("" when not built)
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IngestionJob":
+        return cls(**{k: data[k] for k in cls.__dataclass_fields__ if k in data})
+
+
+class InMemoryJobBackend:
+    """Process-local job records with TTL expiry; only valid with the in-process queue."""
+
+    def __init__(self, ttl_seconds: int = INGEST_JOB_TTL_SECONDS) -> None:
+        self._ttl = ttl_seconds
+        self._data: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            data = self._data.get(job_id)
+            if data is not None and time.time() - data["updated_at"] > self._ttl:
+                del self._data[job_id]
+                return None
+            return dict(data) if data is not None else None
+
+    def put(self, job_id: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            self._data[job_id] = dict(data)
+            cutoff = time.time() - self._ttl
+            for expired in [k for k, v in self._data.items() if v["updated_at"] < cutoff]:
+                del self._data[expired]
+
+
+class RedisJobBackend:
+    """Redis-compatible job records shared between the API and Celery workers."""
+
+    def __init__(self, url: str = INGEST_REDIS_URL, ttl_seconds: int = INGEST_JOB_TTL_SECONDS, prefix: str = "ingest:job:") -> None:
+        import redis  # imported lazily; only needed when this backend is selected
+
+        self._client = redis.Redis.from_url(url)
+        self._client.ping()  # fail at startup, not on the first job update
+        self._ttl = ttl_seconds
+        self._prefix = prefix
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = self._client.get(self._prefix + job_id)
+        return json.loads(raw) if raw is not None else None
+
+    def put(self, job_id: str, data: Dict[str, Any]) -> None:
+        self._client.setex(self._prefix + job_id, self._ttl, json.dumps(data))
+
+
+class JobStore:
+    """Facade over the configured job backend."""
+
+    def __init__(self, backend) -> None:
+        self._backend = backend
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        data = self._backend.get(job_id)
+        return IngestionJob.from_dict(data) if data is not None else None
+
+    def save(self, job: IngestionJob) -> None:
+        job.updated_at = time.time()
+        self._backend.put(job.job_id, job.to_dict())
+
+    def update(self, job: IngestionJob, **changes: Any) -> IngestionJob:
+        for key, value in changes.items():
+            setattr(job, key, value)
+        self.save(job)
+        return job
+
+
+@lru_cache(maxsize=1)
+def get_job_store() -> JobStore:
+    """Process-wide job store selected by ``INGEST_JOB_BACKEND``."""
+    kind = INGEST_JOB_BACKEND.strip().lower()
+    if kind == "redis":
+        try:
+            return JobStore(RedisJobBackend())
+        except Exception as e:
+            if INGEST_QUEUE_BACKEND.strip().lower() == "celery":
+                raise RuntimeError(f"Redis job store unavailable with INGEST_QUEUE_BACKEND=celery: {e}") from e
+            logger.warning("Redis job store unavailable (%s); falling back to in-memory job store", e)
+    return JobStore(InMemoryJobBackend())
+
+
+def staged_path(job_id: str) -> str:
+    return os.path.join(INGEST_STAGING_DIR, f"{job_id}.pdf")
+
+
+def stage_upload(contents: bytes, file_id: str, filename: str) -> IngestionJob:
+    """Write the PDF bytes to the staging directory and record a queued job."""
+    job = IngestionJob(job_id=uuid.uuid4().hex, file_id=str(file_id), filename=filename)
+    os.makedirs(INGEST_STAGING_DIR, exist_ok=True)
+    tmp_path = staged_path(job.job_id) + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(contents)
+    os.replace(tmp_path, staged_path(job.job_id))
+    get_job_store().save(job)
+    return job
+
+
+def _set_cloud_url(file_id: str, url: str) -> None:
+    from db.session import SessionLocal
+    from models.pdf import PDFFile
+
+    with SessionLocal() as db:
+        record = db.get(PDFFile, int(file_id))
+        if record is not None:
+            record.cloud_url = url
+            db.commit()
+
+
+def _discard_file(file_id: str) -> None:
+    """Remove the DB record and any partial embeddings of a file whose ingestion failed."""
+    from db.session import SessionLocal
+    from models.pdf import PDFFile
+    from .bm25_index import delete_index
+    from .document_profile import delete_profile
+    from .vectorstore import delete_collection
+
+    try:
+        delete_collection(file_id)
+        delete_index(file_id)
+        delete_profile(file_id)
+        with SessionLocal() as db:
+            record = db.get(PDFFile, int(file_id))
+            if record is not None:
+                db.delete(record)
+                db.commit()
+    except Exception as e:
+        logger.warning("Cleanup after failed ingestion of file %s failed: %s", file_id, e)
+
+
+def _build_profile(job: IngestionJob, content_hash: str) -> None:
+    """Precompute the summary and interview profile; failures only leave the flows on their retrieval path."""
+    from .document_profile import profile_document
+
+    store = get_job_store()
+    store.update(job, profile="building")
+    try:
+        store.update(job, profile=profile_document(job.file_id, content_hash))
+    except Exception as e:
+        logger.warning("Document profile for file %s failed: %s", job.file_id, e)
+        store.update(job, profile="failed")
+
+
+def process_job(job_id: str) -> Optional[IngestionJob]:
+    """Run one ingestion job to completion (blocking). Safe to call from any worker."""
+    import cloudinary.uploader
+    from utils.cloudinary import ensure_configured as ensure_cloudinary_config
+    from .document_profile import PROFILE_ENABLED, delete_profile, file_sha256
+    from .ingest_pipeline import IngestProgress, ingest_pdf
+
+    store = get_job_store()
+    job = store.get(job_id)
+    if job is None:
+        logger.warning("Ingestion job %s not found (expired or wrong job backend)", job_id)
+        return None
+    path = staged_path(job_id)
+    content_hash = ""
+    try:
+        store.update(job, status="uploading")
+        content_hash = file_sha256(path)
+        # A retried job must not serve the previous content's profile
+        delete_profile(job.file_id)
+        ensure_cloudinary_config()
+        with open(path, "rb") as f:
+            result = cloudinary.uploader.upload(
+                f,
+                resource_type="raw",
+                public_id=f"pdfs/{job.filename.split('.')[0]}",
+                unique_filename=False,
+                overwrite=True,
+                filename=job.filename,
+            )
+        _set_cloud_url(job.file_id, result["secure_url"])
+        store.update(job, status="extracting", url=result["secure_url"])
+
+        # Pages are extracted, chunked and embedded as a stream; chunks are queryable as they land
+        def on_progress(progress: IngestProgress) -> None:
+            store.update(
+                job,
+                status="embedding",
+                pages_total=progress.pages_total,
+                pages_done=progress.pages_done,
+                chunks_done=progress.chunks_done,
+            )
+
+        progress = ingest_pdf(path, job.file_id, on_progress=on_progress)
+        if not progress.chunks_done:
+            return store.update(job, status="ready", pages_total=progress.pages_total, pages_done=progress.pages_done,
+                                message="PDF uploaded, but no extractable text was found (no embeddings created)")
+        store.update(job, status="ready", pages_done=progress.pages_done, chunks_total=progress.chunks_done,
+                     message="PDF uploaded and embeddings stored successfully",
+                     profile="pending" if PROFILE_ENABLED else "")
+    except PdfReadError as e:
+        _discard_file(job.file_id)
+        return store.update(job, status="failed", error=f"Invalid or corrupt PDF: {e}")
+    except Exception as e:
+        logger.exception("Ingestion job %s failed: %s", job_id, e)
+        _discard_file(job.file_id)
+        return store.update(job, status="failed", error=str(e))
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    # Runs after the job is reported ready, so questions can start while the profile is built
+    if job.profile == "pending":
+        _build_profile(job, content_hash)
+    return job
+
+
+class InProcessIngestionQueue:
+    """Runs jobs on a bounded thread pool so a burst of uploads can't take over the API worker."""
+
+    def __init__(self, max_workers: int = INGEST_WORKERS) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        # Uploads waiting for a free ingestion worker
+        register_queue("ingestion", self._executor._work_queue.qsize)
+
+    def enqueue(self, job: IngestionJob) -> None:
+        self._executor.submit(process_job, job.job_id)
+
+
+class CeleryIngestionQueue:
+    """Hands jobs to Celery workers through the broker."""
+
+    def enqueue(self, job: IngestionJob) -> None:
+        from celery_app import ingest_pdf  # imported lazily; only needed when this backend is selected
+
+        ingest_pdf.delay(job.job_id)
+
+
+@lru_cache(maxsize=1)
+def get_ingestion_queue():
+    """Process-wide ingestion queue selected by ``INGEST_QUEUE_BACKEND``."""
+    if INGEST_QUEUE_BACKEND.strip().lower() == "celery":
+        return CeleryIngestionQueue()
+    return InProcessIngestionQueue()
+
+
+def submit_upload(contents: bytes, file_id: str, filename: str) -> IngestionJob:
+    """Stage an uploaded PDF and queue it for ingestion; returns the queued job."""
+    job = stage_upload(contents, file_id, filename)
+    get_ingestion_queue().enqueue(job)
+    return job
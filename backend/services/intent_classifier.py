@@ -1,102 +1,158 @@
 """
 Intent Classification Service
 
-Handles intelligent LLM-based intent classification for the conversational AI system.
+Handles intent classification for the conversational AI system.
 Supports interview flows, document summarization, and RAG queries.
+
+Turns are first matched locally against embedded example phrases using the
+already-loaded SBERT model; only low-confidence turns go to the LLM routing
+call (services/routing.py).
 """
 
-from typing import Optional
-from .llm import get_llm_response
+import asyncio
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 
-async def classify_intent(question: str, conversation_session_id: Optional[str] = None) -> str:
-    """Enhanced LLM-based intent classification with fallback to keyword detection."""
-    
-    # If we have a conversation session ID, this is likely an interview continuation
-    if conversation_session_id:
-        # Use LLM to check if user wants to end the interview
-        try:
-            end_check_prompt = f"""
-            User message: "{question}"
-            
-            The user is currently in an interview session. Determine if they want to END/STOP the interview.
-            
-            Respond with ONLY:
-            - "END" if they want to stop/end/exit the interview
-            - "CONTINUE" if they want to continue or are answering questions
-            
-            Examples of END:
-            - "end interview", "stop this", "I'm done", "finish interview"
-            
-            Examples of CONTINUE:
-            - Any answer to interview questions
-            - "yes", "no", actual responses
-            
-            Response:"""
-            
-            llm_response = get_llm_response(end_check_prompt)
-            if "END" in llm_response.upper():
-                return "end_interview"
-            else:
-                return "interview_continue"
-        except:
-            # Fallback to keyword detection
-            question_lower = question.lower()
-            end_keywords = ['end interview', 'stop interview', 'finish interview', 'exit interview', 'done with interview', 'end this', 'stop this']
-            if any(keyword in question_lower for keyword in end_keywords):
-                return "end_interview"
-            return "interview_continue"
-    
-    # Use LLM for intent classification
+from .embeddings import _get_sbert_model, encode_texts
+
+
+# Local nearest-prototype classification. Similarity is cosine against the
+# closest example phrase of each intent; scores above HIGH (with enough margin
+# over the runner-up) are accepted, scores below LOW fall through to the
+# default intent, and anything in between is left for the LLM.
+INTENT_LOCAL_HIGH = float(os.getenv("INTENT_LOCAL_HIGH", "0.6"))
+INTENT_LOCAL_LOW = float(os.getenv("INTENT_LOCAL_LOW", "0.35"))
+INTENT_LOCAL_MARGIN = float(os.getenv("INTENT_LOCAL_MARGIN", "0.08"))
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", "1024"))
+INTENT_CACHE_MAX_WORDS = int(os.getenv("INTENT_CACHE_MAX_WORDS", "4"))
+
+# Example phrases matching the routing prompt's intent descriptions (see routing).
+# "rag" is the default, but it needs prototypes too: the margin is taken against
+# typical content questions, including ones that merely resemble a summary or
+# history request, so those go to the LLM instead of the wrong flow
+INTENT_PROTOTYPES: Dict[str, List[str]] = {
+    "interview": [
+        "interview me about this topic", "interview me based on my resume", "take my interview",
+        "start interview", "ask me questions", "test my knowledge", "practice interview",
+        "mock interview", "quiz me", "assess me",
+    ],
+    "summary": [
+        "summarize this document", "give me a summary", "give me an overview",
+        "what are the main points?", "brief summary", "key points of the document", "outline this",
+    ],
+    "previous_questions": [
+        "what did I ask before?", "can you remind me what I asked?", "what was my previous question?",
+        "show me my chat history", "what questions have I asked?",
+    ],
+    "rag": [
+        "what does the document say about caching?", "how does the authentication flow work?",
+        "what are the main points of section 3?", "what are the key points about pricing?",
+        "give me an overview of the deployment steps", "summarize the results in chapter 4",
+        "what did the author ask in chapter 2?", "what question does the paper try to answer?",
+        "which questions were asked in the survey?", "what was the previous version of the API?",
+        "what experience does the candidate have with Python?",
+    ],
+}
+
+# In an interview the margin is taken against typical answers, including ones
+# that merely resemble "I'm done"/"stop this", so those go to the LLM instead of
+# ending the interview
+END_PROTOTYPES: Dict[str, List[str]] = {
+    "end_interview": [
+        "end interview", "stop this", "I'm done", "finish interview", "stop the interview",
+        "exit interview", "that's enough, end the interview",
+    ],
+    "interview_continue": [
+        "yes", "no", "I think so", "I'm not sure", "can you repeat the question?",
+        "I used Python and Django for that project", "we fixed it by adding a cache",
+        "I was done with that project in six months", "we stopped using it after a year",
+        "I finished the migration before the deadline", "that was enough to solve the problem",
+    ],
+}
+
+
+@lru_cache(maxsize=2)
+def _prototype_matrix(in_interview: bool) -> Tuple[Tuple[str, ...], np.ndarray]:
+    """Embed all prototype phrases once; returns (label per row, normalized matrix)."""
+    prototypes = END_PROTOTYPES if in_interview else INTENT_PROTOTYPES
+    labels: List[str] = []
+    phrases: List[str] = []
+    for label, examples in prototypes.items():
+        labels.extend([label] * len(examples))
+        phrases.extend(examples)
+    matrix = _get_sbert_model().encode(phrases, normalize_embeddings=True)
+    return tuple(labels), np.asarray(matrix, dtype=np.float32)
+
+
+def _normalize_utterance(question: str) -> str:
+    return re.sub(r"[^a-z0-9' ]+", " ", question.lower()).strip()
+
+
+def _score_local(text: str, in_interview: bool, allow_history: bool) -> Optional[str]:
+    labels, matrix = _prototype_matrix(in_interview)
+    query = encode_texts([text])[0]
+    sims = matrix @ np.asarray(query, dtype=np.float32)
+
+    # Nearest prototype per intent
+    best: Dict[str, float] = {}
+    for label, score in zip(labels, sims.tolist()):
+        if label == "previous_questions" and not allow_history:
+            continue
+        if score > best.get(label, -1.0):
+            best[label] = score
+
+    default = "interview_continue" if in_interview else "rag"
+    if not best:
+        return default
+    ranked = sorted(best.items(), key=lambda kv: kv[1], reverse=True)
+    top_label, top_score = ranked[0]
+    runner_up = ranked[1][1] if len(ranked) > 1 else INTENT_LOCAL_LOW
+    if top_score >= INTENT_LOCAL_HIGH and top_score - runner_up >= INTENT_LOCAL_MARGIN:
+        return top_label
+    if top_score < INTENT_LOCAL_LOW:
+        return default
+    return None
+
+
+@lru_cache(maxsize=INTENT_CACHE_SIZE)
+def _classify_short_cached(text: str, in_interview: bool, allow_history: bool) -> Optional[str]:
+    return _score_local(text, in_interview, allow_history)
+
+
+def classify_intent_local(question: str, in_interview: bool = False, allow_history: bool = False) -> Optional[str]:
+    """
+    Classify a turn against embedded example phrases without calling the LLM.
+
+    Returns the intent when confident, or None if the turn is ambiguous and
+    should be sent to the LLM. Very short turns ("yes", "end interview") are
+    served from an exact-match LRU cache.
+    """
+    text = _normalize_utterance(question)
+    if not text:
+        return None
+    if len(text.split()) <= INTENT_CACHE_MAX_WORDS:
+        return _classify_short_cached(text, in_interview, allow_history)
+    return _score_local(text, in_interview, allow_history)
+
+
+async def aclassify_intent_local(question: str, in_interview: bool = False, allow_history: bool = False) -> Optional[str]:
+    """Async wrapper for classify_intent_local; returns None if the local model is unavailable."""
     try:
-        intent_prompt = f"""
-        User question: "{question}"
-        
-        Classify this question into ONE of these intents:
-        
-        1. INTERVIEW - User wants to start an interview, be interviewed, or be asked questions about a topic
-        2. SUMMARY - User wants a summary, overview, or main points of content
-        3. RAG - User has a specific question about content or wants information (default)
-        
-        Consider these patterns:
-        
-        INTERVIEW examples:
-        - "Interview me about this topic"
-        - "Ask me questions"
-        - "Test my knowledge"
-        - "Practice interview"
-        - "Quiz me"
-        
-        SUMMARY examples:
-        - "Summarize this document"
-        - "Give me an overview"
-        - "What are the main points?"
-        - "Brief summary"
-        
-        RAG examples:
-        - "What is...?"
-        - "How does...?"
-        - "Explain..."
-        - "Tell me about..."
-        
-        Respond with ONLY: INTERVIEW, SUMMARY, or RAG
-        
-        Response:"""
-        
-        llm_response = get_llm_response(intent_prompt)
-        intent = llm_response.strip().upper()
-        
-        if "INTERVIEW" in intent:
-            return "interview"
-        elif "SUMMARY" in intent:
-            return "summary"
-        else:
-            return "rag"
-            
+        return await asyncio.to_thread(classify_intent_local, question, in_interview, allow_history)
     except Exception as e:
-        print(f"LLM intent classification failed: {e}")
-        # Fallback to keyword-based classification
-        return await classify_intent_fallback(question)
+        print(f"Local intent classification failed: {e}")
+        return None
+
+
+def is_end_interview_fallback(question: str) -> bool:
+    """Keyword check for ending an active interview."""
+    question_lower = question.lower()
+    end_keywords = ['end interview', 'stop interview', 'finish interview', 'exit interview', 'done with interview', 'end this', 'stop this']
+    return any(keyword in question_lower for keyword in end_keywords)
 
 
 async def classify_intent_fallback(question: str) -> str:
@@ -1,5 +1,115 @@
+"""
+Gemini client layer.
+
+- One shared ``ChatGoogleGenerativeAI`` per (model, temperature), so the
+  underlying HTTP/gRPC channel and auth setup are reused across requests
+- Native async calls (``ainvoke``/``astream``) with jittered exponential
+  retry that honours Retry-After hints
+- A circuit breaker that, after repeated 429s, fails fast with
+  ``LLMRateLimitError`` so callers go straight to their fallbacks
+- Per-call duration/outcome and rate-limit counts, labelled with the intent
+  the call serves (``metrics.llm_label``)
+"""
+
+import asyncio
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, Iterator, Optional, Tuple
+
+from .metrics import count_rate_limit, observe_llm
+
+if TYPE_CHECKING:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+
+DEFAULT_MODEL = os.getenv("GEMINI_MODEL", "gemini-flash-latest")
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "3"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+
+class LLMRateLimitError(RuntimeError):
+    """Raised when Gemini rejects a request for quota/rate reasons or the circuit is open."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive rate-limit failures and stays open for ``cooldown`` seconds.
+
+    Once the cooldown elapses the circuit is half-open: exactly one call is let
+    through as a probe while everyone else keeps failing fast. A success closes
+    the circuit, another rate limit re-opens it; a probe that ends in some other
+    error (or never reports back within ``probe_timeout``) frees the slot for the
+    next caller.
+    """
+
+    def __init__(
+        self,
+        threshold: int = LLM_BREAKER_THRESHOLD,
+        cooldown: float = LLM_BREAKER_COOLDOWN,
+        probe_timeout: float = LLM_TIMEOUT_SECONDS,
+    ) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.probe_timeout = probe_timeout
+        self._failures = 0
+        self._open_until = 0.0
+        self._probe_until = 0.0  # a probe is in flight until then
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead; in the half-open state only the caller that gets ``True`` probes."""
+        with self._lock:
+            if self._failures < self.threshold:
+                return True
+            now = time.monotonic()
+            if now < self._open_until or now < self._probe_until:
+                return False
+            self._probe_until = now + self.probe_timeout
+            return True
+
+    def remaining(self) -> float:
+        return max(0.0, self._open_until - time.monotonic())
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probe_until = 0.0
+
+    def record_rate_limit(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.threshold:
+                self._open_until = time.monotonic() + max(self.cooldown, retry_after or 0.0)
+                self._probe_until = 0.0
+
+    def record_error(self) -> None:
+        """A call failed for a reason other than rate limiting: no verdict, so release the probe slot."""
+        with self._lock:
+            self._probe_until = 0.0
+
+    def trip(self, duration: float) -> None:
+        """Open immediately, e.g. when the server asks us to wait longer than our retry budget."""
+        with self._lock:
+            self._failures = max(self._failures, self.threshold)
+            self._open_until = max(self._open_until, time.monotonic() + duration)
+            self._probe_until = 0.0
+
+
+breaker = CircuitBreaker()
+
+_clients: Dict[Tuple[str, float], "ChatGoogleGenerativeAI"] = {}
+_clients_lock = threading.Lock()
 
 
 def get_google_api_key() -> str:
@@ -9,20 +119,246 @@ def get_google_api_key() -> str:
     return key
 
 
-def get_gemini_llm(model: str = "gemini-flash-latest", temperature: float = 0.2) -> ChatGoogleGenerativeAI:
-    """Get Gemini LLM with proper configuration."""
-    return ChatGoogleGenerativeAI(
-        model=model, 
-        api_key=get_google_api_key(), 
-        temperature=temperature
-    )
+def get_gemini_llm(model: str = DEFAULT_MODEL, temperature: float = 0.2) -> "ChatGoogleGenerativeAI":
+    """Get the shared Gemini client for (model, temperature), creating it on first use."""
+    from langchain_google_genai import ChatGoogleGenerativeAI  # heavy; imported on first LLM call
+
+    key = (model, float(temperature))
+    llm = _clients.get(key)
+    if llm is None:
+        with _clients_lock:
+            llm = _clients.get(key)
+            if llm is None:
+                llm = ChatGoogleGenerativeAI(
+                    model=model,
+                    api_key=get_google_api_key(),
+                    temperature=temperature,
+                    # Retries are handled here so the breaker sees every 429
+                    max_retries=1,
+                )
+                _clients[key] = llm
+    return llm
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """Whether an exception from the Gemini stack is a quota/rate-limit rejection."""
+    if isinstance(exc, LLMRateLimitError):
+        return True
+    try:
+        from google.api_core.exceptions import ResourceExhausted, TooManyRequests
+
+        if isinstance(exc, (ResourceExhausted, TooManyRequests)):
+            return True
+    except ImportError:
+        pass
+    if getattr(exc, "status_code", None) == 429 or getattr(exc, "code", None) == 429:
+        return True
+    # LangChain re-wraps some provider errors, losing the type; the message keeps the status
+    msg = str(exc).lower()
+    return "429" in msg or "quota" in msg or "resource exhausted" in msg or "rate limit" in msg
+
+
+def _is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, asyncio.TimeoutError):
+        return True
+    try:
+        from google.api_core.exceptions import DeadlineExceeded, InternalServerError, ServiceUnavailable
+
+        return isinstance(exc, (DeadlineExceeded, InternalServerError, ServiceUnavailable))
+    except ImportError:
+        return False
+
+
+_RETRY_HINT = re.compile(r"retry(?:[ _-]?(?:delay|after|in))?\D{0,20}?(\d+(?:\.\d+)?)\s*s", re.IGNORECASE)
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """Extract a server-provided retry delay (Retry-After header or RetryInfo in the message)."""
+    value = getattr(exc, "retry_after", None)
+    if value:
+        return float(value)
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers and headers.get("Retry-After"):
+        try:
+            return float(headers["Retry-After"])
+        except ValueError:
+            pass
+    match = _RETRY_HINT.search(str(exc))
+    return float(match.group(1)) if match else None
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt)))
+
+
+def ensure_llm_available() -> None:
+    """Raise LLMRateLimitError immediately while the circuit breaker is open."""
+    if not breaker.allow():
+        count_rate_limit("breaker")
+        raise LLMRateLimitError(
+            "Gemini rate limit circuit is open; skipping request", retry_after=breaker.remaining()
+        )
+
+
+def classify_llm_error(exc: BaseException) -> BaseException:
+    """Map an exception raised inside an LLM call to LLMRateLimitError when appropriate, updating the breaker."""
+    if isinstance(exc, LLMRateLimitError):
+        return exc
+    if is_rate_limit_error(exc):
+        count_rate_limit("api")
+        retry_after = _retry_after(exc)
+        breaker.record_rate_limit(retry_after)
+        return LLMRateLimitError(str(exc), retry_after=retry_after)
+    breaker.record_error()
+    return exc
+
+
+def _retry_delay(exc: BaseException, attempt: int) -> float:
+    """Seconds to wait before the next attempt, or raise if the error is not worth retrying."""
+    err = classify_llm_error(exc)
+    if isinstance(err, LLMRateLimitError):
+        hint = err.retry_after
+        if attempt >= LLM_MAX_RETRIES or not breaker.allow():
+            raise err from exc
+        if hint and hint > LLM_BACKOFF_MAX:
+            # The server wants us to wait longer than a user will; fail fast instead
+            breaker.trip(hint)
+            raise err from exc
+        return hint if hint else _backoff(attempt)
+    if _is_transient(err) and attempt < LLM_MAX_RETRIES:
+        return _backoff(attempt)
+    raise err
+
+
+@contextmanager
+def _observed(call: str) -> Iterator[None]:
+    """Record the duration and outcome of one LLM call, retries included."""
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except LLMRateLimitError:
+        outcome = "rate_limited"
+        raise
+    except (GeneratorExit, asyncio.CancelledError):
+        outcome = "cancelled"
+        raise
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        observe_llm(call, time.perf_counter() - started, outcome)
+
+
+async def _retry_delay_or_raise(exc: BaseException, attempt: int) -> None:
+    """Sleep before the next attempt, or raise if the error is not worth retrying."""
+    await asyncio.sleep(_retry_delay(exc, attempt))
+
+
+def invoke_llm(prompt: str, model: str = DEFAULT_MODEL, temperature: float = 0.2) -> str:
+    """Blocking counterpart of ainvoke_llm for worker threads that have no event loop."""
+    llm = get_gemini_llm(model=model, temperature=temperature)
+    attempt = 0
+    with _observed("invoke"):
+        while True:
+            ensure_llm_available()
+            try:
+                response = llm.invoke(prompt)
+            except Exception as e:
+                time.sleep(_retry_delay(e, attempt))
+                attempt += 1
+                continue
+            breaker.record_success()
+            return response.content if hasattr(response, "content") else str(response)
+
+
+async def ainvoke_llm(prompt: str, model: str = DEFAULT_MODEL, temperature: float = 0.2) -> str:
+    """Invoke Gemini asynchronously with retry, backoff and circuit breaking; returns the text."""
+    llm = get_gemini_llm(model=model, temperature=temperature)
+    attempt = 0
+    with _observed("invoke"):
+        while True:
+            ensure_llm_available()
+            try:
+                response = await asyncio.wait_for(llm.ainvoke(prompt), timeout=LLM_TIMEOUT_SECONDS)
+            except Exception as e:
+                await _retry_delay_or_raise(e, attempt)
+                attempt += 1
+                continue
+            breaker.record_success()
+            return response.content if hasattr(response, "content") else str(response)
+
+
+async def astream_llm(prompt: str, model: str = DEFAULT_MODEL, temperature: float = 0.2) -> AsyncIterator[str]:
+    """Stream Gemini output as text chunks. Retries only happen before the first chunk is emitted."""
+    llm = get_gemini_llm(model=model, temperature=temperature)
+    attempt = 0
+    with _observed("stream"):
+        while True:
+            ensure_llm_available()
+            emitted = False
+            try:
+                async for chunk in llm.astream(prompt):
+                    text = chunk.content if hasattr(chunk, "content") else str(chunk)
+                    if text:
+                        emitted = True
+                        yield text
+            except Exception as e:
+                if emitted:
+                    raise classify_llm_error(e)
+                await _retry_delay_or_raise(e, attempt)
+                attempt += 1
+                continue
+            breaker.record_success()
+            return
+
+
+async def agenerate_llm(
+    prompt: str,
+    on_token: Optional[Callable[[str], None]] = None,
+    model: str = DEFAULT_MODEL,
+    temperature: float = 0.2,
+    prefix: str = "",
+) -> str:
+    """Generate a completion, streaming chunks to ``on_token`` when given; returns the full text.
+
+    ``prefix`` is streamed just before the first chunk (so nothing is emitted if the
+    call fails up front) but is not part of the returned text.
+    """
+    if on_token is None:
+        return await ainvoke_llm(prompt, model=model, temperature=temperature)
+    parts = []
+    async for chunk in astream_llm(prompt, model=model, temperature=temperature):
+        if not parts and prefix:
+            on_token(prefix)
+        parts.append(chunk)
+        on_token(chunk)
+    return "".join(parts)
 
 
 def get_llm_response(prompt: str, temperature: float = 0.1) -> str:
-    """Get a simple LLM response for intent detection and quick queries."""
+    """Get a simple LLM response for intent detection and quick queries (blocking)."""
+    with _observed("invoke"):
+        ensure_llm_available()
+        try:
+            llm = get_gemini_llm(temperature=temperature)
+            response = llm.invoke(prompt)
+        except Exception as e:
+            err = classify_llm_error(e)
+            if isinstance(err, LLMRateLimitError):
+                raise err
+            raise RuntimeError(f"LLM request failed: {e}")
+        breaker.record_success()
+    return response.content if hasattr(response, 'content') else str(response)
+
+
+async def aget_llm_response(prompt: str, temperature: float = 0.1) -> str:
+    """Async counterpart of get_llm_response that does not block the event loop."""
     try:
-        llm = get_gemini_llm(temperature=temperature)
-        response = llm.invoke(prompt)
-        return response.content if hasattr(response, 'content') else str(response)
+        return await ainvoke_llm(prompt, temperature=temperature)
+    except LLMRateLimitError:
+        raise
     except Exception as e:
         raise RuntimeError(f"LLM request failed: {e}")
@@ -0,0 +1,140 @@
+"""
+Metrics Service
+
+Prometheus histograms and counters for every stage of a turn (local intent
+classification, routing/history LLM call, embedding, vector search, context
+packing, Gemini calls by intent, STT, TTS, ffmpeg) and of ingestion (PDF
+extraction, chunking, Chroma upserts), plus fallback and rate-limit counters
+per engine and thread-pool queue depths. ``/metrics`` renders them in the
+Prometheus text format.
+
+Each /flow/ask turn, voice turn and STT request also writes one JSON line with
+its stage timings to the ``timings`` logger (``TIMING_LOGS``).
+
+prometheus_client is optional: without it, or with ``METRICS_ENABLED=false``,
+every recorder below is a no-op. Metrics are per process; scrape each worker.
+"""
+
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional, Tuple
+
+try:
+    import prometheus_client
+except ImportError:  # optional dependency
+    prometheus_client = None
+
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes") and prometheus_client is not None
+TIMING_LOGS = os.getenv("TIMING_LOGS", "true").lower() in ("1", "true", "yes")
+
+_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Intent the current request is serving; labels Gemini calls made under it
+llm_intent: ContextVar[str] = ContextVar("llm_intent", default="other")
+
+if METRICS_ENABLED:
+    from prometheus_client import Counter, Gauge, Histogram
+
+    STAGE_SECONDS = Histogram(
+        "app_stage_duration_seconds", "Duration of one pipeline stage", ["stage"], buckets=_LATENCY_BUCKETS
+    )
+    LLM_SECONDS = Histogram(
+        "app_llm_call_duration_seconds", "Gemini call duration, retries included", ["intent", "call", "outcome"],
+        buckets=_LATENCY_BUCKETS,
+    )
+    RATE_LIMITS = Counter(
+        "app_rate_limits_total", "Rate limits hit (api) or short-circuited by a breaker", ["engine", "intent", "source"]
+    )
+    FALLBACKS = Counter("app_fallbacks_total", "Canned/fallback answers served", ["engine", "reason"])
+    ROUTING_DECISIONS = Counter("app_routing_decisions_total", "Turns routed, by decision source", ["source", "intent"])
+    REQUEST_SECONDS = Histogram(
+        "app_request_duration_seconds", "End-to-end turn duration", ["kind", "intent"], buckets=_LATENCY_BUCKETS
+    )
+    EMBED_BATCH_SIZE = Histogram(
+        "app_embedding_batch_size", "Texts per embedding forward pass", buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+    )
+    INGESTED = Counter("app_ingested_total", "Pages and chunks ingested", ["unit"])
+    QUEUE_DEPTH = Gauge("app_queue_depth", "Work items waiting for a worker", ["pool"])
+
+_timing_logger = logging.getLogger("timings")
+if TIMING_LOGS and not _timing_logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    _timing_logger.addHandler(_handler)
+    _timing_logger.setLevel(logging.INFO)
+    _timing_logger.propagate = False
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    if METRICS_ENABLED:
+        STAGE_SECONDS.labels(stage).observe(seconds)
+
+
+def observe_llm(call: str, seconds: float, outcome: str) -> None:
+    if METRICS_ENABLED:
+        LLM_SECONDS.labels(llm_intent.get(), call, outcome).observe(seconds)
+
+
+def count_rate_limit(source: str, engine: str = "gemini", intent: Optional[str] = None) -> None:
+    if METRICS_ENABLED:
+        RATE_LIMITS.labels(engine, intent or llm_intent.get(), source).inc()
+
+
+def count_fallback(engine: str, reason: str) -> None:
+    if METRICS_ENABLED:
+        FALLBACKS.labels(engine, reason).inc()
+
+
+def count_routing(source: str, intent: str) -> None:
+    if METRICS_ENABLED:
+        ROUTING_DECISIONS.labels(source, intent).inc()
+
+
+def observe_request(kind: str, intent: str, seconds: float) -> None:
+    if METRICS_ENABLED:
+        REQUEST_SECONDS.labels(kind, intent or "unknown").observe(seconds)
+
+
+def observe_embedding_batch(size: int) -> None:
+    if METRICS_ENABLED:
+        EMBED_BATCH_SIZE.observe(size)
+
+
+def count_ingested(pages: int, chunks: int) -> None:
+    if METRICS_ENABLED:
+        INGESTED.labels("pages").inc(pages)
+        INGESTED.labels("chunks").inc(chunks)
+
+
+def register_queue(pool: str, depth: Callable[[], float]) -> None:
+    """Report ``depth()`` as the pool's queue depth at every scrape."""
+    if METRICS_ENABLED:
+        QUEUE_DEPTH.labels(pool).set_function(depth)
+
+
+@contextmanager
+def llm_label(intent: str) -> Iterator[None]:
+    """Attribute Gemini calls made inside the block (and tasks/threads started from it) to ``intent``."""
+    token = llm_intent.set(intent)
+    try:
+        yield
+    finally:
+        llm_intent.reset(token)
+
+
+def log_timings(event: str, **fields: Any) -> None:
+    """One structured JSON line on the ``timings`` logger."""
+    if TIMING_LOGS:
+        _timing_logger.info(json.dumps({"event": event, "ts": round(time.time(), 3), **fields}, default=str))
+
+
+def render() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text exposition format."""
+    if not METRICS_ENABLED:
+        return b"# metrics disabled (METRICS_ENABLED=false or prometheus_client not installed)\n", "text/plain; charset=utf-8"
+    return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
@@ -8,115 +8,261 @@ Direct, dependency-light router that coordinates between services:
 - RAG Pipeline
 """
 
-from typing import Dict, Any, Optional, List
-from .intent_classifier import classify_intent
+import asyncio
+import time
+import uuid
+from typing import Dict, Any, Callable, Optional, List
+from .routing import route_turn
+from .document_analyzer import aretrieve_documents
 from .interview_engine import InterviewEngine
 from .summary_engine import SummaryEngine
-from .rag_pipeline import aask_question
-from .llm import get_llm_response
-
-# In-memory storage for recent user questions (last 5)
-recent_questions: List[str] = []
-
-def add_question_to_history(question: str) -> None:
-    """Add a question to the recent questions history (max 5)."""
-    global recent_questions
-    recent_questions.append(question)
-    # Keep only the last 5 questions
-    if len(recent_questions) > 5:
-        recent_questions = recent_questions[-5:]
-
-def get_recent_questions() -> List[str]:
-    """Get the list of recent questions."""
-    return recent_questions.copy()
-
-def check_for_previous_question_intent(question: str) -> Optional[str]:
-    """Check if user is asking about previous questions using LLM intelligence."""
-    if not recent_questions:
+from .rag_pipeline import aask_question, is_fallback_answer
+from .session_store import SessionState, get_session_store
+from .answer_cache import ANSWER_CACHE_ENABLED, embed_question, get_answer_cache
+from .metrics import llm_label, log_timings, observe_request
+from .timing import stage
+
+
+def new_client_session_id() -> str:
+    """Unguessable id for a client's non-interview conversation."""
+    return uuid.uuid4().hex
+
+
+def _history_key(file_id: str, conversation_session_id: Optional[str], client_session_id: str) -> str:
+    """Session key for history: the interview session if any, else this client's conversation about the file."""
+    return conversation_session_id or f"client:{client_session_id}:{file_id}"
+
+
+def _topic_from_answer(answer: str, limit: int = 200) -> str:
+    """Condense an interview turn to its final paragraph (the question asked)."""
+    paragraphs = [p.strip() for p in (answer or "").split("\n\n") if p.strip()]
+    return paragraphs[-1][:limit] if paragraphs else ""
+
+
+def add_question_to_history(state: SessionState, question: str) -> None:
+    """Add a question to the session's recent questions (bounded ring buffer)."""
+    state.add_turn(question)
+
+
+def get_recent_questions(state: Optional[SessionState]) -> List[str]:
+    """Get the list of recent questions for a session."""
+    return list(state.recent_turns) if state else []
+
+
+def _start_background(coro) -> "asyncio.Task":
+    """Start a speculative task whose failure is tolerated if its result is never used."""
+    task = asyncio.create_task(coro)
+    # Mark failures as retrieved so an unused task doesn't log a warning
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    return task
+
+
+async def _embed_question(question: str, timings: Optional[Dict[str, float]]) -> List[float]:
+    with stage(timings, "embed"):
+        return await asyncio.to_thread(embed_question, question)
+
+
+async def _retrieve_with(file_id: str, question: str, vector_task: "asyncio.Task", timings: Optional[Dict[str, float]]):
+    # Retrieval reuses the answer-cache embedding, so the question is encoded once per turn
+    vector = await vector_task
+    return await aretrieve_documents(file_id, question, query_vector=vector, timings=timings)
+
+
+async def _result_or_none(task: "asyncio.Task"):
+    try:
+        return await task
+    except Exception:
         return None
-    
-    # Create context for LLM to understand the intent
+
+
+def format_previous_questions(recent_questions: List[str]) -> str:
+    """Render the session's recent questions as an answer."""
+    if len(recent_questions) == 1:
+        return f"Your previous question was: '{recent_questions[-1]}'"
     recent_questions_context = "\n".join([f"{i+1}. {q}" for i, q in enumerate(recent_questions)])
+    return f"Your recent questions were:\n{recent_questions_context}"
+
+
+class _AnswerStream:
+    """Forwards answer chunks to an event callback and reconciles them with the final answer.
+
+    Canned fallbacks and cached answers are never streamed by the engines, and a
+    streamed answer may be replaced by a fallback mid-way; ``finish`` sends
+    whatever the client is missing, preceded by a ``reset`` if the streamed text
+    is not a prefix of the final answer.
+    """
+
+    def __init__(self, emit: Callable[[str, Dict[str, Any]], None]) -> None:
+        self._emit = emit
+        self._sent: List[str] = []
+
+    def token(self, text: str) -> None:
+        self._sent.append(text)
+        self._emit("token", {"text": text})
+
+    def finish(self, answer: str) -> None:
+        sent = "".join(self._sent)
+        if sent and not answer.startswith(sent):
+            self._emit("reset", {})
+            sent = ""
+        remainder = answer[len(sent):]
+        if remainder:
+            self._emit("token", {"text": remainder})
+
+
+async def run_flow(
+    file_id: str,
+    question: str,
+    conversation_session_id: Optional[str] = None,
+    emit: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    debug: bool = False,
+    client_session_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Main entry point for conversation orchestration (no LangGraph).
+
+    If ``emit`` is given it is called with progress events for streaming clients:
+    ``intent`` once routing is done, ``token``/``reset`` for the answer text.
+    The returned payload is the same either way.
+
+    Outside an interview, question history is kept per ``client_session_id``;
+    a new one is issued when the caller sends none, and every response carries
+    it so the client can send it back on the next turn. With ``debug`` it also carries
+    ``timings_ms`` per stage (embed, search, route, prompt, llm / generate, total);
+    the same timings are always written to the structured timing log.
+    """
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+    stream = _AnswerStream(emit) if emit is not None else None
+    on_token = stream.token if stream is not None else None
+    store = get_session_store()
+    client_session_id = client_session_id or new_client_session_id()
+    state = store.get_or_create(_history_key(file_id, conversation_session_id, client_session_id), file_id)
     
-    # LLM prompt to intelligently detect if user wants previous questions
-    intent_prompt = f"""
-    User's current question: "{question}"
-    
-    Recent conversation history:
-    {recent_questions_context}
-    
-    Task: Determine if the user is asking about their previous questions, conversation history, or what they asked before.
+    recent_questions = get_recent_questions(state)
+    in_interview = bool(conversation_session_id)
     
-    Respond with ONLY one of these options:
-    - "YES" if they're asking about previous questions/history
-    - "NO" if they're asking something else
+    # Outside an interview the turn most likely needs retrieval (RAG or summary),
+    # so embed the question (shared by the answer cache and retrieval) and
+    # retrieve while the routing call is still in flight
+    prefetch = None
+    question_vector = None
+    if not in_interview:
+        question_vector = _start_background(_embed_question(question, timings))
+        prefetch = _start_background(_retrieve_with(file_id, question, question_vector, timings))
     
-    Examples of YES cases:
-    - "What did I ask before?"
-    - "Can you remind me what I asked?"
-    - "What was my previous question?"
-    - "Show me my chat history"
-    - "What questions have I asked?"
+    # One structured LLM call decides history recall and the target flow
+    with stage(timings, "route"):
+        decision = await route_turn(question, recent_questions, in_interview)
+    intent = decision.intent
     
-    Response:"""
+    vector = None
+    cached_answer = None
+    if question_vector is not None:
+        if decision.needs_retrieval:
+            vector = await _result_or_none(question_vector)
+            if vector is not None and ANSWER_CACHE_ENABLED:
+                cached_answer = get_answer_cache().get(file_id, intent, vector)
+        else:
+            question_vector.cancel()
     
-    try:
-        # Use LLM to determine intent
-        llm_response = get_llm_response(intent_prompt)
-        
-        if "YES" in llm_response.upper():
-            if len(recent_questions) == 1:
-                return f"Your previous question was: '{recent_questions[-1]}'"
-            else:
-                return f"Your recent questions were:\n{recent_questions_context}"
-    except Exception as e:
-        # Fallback to None if LLM fails
-        print(f"LLM intent detection failed: {e}")
-        return None
+    docs = None
+    if prefetch is not None:
+        if decision.needs_retrieval and cached_answer is None:
+            # On failure let the downstream flow retrieve (and report errors) itself
+            docs = await _result_or_none(prefetch)
+        else:
+            prefetch.cancel()
     
-    return None
-
-
-async def run_flow(file_id: str, question: str, conversation_session_id: Optional[str] = None) -> Dict[str, Any]:
-    """Main entry point for conversation orchestration (no LangGraph)."""
+    new_session_id = str(uuid.uuid4())[:8] if intent == "interview" else None
+    if emit is not None:
+        if intent == "interview":
+            event_session_id = new_session_id
+        elif intent == "end_interview":
+            event_session_id = None
+        else:
+            event_session_id = conversation_session_id
+        emit("intent", {"intent": intent, "conversation_session_id": event_session_id})
     
-    # Check if user is asking about previous questions
-    previous_question_response = check_for_previous_question_intent(question)
-    if previous_question_response:
+    if intent == "previous_questions":
+        answer = format_previous_questions(recent_questions)
+        if stream is not None:
+            stream.finish(answer)
+        _record_turn(file_id, intent, decision.source, False, timings, started)
         return {
             "intent": "previous_questions",
-            "answer": previous_question_response,
-            "conversation_session_id": conversation_session_id
+            "answer": answer,
+            "conversation_session_id": conversation_session_id,
+            "client_session_id": client_session_id,
         }
     
     # Add current question to history before processing
-    add_question_to_history(question)
-    
-    intent = await classify_intent(question, conversation_session_id)
-
-    # Route to the appropriate flow
-    if intent == "summary":
-        result = await SummaryEngine.generate_summary(file_id, question)
-    elif intent == "interview":
-        result = await InterviewEngine.start_interview(file_id, question)
-    elif intent == "interview_continue":
-        # Preserve existing session id in the response
-        result = await InterviewEngine.continue_interview(file_id, user_answer=question, document_analysis="")
-        if conversation_session_id:
-            result["conversation_session_id"] = conversation_session_id
-    elif intent == "end_interview":
-        result = await InterviewEngine.end_interview(file_id)
-        # Ensure session is cleared
-        result["conversation_session_id"] = None
+    add_question_to_history(state, question)
+
+    # Route to the appropriate flow; Gemini calls below are labelled with its intent
+    with llm_label(intent):
+        if cached_answer is not None:
+            result = {"intent": intent, "answer": cached_answer}
+        elif intent == "summary":
+            with stage(timings, "generate"):
+                result = await SummaryEngine.generate_summary(file_id, question, docs=docs, on_token=on_token)
+        elif intent == "interview":
+            with stage(timings, "generate"):
+                result = await InterviewEngine.start_interview(
+                    file_id, question, session_id=new_session_id, on_token=on_token
+                )
+            if result.get("conversation_session_id"):
+                # Seed the interview session with the conversation so far
+                interview_state = SessionState(session_id=result["conversation_session_id"], file_id=file_id)
+                interview_state.recent_turns.extend(state.recent_turns)
+                interview_state.document_analysis = result.get("document_analysis") or ""
+                interview_state.add_topic(_topic_from_answer(result.get("answer", "")))
+                store.save(interview_state)
+        elif intent == "interview_continue":
+            # Reuse the analysis snapshot taken at interview start instead of recomputing it
+            with stage(timings, "generate"):
+                result = await InterviewEngine.continue_interview(
+                    file_id,
+                    user_answer=question,
+                    document_analysis=state.document_analysis,
+                    asked_topics=state.asked_topics,
+                    on_token=on_token,
+                )
+            # A failed analysis comes back empty and isn't stored, so the next turn retries it
+            if result.get("document_analysis"):
+                state.document_analysis = result["document_analysis"]
+            state.add_topic(_topic_from_answer(result.get("answer", "")))
+            # Preserve existing session id in the response
+            if conversation_session_id:
+                result["conversation_session_id"] = conversation_session_id
+        elif intent == "end_interview":
+            with stage(timings, "generate"):
+                result = await InterviewEngine.end_interview(file_id, on_token=on_token)
+            # Ensure session is cleared
+            result["conversation_session_id"] = None
+        else:
+            # Default to RAG
+            answer = await aask_question(
+                file_id, question, docs=docs, on_token=on_token, query_vector=vector, timings=timings
+            )
+            result = {"intent": "rag", "answer": answer}
+
+    if stream is not None:
+        stream.finish(result.get("answer") or "")
+
+    if ANSWER_CACHE_ENABLED and vector is not None and cached_answer is None and not result.get("fallback") \
+            and not is_fallback_answer(result.get("answer") or ""):
+        get_answer_cache().put(file_id, intent, question, vector, result["answer"])
+
+    if intent == "end_interview":
+        store.delete(conversation_session_id)
     else:
-        # Default to RAG
-        answer = await aask_question(file_id, question)
-        result = {"intent": "rag", "answer": answer}
+        store.save(state)
 
     # Standardize response payload
     response: Dict[str, Any] = {
         "intent": result.get("intent"),
         "answer": result.get("answer"),
+        "client_session_id": client_session_id,
     }
     if result.get("conversation_session_id") is not None:
         response["conversation_session_id"] = result.get("conversation_session_id")
@@ -124,5 +270,15 @@ async def run_flow(file_id: str, question: str, conversation_session_id: Optiona
         response["requires_response"] = result.get("requires_response")
     if result.get("conversation_state") is not None:
         response["conversation_state"] = result.get("conversation_state")
+    _record_turn(file_id, intent, decision.source, cached_answer is not None, timings, started)
+    if debug:
+        response["timings_ms"] = timings
 
     return response
+
+
+def _record_turn(file_id: str, intent: str, source: str, cached: bool, timings: Dict[str, float], started: float) -> None:
+    elapsed = time.perf_counter() - started
+    timings["total"] = round(elapsed * 1000, 2)
+    observe_request("flow", intent, elapsed)
+    log_timings("flow_turn", file_id=file_id, intent=intent, route=source, cached=cached, timings_ms=timings)
@@ -1,61 +1,96 @@
-import asyncio
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.chains import RetrievalQA
+"""
+RAG question answering.
 
-from .vectorstore import create_from_texts, get_vectorstore, collection_count
-from .embeddings import STEmbeddings
-from .llm import get_gemini_llm
+One lean path per question: the query vector (computed once per turn, see
+orchestrator) goes straight to the file's Chroma collection through a
+HybridRetriever, the context is packed by context_builder, and the "stuff"
+prompt is formatted here and sent through the shared Gemini client. No
+LangChain vectorstore, retriever or chain objects are built per request. When
+a ``timings`` dict is passed, the embed / search / prompt / llm stage costs are
+recorded in it (milliseconds).
+"""
 
+from typing import Any, Callable, Dict, List, Optional, Sequence
 
-def store_embeddings(text, file_id):
-    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    docs = splitter.split_text(text)
-    if not docs:
-        return None
-    embeddings = STEmbeddings()
-    return create_from_texts(docs, str(file_id), embeddings)
+from .vectorstore import collection_count
+from .context_builder import abuild_context, build_context
+from .document_analyzer import aretrieve_documents
+from .hybrid_retriever import HybridRetriever
+from .llm import LLMRateLimitError, agenerate_llm, classify_llm_error, ensure_llm_available, invoke_llm
+from .metrics import count_fallback
+from .timing import stage
 
 
-# Async counterparts leveraging threads for blocking CPU/IO tasks
-async def astore_embeddings(text: str, file_id: str):
-    """Async wrapper for store_embeddings to avoid blocking event loop."""
-    return await asyncio.to_thread(store_embeddings, text, file_id)
+RATE_LIMIT_ANSWER = "I'm currently experiencing API rate limits. The question you asked was about the uploaded document, but I'm unable to process it right now. Please try again later or contact support for assistance."
 
+# Same wording as LangChain's default "stuff" QA prompt used by RetrievalQA
+QA_PROMPT_TEMPLATE = (
+    "Use the following pieces of context to answer the question at the end. "
+    "If you don't know the answer, just say that you don't know, don't try to make up an answer.\n\n"
+    "{context}\n\n"
+    "Question: {question}\n"
+    "Helpful Answer:"
+)
 
-async def aask_question(file_id: str, query: str) -> str:
-    """Async Q&A. If the underlying chain supports arun, use it; otherwise run in a thread."""
-    if collection_count(str(file_id)) == 0:
+ERROR_ANSWER_PREFIX = "I encountered an error while processing your question:"
+
+
+def _error_answer(error: BaseException) -> str:
+    rate_limited = isinstance(error, LLMRateLimitError)
+    count_fallback("rag", "rate_limit" if rate_limited else "error")
+    if rate_limited:
+        return RATE_LIMIT_ANSWER
+    return f"{ERROR_ANSWER_PREFIX} {error}. Please try rephrasing your question or try again later."
+
+
+def is_fallback_answer(answer: str) -> bool:
+    """Whether an answer is a canned rate-limit/error reply (and so must not be cached)."""
+    return answer == RATE_LIMIT_ANSWER or answer.startswith(ERROR_ANSWER_PREFIX)
+
+
+def build_qa_prompt(query: str, context: str) -> str:
+    return QA_PROMPT_TEMPLATE.format(context=context, question=query)
+
+
+async def aask_question(
+    file_id: str,
+    query: str,
+    docs: Optional[List[Any]] = None,
+    on_token: Optional[Callable[[str], None]] = None,
+    query_vector: Optional[Sequence[float]] = None,
+    timings: Optional[Dict[str, float]] = None,
+) -> str:
+    """Async Q&A over the file's chunks using the "stuff" prompt.
+
+    When ``docs`` are supplied (e.g. prefetched while routing), retrieval is skipped;
+    otherwise ``query_vector`` (if given) saves re-embedding the question.
+    ``on_token`` receives answer chunks as they stream from the LLM.
+    """
+    if docs is None and collection_count(str(file_id)) == 0:
         raise ValueError("No embeddings found for this file. Upload a PDF and ensure embeddings are created before asking questions.")
     
     try:
-        vectorstore = get_vectorstore(str(file_id), STEmbeddings())
-        retriever = vectorstore.as_retriever()
-        llm = get_gemini_llm()
-        qa_chain = RetrievalQA.from_chain_type(llm, retriever=retriever, chain_type="stuff")
-        arun = getattr(qa_chain, "arun", None)
-        if callable(arun):
-            return await qa_chain.arun(query)
-        return await asyncio.to_thread(qa_chain.run, query)
+        ensure_llm_available()
+        if docs is None:
+            docs = await aretrieve_documents(file_id, query, query_vector=query_vector, timings=timings)
+        with stage(timings, "prompt"):
+            context = await abuild_context(docs, "rag", str(file_id))
+            prompt = build_qa_prompt(query, context.text)
+        with stage(timings, "llm"):
+            return await agenerate_llm(prompt, on_token=on_token)
     except Exception as e:
-        error_msg = str(e)
-        if "429" in error_msg or "quota" in error_msg.lower() or "limit" in error_msg.lower():
-            return "I'm currently experiencing API rate limits. The question you asked was about the uploaded document, but I'm unable to process it right now. Please try again later or contact support for assistance."
-        else:
-            return f"I encountered an error while processing your question: {error_msg}. Please try rephrasing your question or try again later."
+        return _error_answer(classify_llm_error(e))
+
 
-def ask_question(file_id, query):
+def ask_question(file_id: str, query: str) -> str:
+    """Blocking counterpart of aask_question: same retrieval, context packing and prompt."""
     if collection_count(str(file_id)) == 0:
         raise ValueError("No embeddings found for this file. Upload a PDF and ensure embeddings are created before asking questions.")
     
     try:
-        vectorstore = get_vectorstore(str(file_id), STEmbeddings())
-        retriever = vectorstore.as_retriever()
-        llm = get_gemini_llm()
-        qa_chain = RetrievalQA.from_chain_type(llm, retriever=retriever, chain_type="stuff")
-        return qa_chain.run(query)
+        ensure_llm_available()
+        docs = HybridRetriever(str(file_id)).search(query)
+        context = build_context(docs, "rag", str(file_id))
+        return invoke_llm(build_qa_prompt(query, context.text))
     except Exception as e:
-        error_msg = str(e)
-        if "429" in error_msg or "quota" in error_msg.lower() or "limit" in error_msg.lower():
-            return "I'm currently experiencing API rate limits. The question you asked was about the uploaded document, but I'm unable to process it right now. Please try again later or contact support for assistance."
-        else:
-            return f"I encountered an error while processing your question: {error_msg}. Please try rephrasing your question or try again later."
+        return _error_answer(classify_llm_error(e))
@@ -0,0 +1,139 @@
+"""
+Routing Service
+
+Single pre-routing step for a conversation turn. Confident turns are routed by
+the local prototype classifier; otherwise one structured LLM call decides both
+whether the user is asking about their conversation history and which flow
+should handle the turn, replacing the separate history check and intent
+classification calls.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+from .intent_classifier import aclassify_intent_local, classify_intent_fallback, is_end_interview_fallback
+from .llm import LLMRateLimitError, aget_llm_response
+from .metrics import count_fallback, count_routing, llm_label
+from .timing import stage
+
+
+# Decisions returned by the router; all but "previous_questions" map 1:1 to flows
+ROUTING_INTENTS = (
+    "previous_questions",
+    "interview",
+    "interview_continue",
+    "end_interview",
+    "summary",
+    "rag",
+)
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+
+
+@dataclass(frozen=True)
+class RoutingDecision:
+    """Typed result of the routing step."""
+
+    intent: str
+    source: str = "llm"  # "local", "llm" or "fallback"
+
+    @property
+    def needs_retrieval(self) -> bool:
+        """Whether the chosen flow retrieves chunks for the user's question."""
+        return self.intent in ("rag", "summary")
+
+
+def _build_routing_prompt(question: str, recent_questions: List[str], in_interview: bool) -> str:
+    history = "\n".join(f"{i+1}. {q}" for i, q in enumerate(recent_questions)) or "(none)"
+    if in_interview:
+        allowed = "interview_continue, end_interview"
+        rules = (
+            "The user is currently in an interview session.\n"
+            "- end_interview: they want to stop/end/exit the interview (\"end interview\", \"I'm done\", \"stop this\")\n"
+            "- interview_continue: anything else, including answers such as \"yes\" or \"no\"\n"
+        )
+    else:
+        allowed = "interview, summary, rag"
+        rules = (
+            "- interview: they want to be interviewed, quizzed or asked questions (\"interview me\", \"quiz me\")\n"
+            "- summary: they want a summary, overview or main points (\"summarize this\", \"give me an overview\")\n"
+            "- rag: a specific question about the content (default)\n"
+        )
+    return (
+        "Route the user's message for a document assistant.\n\n"
+        f"User message: \"{question}\"\n\n"
+        f"Recent questions from this user:\n{history}\n\n"
+        "Decide:\n"
+        "1. history: true only if the user is asking about their previous questions or conversation "
+        "history (\"what did I ask before?\", \"show me my chat history\").\n"
+        f"2. intent: one of {allowed}.\n"
+        f"{rules}\n"
+        "Respond with ONLY a JSON object, for example: {\"history\": false, \"intent\": \"rag\"}"
+    )
+
+
+def parse_routing_response(raw: str, in_interview: bool) -> Optional[RoutingDecision]:
+    """Parse the model's JSON decision; returns None if it is unusable."""
+    match = _JSON_OBJECT.search(raw or "")
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(0))
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    if data.get("history") is True:
+        return RoutingDecision(intent="previous_questions")
+
+    intent = str(data.get("intent", "")).strip().lower()
+    allowed = ("interview_continue", "end_interview") if in_interview else ("interview", "summary", "rag")
+    if intent not in allowed:
+        return None
+    return RoutingDecision(intent=intent)
+
+
+async def fallback_route(question: str, in_interview: bool) -> RoutingDecision:
+    """Keyword-based routing used when the LLM is unavailable or returns garbage."""
+    if in_interview:
+        intent = "end_interview" if is_end_interview_fallback(question) else "interview_continue"
+    else:
+        intent = await classify_intent_fallback(question)
+    return RoutingDecision(intent=intent, source="fallback")
+
+
+async def route_turn(question: str, recent_questions: List[str], in_interview: bool) -> RoutingDecision:
+    """Decide how to handle a turn locally, or with a single structured LLM call if ambiguous."""
+    decision = await _decide(question, recent_questions, in_interview)
+    count_routing(decision.source, decision.intent)
+    return decision
+
+
+async def _decide(question: str, recent_questions: List[str], in_interview: bool) -> RoutingDecision:
+    with stage(None, "intent_local"):
+        local_intent = await aclassify_intent_local(question, in_interview, allow_history=bool(recent_questions))
+    if local_intent is not None:
+        return RoutingDecision(intent=local_intent, source="local")
+
+    prompt = _build_routing_prompt(question, recent_questions, in_interview)
+    try:
+        # The combined history check + intent classification call
+        with llm_label("routing"), stage(None, "routing_llm"):
+            raw = await aget_llm_response(prompt)
+    except Exception as e:
+        print(f"LLM routing failed: {e}")
+        count_fallback("routing", "rate_limit" if isinstance(e, LLMRateLimitError) else "error")
+        return await fallback_route(question, in_interview)
+
+    decision = parse_routing_response(raw, in_interview)
+    if decision is None:
+        print(f"Unparseable routing response: {raw!r}")
+        count_fallback("routing", "unparseable")
+        return await fallback_route(question, in_interview)
+    if decision.intent == "previous_questions" and not recent_questions:
+        # Nothing to recall; treat it as a normal question
+        return await fallback_route(question, in_interview)
+    return decision
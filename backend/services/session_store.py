@@ -0,0 +1,242 @@
+"""
+Session Store Service
+
+Per-conversation state keyed by ``conversation_session_id``. Each session keeps
+a bounded ring buffer of recent user turns, the interview's document-analysis
+snapshot and the topics already asked, so follow-up turns do not have to
+recompute them.
+
+Idle sessions are evicted by TTL and, once ``SESSION_MAX_SESSIONS`` is reached,
+least-recently-used first. The backend is selected with ``SESSION_BACKEND``:
+
+- ``memory`` (default) – in-process, per worker
+- ``sqlite`` – a local SQLite file shared by all workers on one host
+- ``redis`` – any Redis-compatible server shared by all workers
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional
+
+
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "1800"))
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "1000"))
+SESSION_HISTORY_SIZE = int(os.getenv("SESSION_HISTORY_SIZE", "5"))
+SESSION_MAX_TOPICS = int(os.getenv("SESSION_MAX_TOPICS", "10"))
+
+
+@dataclass
+class SessionState:
+    """Conversation state for a single session."""
+
+    session_id: str
+    file_id: Optional[str] = None
+    recent_turns: Deque[str] = field(default_factory=lambda: deque(maxlen=SESSION_HISTORY_SIZE))
+    document_analysis: str = ""
+    asked_topics: List[str] = field(default_factory=list)
+    updated_at: float = field(default_factory=time.time)
+
+    def add_turn(self, question: str) -> None:
+        self.recent_turns.append(question)
+
+    def add_topic(self, topic: str) -> None:
+        self.asked_topics.append(topic)
+        if len(self.asked_topics) > SESSION_MAX_TOPICS:
+            self.asked_topics = self.asked_topics[-SESSION_MAX_TOPICS:]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "file_id": self.file_id,
+            "recent_turns": list(self.recent_turns),
+            "document_analysis": self.document_analysis,
+            "asked_topics": list(self.asked_topics),
+            "updated_at": self.updated_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SessionState":
+        return cls(
+            session_id=data["session_id"],
+            file_id=data.get("file_id"),
+            recent_turns=deque(data.get("recent_turns") or [], maxlen=SESSION_HISTORY_SIZE),
+            document_analysis=data.get("document_analysis") or "",
+            asked_topics=list(data.get("asked_topics") or []),
+            updated_at=data.get("updated_at") or time.time(),
+        )
+
+
+class InMemorySessionBackend:
+    """Process-local backend: an OrderedDict used as an LRU with TTL expiry."""
+
+    def __init__(self, ttl_seconds: int = SESSION_TTL_SECONDS, max_sessions: int = SESSION_MAX_SESSIONS) -> None:
+        self._ttl = ttl_seconds
+        self._max = max_sessions
+        self._data: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            data = self._data.get(session_id)
+            if data is None:
+                return None
+            if time.time() - data["updated_at"] > self._ttl:
+                del self._data[session_id]
+                return None
+            self._data.move_to_end(session_id)
+            return data
+
+    def put(self, session_id: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            self._data[session_id] = data
+            self._data.move_to_end(session_id)
+            self._evict_locked()
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._data.pop(session_id, None)
+
+    def _evict_locked(self) -> None:
+        cutoff = time.time() - self._ttl
+        # Oldest entries sit at the front, so expired ones can be dropped in order
+        while self._data:
+            oldest_id, oldest = next(iter(self._data.items()))
+            if oldest["updated_at"] >= cutoff and len(self._data) <= self._max:
+                break
+            del self._data[oldest_id]
+
+
+class SQLiteSessionBackend:
+    """SQLite-backed sessions so several uvicorn workers on one host share state."""
+
+    def __init__(
+        self,
+        path: str = os.getenv("SESSION_SQLITE_PATH", "./sessions.db"),
+        ttl_seconds: int = SESSION_TTL_SECONDS,
+        max_sessions: int = SESSION_MAX_SESSIONS,
+    ) -> None:
+        self._path = path
+        self._ttl = ttl_seconds
+        self._max = max_sessions
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, payload TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions(updated_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=5.0, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT payload, updated_at FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        if time.time() - row[1] > self._ttl:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            return None
+        return json.loads(row[0])
+
+    def put(self, session_id: str, data: Dict[str, Any]) -> None:
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (session_id, payload, updated_at) VALUES (?, ?, ?)",
+            (session_id, json.dumps(data), data["updated_at"]),
+        )
+        conn.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - self._ttl,))
+        conn.execute(
+            "DELETE FROM sessions WHERE session_id NOT IN "
+            "(SELECT session_id FROM sessions ORDER BY updated_at DESC LIMIT ?)",
+            (self._max,),
+        )
+
+    def delete(self, session_id: str) -> None:
+        self._connect().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+
+class RedisSessionBackend:
+    """Redis-compatible backend. TTL is enforced per key; LRU is left to the server's maxmemory policy."""
+
+    def __init__(
+        self,
+        url: str = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0"),
+        ttl_seconds: int = SESSION_TTL_SECONDS,
+        prefix: str = "session:",
+    ) -> None:
+        import redis  # imported lazily; only needed when this backend is selected
+
+        self._client = redis.Redis.from_url(url)
+        self._ttl = ttl_seconds
+        self._prefix = prefix
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        key = self._prefix + session_id
+        raw = self._client.get(key)
+        if raw is None:
+            return None
+        # Sliding expiry: reading a session keeps it alive
+        self._client.expire(key, self._ttl)
+        return json.loads(raw)
+
+    def put(self, session_id: str, data: Dict[str, Any]) -> None:
+        self._client.setex(self._prefix + session_id, self._ttl, json.dumps(data))
+
+    def delete(self, session_id: str) -> None:
+        self._client.delete(self._prefix + session_id)
+
+
+class SessionStore:
+    """Typed facade over a session backend."""
+
+    def __init__(self, backend) -> None:
+        self._backend = backend
+
+    def get(self, session_id: Optional[str]) -> Optional[SessionState]:
+        if not session_id:
+            return None
+        data = self._backend.get(session_id)
+        return SessionState.from_dict(data) if data else None
+
+    def get_or_create(self, session_id: str, file_id: Optional[str] = None) -> SessionState:
+        state = self.get(session_id)
+        if state is None:
+            state = SessionState(session_id=session_id, file_id=file_id)
+        return state
+
+    def save(self, state: SessionState) -> None:
+        state.updated_at = time.time()
+        self._backend.put(state.session_id, state.to_dict())
+
+    def delete(self, session_id: Optional[str]) -> None:
+        if session_id:
+            self._backend.delete(session_id)
+
+
+def _build_backend(name: str):
+    name = (name or "memory").strip().lower()
+    if name == "sqlite":
+        return SQLiteSessionBackend()
+    if name == "redis":
+        return RedisSessionBackend()
+    return InMemorySessionBackend()
+
+
+@lru_cache(maxsize=1)
+def get_session_store() -> SessionStore:
+    """Process-wide session store configured from ``SESSION_BACKEND``."""
+    return SessionStore(_build_backend(os.getenv("SESSION_BACKEND", "memory")))
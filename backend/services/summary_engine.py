@@ -6,33 +6,66 @@ and LLM-powered summary generation.
 """
 
 import asyncio
-from typing import Dict, Any
+import re
+from typing import Dict, Any, Callable, List, Optional
+from .context_builder import abuild_context
 from .document_analyzer import get_retriever
-from .llm import get_gemini_llm
+from .document_profile import ProfileData, aget_profile
+from .llm import LLMRateLimitError, agenerate_llm
+from .metrics import count_fallback
+
+
+RATE_LIMIT_ANSWER = (
+    "I'm currently experiencing high usage and have reached my API limits. "
+    "Please try again in a few minutes, or use specific questions about your "
+    "document instead of requesting a summary."
+)
+
+# Words that don't narrow a summary request down to a topic
+_GENERIC_SUMMARY_WORDS = {
+    "a", "about", "an", "and", "brief", "can", "could", "cv", "doc", "document", "entire", "file", "for", "give",
+    "i", "is", "it", "me", "my", "of", "overview", "pdf", "please", "provide", "quick", "resume", "short",
+    "summarise", "summarize", "summary", "tell", "the", "this", "uploaded", "what", "whole", "you",
+}
+
+
+def is_generic_summary_request(question: str) -> bool:
+    """True when the request asks for the document summary as a whole, with no focus topic."""
+    words = re.findall(r"[a-z]+", (question or "").lower())
+    return all(w in _GENERIC_SUMMARY_WORDS for w in words)
 
 
 class SummaryEngine:
     """Manages document summarization with comprehensive content analysis."""
     
     @staticmethod
-    async def generate_summary(file_id: str, question: str) -> Dict[str, Any]:
+    async def generate_summary(
+        file_id: str,
+        question: str,
+        docs: Optional[List[Any]] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
         """
         Generate a comprehensive summary of the document content.
         
-        Uses RAG to retrieve relevant content and LLM to create structured summary.
+        Uses the summary precomputed at ingestion when there is one; otherwise
+        RAG retrieves relevant content and the LLM creates a structured summary.
+        ``docs`` may carry chunks already retrieved for ``question`` by the router;
+        ``on_token`` receives answer chunks as they stream from the LLM.
         """
         try:
-            retriever = await get_retriever(file_id)
-            docs = await asyncio.to_thread(
-                retriever.get_relevant_documents, 
-                question or "summary of the document"
-            )
-            context = "\n\n".join([
-                d.page_content for d in docs 
-                if getattr(d, "page_content", None)
-            ])
+            profile = await aget_profile(file_id)
+            if profile is not None:
+                return await SummaryEngine._summary_from_profile(profile, question, on_token)
+
+            if docs is None:
+                retriever = await get_retriever(file_id)
+                docs = await asyncio.to_thread(
+                    retriever.get_relevant_documents, 
+                    question or "summary of the document"
+                )
+            context = (await abuild_context(docs, "summary", str(file_id))).text
 
-            llm = get_gemini_llm()
             prompt = (
                 "Please provide a comprehensive summary of the document content below.\n"
                 "Include the main topics, key concepts, and important details.\n"
@@ -41,29 +74,52 @@ class SummaryEngine:
                 f"Focus area (if specified): {question}"
             )
             
-            resp = await asyncio.to_thread(llm.invoke, prompt)
+            answer = await agenerate_llm(prompt, on_token=on_token)
             
             return {
-                "answer": getattr(resp, "content", str(resp)),
+                "answer": answer,
                 "intent": "summary"
             }
             
         except Exception as e:
-            return SummaryEngine._get_fallback_response(str(e))
+            return SummaryEngine._get_fallback_response(e)
     
     @staticmethod
-    def _get_fallback_response(error_msg: str) -> Dict[str, Any]:
+    async def _summary_from_profile(
+        profile: ProfileData, question: str, on_token: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """Serve the stored summary as-is, or focus it on the request with one short LLM call."""
+        if is_generic_summary_request(question):
+            if on_token is not None:
+                on_token(profile.summary)
+            return {"answer": profile.summary, "intent": "summary", "source": "profile"}
+
+        prompt = (
+            "Below is a summary of the whole document. Using only this summary, answer the request "
+            "concisely, with headings or bullet points where they help.\n\n"
+            f"Document summary:\n{profile.summary}\n\n"
+            f"Request: {question}"
+        )
+        answer = await agenerate_llm(prompt, on_token=on_token)
+        return {"answer": answer, "intent": "summary", "source": "profile"}
+
+    @staticmethod
+    def _get_fallback_response(error: Exception) -> Dict[str, Any]:
         """Fallback response for summary generation failures."""
-        if "quota" in error_msg.lower() or "rate limit" in error_msg.lower():
-            answer = (
-                "I'm currently experiencing high usage and have reached my API limits. "
-                "Please try again in a few minutes, or use specific questions about your "
-                "document instead of requesting a summary."
-            )
+        rate_limited = isinstance(error, LLMRateLimitError)
+        count_fallback("summary", "rate_limit" if rate_limited else "error")
+        if rate_limited:
+            answer = RATE_LIMIT_ANSWER
         else:
-            answer = f"Sorry, I encountered an error while generating the summary: {error_msg}"
+            answer = f"Sorry, I encountered an error while generating the summary: {error}"
         
         return {
             "answer": answer,
-            "intent": "summary"
-        }
\ No newline at end of file
+            "intent": "summary",
+            "fallback": True
+        }
+    
+    @staticmethod
+    def canned_answers() -> List[str]:
+        """Every fixed answer the fallbacks can return (used to pre-render TTS audio)."""
+        return [RATE_LIMIT_ANSWER]
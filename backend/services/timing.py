@@ -0,0 +1,29 @@
+"""
+Per-stage timings for request paths.
+
+``stage(timings, name)`` adds the wall time of its block, in milliseconds, to
+``timings[name]``; pass ``None`` when the caller doesn't collect timings. Blocks
+that complete are also observed in the ``app_stage_duration_seconds`` histogram
+(cancelled speculative work would otherwise skew it low).
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from .metrics import observe_stage
+
+
+@contextmanager
+def stage(timings: Optional[Dict[str, float]], name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    completed = False
+    try:
+        yield
+        completed = True
+    finally:
+        elapsed = time.perf_counter() - started
+        if completed:
+            observe_stage(name, elapsed)
+        if timings is not None:
+            timings[name] = round(timings.get(name, 0.0) + elapsed * 1000, 2)
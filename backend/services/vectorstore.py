@@ -1,16 +1,23 @@
 import os
 import re
-from typing import Optional
-
-from chromadb import PersistentClient
-from chromadb.config import Settings as ChromaSettings
-from langchain_community.vectorstores import Chroma
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from .embeddings import STEmbeddings
+from .timing import stage
+
+if TYPE_CHECKING:
+    from chromadb import PersistentClient
 
 
 CHROMA_DIR = os.getenv("CHROMA_DIR", "./chroma_db")
 
+# Per-file caches, keyed by collection name. Invalidated on writes and deletes.
+_collections: Dict[str, Any] = {}
+_counts: Dict[str, int] = {}
+_cache_lock = threading.Lock()
+
 
 def collection_name(file_id: str) -> str:
     base = f"file_{file_id}"
@@ -26,23 +33,92 @@ def collection_name(file_id: str) -> str:
     return name
 
 
-def get_client() -> PersistentClient:
+@lru_cache(maxsize=1)
+def get_client() -> "PersistentClient":
+    """Process-wide Chroma client (opened once per process)."""
+    # chromadb is imported on first use to keep app start-up light
+    from chromadb import PersistentClient
+    from chromadb.config import Settings as ChromaSettings
+
     return PersistentClient(path=CHROMA_DIR, settings=ChromaSettings(anonymized_telemetry=False))
 
 
-def get_vectorstore(file_id: str, embedding: Optional[STEmbeddings] = None) -> Chroma:
-    emb = embedding or STEmbeddings()
-    client = get_client()
-    return Chroma(collection_name=collection_name(str(file_id)), embedding_function=emb, client=client)
+def invalidate_collection(file_id: str) -> None:
+    """Drop cached handles and counts for a file after its collection changed."""
+    name = collection_name(str(file_id))
+    with _cache_lock:
+        _collections.pop(name, None)
+        _counts.pop(name, None)
+
+
+def get_collection(file_id: str):
+    """Return the file's collection handle, or None if it does not exist. Never creates one."""
+    name = collection_name(str(file_id))
+    col = _collections.get(name)
+    if col is not None:
+        return col
+    try:
+        col = get_client().get_collection(name=name)
+    except Exception:
+        # Chroma raises (ValueError/InvalidCollectionException) for unknown collections
+        return None
+    with _cache_lock:
+        _collections[name] = col
+    return col
+
+
+def upsert_texts(file_id: str, texts: List[str], ids: List[str], embedding: Optional[STEmbeddings] = None) -> None:
+    """Embed and upsert one batch into the file's collection (created on first use).
+
+    The batch is embedded first and then written straight to the collection, so
+    the two show up as separate ``ingest_embed`` / ``chroma_upsert`` stages. The
+    cached count is dropped so the new chunks are queryable immediately.
+    """
+    name = collection_name(str(file_id))
+    with stage(None, "ingest_embed"):
+        vectors = (embedding or STEmbeddings()).embed_documents(texts)
+    with stage(None, "chroma_upsert"):
+        col = _collections.get(name) or get_client().get_or_create_collection(name=name, embedding_function=None)
+        col.upsert(ids=ids, embeddings=vectors, documents=texts)
+    with _cache_lock:
+        _collections[name] = col
+        _counts.pop(name, None)
+
+
+def get_texts(file_id: str) -> List[str]:
+    """All stored chunk texts of a file, in ingestion order when ids are ``file_id:n``."""
+    col = get_collection(file_id)
+    if col is None:
+        return []
+    data = col.get(include=["documents"])
+
+    def position(item) -> int:
+        suffix = item[0].rsplit(":", 1)[-1]
+        return int(suffix) if suffix.isdigit() else 0
+
+    pairs = sorted(zip(data["ids"], data["documents"]), key=position)
+    return [text for _, text in pairs if text]
 
 
-def create_from_texts(texts, file_id: str, embedding: Optional[STEmbeddings] = None) -> Chroma:
-    emb = embedding or STEmbeddings()
-    client = get_client()
-    return Chroma.from_texts(texts, emb, collection_name=collection_name(str(file_id)), client=client)
+def delete_collection(file_id: str) -> None:
+    """Delete a file's collection (if any) and drop its cached handles."""
+    try:
+        get_client().delete_collection(name=collection_name(str(file_id)))
+    except Exception:
+        pass
+    invalidate_collection(file_id)
 
 
 def collection_count(file_id: str) -> int:
-    client = get_client()
-    col = client.get_or_create_collection(name=collection_name(str(file_id)))
-    return col.count() if hasattr(col, "count") else 0
+    """Number of stored chunks for a file; 0 if its collection does not exist."""
+    name = collection_name(str(file_id))
+    count = _counts.get(name)
+    if count is not None:
+        return count
+    col = get_collection(file_id)
+    count = col.count() if col is not None and hasattr(col, "count") else 0
+    if count:
+        # Only positive counts are cached: another worker may embed the file later
+        with _cache_lock:
+            _counts[name] = count
+    return count
@@ -0,0 +1,345 @@
+"""
+Server-side voice turns for the /voice/ws WebSocket.
+
+One VoiceSession lives per connection and keeps the file id, the interview's
+conversation_session_id and the audio settings, so the client only streams audio.
+Each turn runs STT -> run_flow -> TTS on the server and pushes transcripts,
+answer tokens and audio chunks back as they become available; answer sentences
+are synthesized while the LLM is still streaming.
+"""
+
+import asyncio
+import os
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from stt_services.app import transcribe_audio
+from tts_service.app import TTS_STREAM_CONCURRENCY, synthesize
+from tts_service.schema import TTS_MAX_SPEED, TTS_MIN_SPEED, TTSOptions
+from tts_service.tts_model import normalize_text, split_sentences
+from .metrics import log_timings, observe_request, observe_stage
+from .orchestrator import new_client_session_id, run_flow
+
+
+# Seconds between interim transcriptions while audio is arriving (only if the client asks for partials)
+VOICE_PARTIAL_INTERVAL = float(os.getenv("VOICE_PARTIAL_INTERVAL", "2.0"))
+# Largest utterance accepted in one turn (the STT API rejects files over 25 MB)
+VOICE_MAX_TURN_BYTES = int(os.getenv("VOICE_MAX_TURN_BYTES", str(25 * 1024 * 1024)))
+# Shortest piece of streamed answer text worth a separate TTS request
+VOICE_MIN_SPEECH_CHARS = int(os.getenv("VOICE_MIN_SPEECH_CHARS", "40"))
+
+Outbox = "asyncio.Queue[Any]"
+
+_SENTENCE_END = re.compile(r"[.!?]\s+")
+
+
+class _Speaker:
+    """Turns streamed answer text into ordered audio chunks, a few sentences at a time.
+
+    Complete sentences are synthesized as soon as they arrive (at most
+    ``concurrency`` in flight); a sender task forwards the audio to the outbox in
+    order. ``reset`` drops everything not yet sent when the answer is replaced.
+    """
+
+    def __init__(self, outbox: Outbox, speed: float, lang: str, voice: str, fmt: str, concurrency: int = TTS_STREAM_CONCURRENCY) -> None:
+        self._outbox = outbox
+        self._settings = (speed, lang, voice, fmt)
+        self._buffer = ""
+        self._queue: "asyncio.Queue[Optional[Tuple[str, Optional[asyncio.Task]]]]" = asyncio.Queue()
+        self._pending: Set[asyncio.Task] = set()
+        self._slots = asyncio.Semaphore(concurrency)
+        self._seq = 0
+        self.first_audio_at: Optional[float] = None
+        self._sender = asyncio.create_task(self._send_in_order())
+
+    def feed(self, text: str) -> None:
+        self._buffer += text
+        ends = list(_SENTENCE_END.finditer(self._buffer))
+        if not ends:
+            return
+        cut = ends[-1].end()
+        if len(self._buffer[:cut].strip()) < VOICE_MIN_SPEECH_CHARS:
+            return
+        complete, self._buffer = self._buffer[:cut], self._buffer[cut:]
+        self._schedule(complete)
+
+    def reset(self) -> None:
+        self._buffer = ""
+        for task in self._pending:
+            task.cancel()
+        self._queue.put_nowait(("reset", None))
+
+    async def finish(self) -> None:
+        """Synthesize whatever text is left and wait until all audio is in the outbox."""
+        if self._buffer.strip():
+            self._schedule(self._buffer)
+        self._buffer = ""
+        self._queue.put_nowait(None)
+        await self._sender
+
+    def cancel(self) -> None:
+        for task in self._pending:
+            task.cancel()
+        self._sender.cancel()
+
+    def _schedule(self, text: str) -> None:
+        for sentence in split_sentences(normalize_text(text)):
+            task = asyncio.create_task(self._synthesize(sentence))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+            self._queue.put_nowait((sentence, task))
+
+    async def _synthesize(self, sentence: str) -> Optional[bytes]:
+        async with self._slots:
+            try:
+                return await synthesize(sentence, *self._settings)
+            except Exception as e:
+                print(f"Voice TTS failed for {sentence[:40]!r}: {e}")
+                return None
+
+    async def _send_in_order(self) -> None:
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            sentence, task = item
+            if task is None:
+                self._outbox.put_nowait({"type": "audio_reset"})
+                continue
+            # asyncio.wait never raises for the task, so a reset-cancelled sentence is just skipped
+            await asyncio.wait({task})
+            if task.cancelled() or task.result() is None:
+                continue
+            if self.first_audio_at is None:
+                self.first_audio_at = time.perf_counter()
+            self._outbox.put_nowait({"type": "audio", "seq": self._seq, "text": sentence, "format": self._settings[3]})
+            self._outbox.put_nowait(task.result())
+            self._seq += 1
+
+
+class VoiceSession:
+    """Per-connection voice state and turn pipeline.
+
+    Outgoing messages go through one queue and a single writer task, so JSON
+    events and binary audio frames never interleave mid-send.
+    """
+
+    def __init__(
+        self,
+        send_json: Callable[[Dict[str, Any]], Awaitable[None]],
+        send_bytes: Callable[[bytes], Awaitable[None]],
+        file_id: Optional[str] = None,
+        conversation_session_id: Optional[str] = None,
+    ) -> None:
+        self.file_id = file_id
+        self.conversation_session_id = conversation_session_id
+        # Question history outside interviews is private to this connection
+        self.client_session_id = new_client_session_id()
+        self.audio_filename = "audio.webm"
+        self.speed = 1.0
+        self.lang = "en"
+        self.voice = "com"
+        self.format = "mp3"
+        self.partials = False
+        self._send_json = send_json
+        self._send_bytes = send_bytes
+        self._audio = bytearray()
+        self._outbox: Outbox = asyncio.Queue()
+        self._writer = asyncio.create_task(self._write())
+        self._turns: List[asyncio.Task] = []
+        self._partial: Optional[asyncio.Task] = None
+        self._last_partial = 0.0
+
+    def send(self, message: Dict[str, Any]) -> None:
+        self._outbox.put_nowait(message)
+
+    def error(self, status_code: int, detail: str) -> None:
+        self.send({"type": "error", "status_code": status_code, "detail": detail})
+
+    def ready(self) -> None:
+        self.send({
+            "type": "ready",
+            "file_id": self.file_id,
+            "conversation_session_id": self.conversation_session_id,
+            "format": self.format,
+        })
+
+    def configure(self, message: Dict[str, Any]) -> None:
+        """Apply a ``start``/``config`` message; only the fields present are changed.
+
+        Voice settings are validated with the TTS endpoints' schema (speed is
+        clamped to its range). An invalid frame changes nothing and is answered
+        with an ``error`` event.
+        """
+        try:
+            speed = min(max(float(message.get("speed", self.speed)), TTS_MIN_SPEED), TTS_MAX_SPEED)
+        except (TypeError, ValueError):
+            self.error(422, f"Invalid speed: {message.get('speed')!r}")
+            return
+        try:
+            options = TTSOptions(
+                speed=speed,
+                lang=message.get("lang", self.lang),
+                voice=message.get("voice", self.voice),
+                format=message.get("format", self.format),
+            )
+        except ValidationError as e:
+            self.error(422, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+            return
+        session_id = message.get("conversation_session_id", self.conversation_session_id)
+        audio_filename = message.get("audio_filename", self.audio_filename)
+        if session_id is not None and not isinstance(session_id, str):
+            self.error(422, "conversation_session_id must be a string")
+            return
+        if not isinstance(audio_filename, str) or len(audio_filename) > 128:
+            self.error(422, "audio_filename must be a string of at most 128 characters")
+            return
+
+        self.speed, self.lang, self.voice, self.format = options.speed, options.lang, options.voice, options.format
+        if message.get("file_id") is not None:
+            self.file_id = str(message["file_id"])
+        self.conversation_session_id = session_id
+        self.audio_filename = audio_filename
+        self.partials = bool(message.get("partials", self.partials))
+        self.ready()
+
+    def add_audio(self, chunk: bytes) -> None:
+        if len(self._audio) + len(chunk) > VOICE_MAX_TURN_BYTES:
+            self._audio.clear()
+            self.error(413, "Utterance too large; audio for this turn was discarded")
+            return
+        self._audio.extend(chunk)
+        now = time.perf_counter()
+        if self.partials and self._partial is None and now - self._last_partial >= VOICE_PARTIAL_INTERVAL:
+            self._last_partial = now
+            self._partial = asyncio.create_task(self._partial_transcript(bytes(self._audio)))
+
+    def end_turn(self) -> None:
+        audio = bytes(self._audio)
+        self._audio.clear()
+        self._stop_partial()
+        if not audio:
+            self.error(400, "No audio received for this turn")
+            return
+        self._start_turn(audio=audio)
+
+    def ask(self, question: str) -> None:
+        if not isinstance(question, str) or not question.strip():
+            self.error(400, "Question cannot be empty")
+            return
+        self._start_turn(question=question)
+
+    def cancel(self) -> None:
+        self._audio.clear()
+        self._stop_partial()
+        for task in self._turns:
+            task.cancel()
+        self._turns.clear()
+
+    async def close(self) -> None:
+        self.cancel()
+        self._writer.cancel()
+
+    def _stop_partial(self) -> None:
+        if self._partial is not None:
+            self._partial.cancel()
+            self._partial = None
+        self._last_partial = 0.0
+
+    async def _partial_transcript(self, audio: bytes) -> None:
+        try:
+            result = await transcribe_audio(audio, self.audio_filename, mode="single")
+            self.send({"type": "transcript", "text": result["transcript"].strip(), "final": False})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Interim transcription failed: {e}")
+        finally:
+            if self._partial is asyncio.current_task():
+                self._partial = None
+
+    def _start_turn(self, audio: Optional[bytes] = None, question: Optional[str] = None) -> None:
+        # Turns run one after another so session state is updated in order
+        previous = self._turns[-1] if self._turns else None
+        task = asyncio.create_task(self._turn(previous, audio, question))
+        self._turns.append(task)
+        task.add_done_callback(self._forget_turn)
+
+    def _forget_turn(self, task: asyncio.Task) -> None:
+        if task in self._turns:
+            self._turns.remove(task)
+
+    async def _turn(self, previous: Optional[asyncio.Task], audio: Optional[bytes], question: Optional[str]) -> None:
+        if previous is not None:
+            await asyncio.wait({previous})
+        if not self.file_id:
+            self.error(400, "file_id is required; send a start message first")
+            return
+
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+        speaker: Optional[_Speaker] = None
+        try:
+            if audio is not None:
+                stt = await transcribe_audio(audio, self.audio_filename)
+                question = stt["transcript"].strip()
+                timings["stt_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                self.send({"type": "transcript", "text": question, "final": True})
+                if not question:
+                    self.error(422, "No speech detected")
+                    return
+
+            speaker = _Speaker(self._outbox, self.speed, self.lang, self.voice, self.format)
+            flow_started = time.perf_counter()
+
+            def emit(event: str, data: Dict[str, Any]) -> None:
+                self.send({"type": event, **data})
+                if event == "token":
+                    if "first_token_ms" not in timings:
+                        timings["first_token_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                    speaker.feed(data["text"])
+                elif event == "reset":
+                    speaker.reset()
+
+            result = await run_flow(
+                self.file_id,
+                question,
+                conversation_session_id=self.conversation_session_id,
+                emit=emit,
+                client_session_id=self.client_session_id,
+            )
+            timings["flow_ms"] = round((time.perf_counter() - flow_started) * 1000, 1)
+            self.conversation_session_id = result.get("conversation_session_id")
+            self.send({"type": "answer", **result})
+
+            await speaker.finish()
+            if speaker.first_audio_at is not None:
+                timings["first_audio_ms"] = round((speaker.first_audio_at - started) * 1000, 1)
+                observe_stage("voice_first_audio", speaker.first_audio_at - started)
+            elapsed = time.perf_counter() - started
+            timings["total_ms"] = round(elapsed * 1000, 1)
+            observe_request("voice", result.get("intent"), elapsed)
+            log_timings("voice_turn", file_id=self.file_id, intent=result.get("intent"), timings_ms=timings)
+            self.send({"type": "turn_end", "conversation_session_id": self.conversation_session_id, "timings_ms": timings})
+        except HTTPException as e:
+            self.error(e.status_code, str(e.detail))
+        except ValueError as ve:
+            self.error(404, str(ve))
+        except Exception as e:
+            self.error(500, f"Voice turn failed: {e}")
+        finally:
+            # No-op after a clean finish; otherwise drops queued synthesis
+            if speaker is not None:
+                speaker.cancel()
+
+    async def _write(self) -> None:
+        while True:
+            item = await self._outbox.get()
+            if isinstance(item, bytes):
+                await self._send_bytes(item)
+            else:
+                await self._send_json(item)
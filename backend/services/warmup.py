@@ -0,0 +1,101 @@
+"""
+Start-up warm-up run from the app's lifespan.
+
+The DB schema is created before the app starts serving (requests need the
+tables). The embedding model and the vector store client are then loaded on a
+background task, so the process binds its port right away and ``/ready`` turns
+200 once everything is warm. Each step is toggled by an env flag; timings and
+errors are kept on a WarmupStatus for the readiness endpoint.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+WARMUP_DB = _flag("WARMUP_DB", "true")
+WARMUP_EMBEDDINGS = _flag("WARMUP_EMBEDDINGS", "true")
+WARMUP_VECTORSTORE = _flag("WARMUP_VECTORSTORE", "true")
+# Hold start-up until every step is done instead of warming in the background
+WARMUP_BLOCKING = _flag("WARMUP_BLOCKING", "false")
+
+
+@dataclass
+class WarmupStatus:
+    state: str = "starting"  # starting | ready | failed
+    steps: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.state,
+            "steps": self.steps,
+            "elapsed_ms": round(((self.finished_at or time.time()) - self.started_at) * 1000, 1),
+        }
+
+
+def _create_schema() -> None:
+    from db.session import engine
+    from models import Base  # ensures models are imported and metadata available
+
+    Base.metadata.create_all(bind=engine)
+
+
+def _load_embeddings() -> None:
+    from .embeddings import encode_texts
+
+    # A dummy encode loads the weights and starts the batcher's worker thread
+    encode_texts(["warm up"])
+
+
+def _open_vectorstore() -> None:
+    from .vectorstore import get_client
+
+    get_client().heartbeat()
+
+
+def _background_steps() -> List[Tuple[str, Callable[[], None]]]:
+    steps = []
+    if WARMUP_EMBEDDINGS:
+        steps.append(("embeddings", _load_embeddings))
+    if WARMUP_VECTORSTORE:
+        steps.append(("vectorstore", _open_vectorstore))
+    return steps
+
+
+async def _run_step(status: WarmupStatus, name: str, fn: Callable[[], None]) -> None:
+    started = time.perf_counter()
+    try:
+        await asyncio.to_thread(fn)
+        status.steps[name] = {"ok": True, "ms": round((time.perf_counter() - started) * 1000, 1)}
+    except Exception as e:
+        print(f"Warm-up step {name!r} failed: {e}")
+        status.steps[name] = {"ok": False, "error": str(e)}
+
+
+def _finish(status: WarmupStatus) -> None:
+    status.finished_at = time.time()
+    status.state = "ready" if all(step["ok"] for step in status.steps.values()) else "failed"
+
+
+async def _run_background(status: WarmupStatus) -> None:
+    for name, fn in _background_steps():
+        await _run_step(status, name, fn)
+    _finish(status)
+
+
+async def start_warmup(status: WarmupStatus) -> "asyncio.Task[None]":
+    """Create the schema now and warm the rest on the returned task (awaited too with WARMUP_BLOCKING)."""
+    if WARMUP_DB:
+        await _run_step(status, "schema", _create_schema)
+    task = asyncio.create_task(_run_background(status))
+    if WARMUP_BLOCKING:
+        await task
+    return task
@@ -1,12 +1,23 @@
-from fastapi import UploadFile, File, APIRouter
+from fastapi import UploadFile, File, APIRouter, HTTPException
 from fastapi.responses import JSONResponse
-import tempfile, os, pathlib
-from .whisper_model import transcribe_audio_with_groq 
+import asyncio, time
+from typing import Any, Dict
+from services.metrics import count_rate_limit, log_timings, observe_stage, register_queue
+from tts_service.transcoder import get_transcoder
+from .whisper_model import STT_MAX_CONCURRENCY, get_transcriber
+from .chunking import STT_CHUNK_MIN_BYTES, STT_CHUNK_MIN_SECONDS, decode_pcm, duration_seconds, transcribe_chunked
 
 router = APIRouter()
 
-async def stt_endpoint(file: UploadFile = File(...)):
-    # Choose suffix based on uploaded filename or content type
+# Caps in-flight transcriptions per worker; extra requests wait here
+_stt_slots = asyncio.Semaphore(STT_MAX_CONCURRENCY)
+# Requests waiting for a slot, reported as the "stt" queue depth
+_stt_waiting = 0
+register_queue("stt", lambda: _stt_waiting)
+
+
+def _audio_filename(file: UploadFile) -> str:
+    # Choose suffix based on uploaded filename or content type (the API infers the format from it)
     suffix = '.wav'
     if file.filename and '.' in file.filename:
         suffix = '.' + file.filename.rsplit('.', 1)[-1].lower()
@@ -17,14 +28,71 @@ async def stt_endpoint(file: UploadFile = File(...)):
             suffix = '.mp3'
         elif 'm4a' in file.content_type or 'mp4' in file.content_type:
             suffix = '.m4a'
+    return f"audio{suffix}"
+
 
-    # Save uploaded file temporarily
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(await file.read())
-        path = tmp.name
+async def transcribe_audio(audio: bytes, filename: str = "audio.wav", mode: str = "auto", granularity: str = "segment") -> Dict[str, Any]:
+    """Transcribe in-memory audio, waiting for a free transcription slot.
 
+    Short clips go single-shot; long recordings are decoded (inside the slot, on
+    the bounded ffmpeg pool), split at silences and transcribed in parallel. Returns ``{"transcript", "queue_ms", ...}`` plus ``segments``/``chunks``
+    for chunked runs.
+    """
+    from groq import APITimeoutError, RateLimitError
+
+    global _stt_waiting
+    queued = time.perf_counter()
+    _stt_waiting += 1
+    try:
+        await _stt_slots.acquire()
+    finally:
+        _stt_waiting -= 1
     try:
-        text = transcribe_audio_with_groq(path)
-        return JSONResponse({"transcript": text})
+        dequeued = time.perf_counter()
+        observe_stage("stt_queue", dequeued - queued)
+        samples = None
+        if mode == "chunked" or (mode == "auto" and len(audio) >= STT_CHUNK_MIN_BYTES):
+            try:
+                samples = await get_transcoder().run(decode_pcm, audio)
+            except RuntimeError as e:
+                if mode == "chunked":
+                    raise HTTPException(status_code=422, detail=str(e))
+                print(f"Chunked STT unavailable, falling back to single-shot: {e}")
+            if samples is not None and mode == "auto" and duration_seconds(samples) < STT_CHUNK_MIN_SECONDS:
+                samples = None
+        try:
+            if samples is None:
+                result = {"transcript": await get_transcriber().transcribe(audio, filename)}
+            else:
+                result = await transcribe_chunked(samples, get_transcriber(), granularity)
+        except APITimeoutError:
+            raise HTTPException(status_code=504, detail="Transcription timed out")
+        except RateLimitError:
+            count_rate_limit("api", engine="groq", intent="stt")
+            raise
+        observe_stage("stt", time.perf_counter() - dequeued)
     finally:
-        os.remove(path)
+        _stt_slots.release()
+    result["queue_ms"] = round((dequeued - queued) * 1000, 1)
+    return result
+
+
+async def stt_endpoint(file: UploadFile = File(...), mode: str = "auto", granularity: str = "segment"):
+    started = time.perf_counter()
+    # Keep the upload in memory and hand the bytes straight to the transcriber
+    audio = await file.read()
+    uploaded = time.perf_counter()
+
+    result = await transcribe_audio(audio, _audio_filename(file), mode, granularity)
+    finished = time.perf_counter()
+
+    queue_ms = result.pop("queue_ms")
+    timings = {
+        "upload_ms": round((uploaded - started) * 1000, 1),
+        "queue_ms": queue_ms,
+        "transcription_ms": round((finished - uploaded) * 1000 - queue_ms, 1),
+        "total_ms": round((finished - started) * 1000, 1),
+    }
+    log_timings("stt", mode=mode, bytes=len(audio), timings_ms=timings)
+    server_timing = ", ".join(f"{name[:-3]};dur={value}" for name, value in timings.items())
+    return JSONResponse({**result, "timings_ms": timings}, headers={"Server-Timing": server_timing})
@@ -0,0 +1,187 @@
+"""
+Chunked transcription for long recordings.
+
+Audio is decoded to 16 kHz mono PCM, cut near silences into ~STT_CHUNK_SECONDS
+segments that overlap by STT_CHUNK_OVERLAP_SECONDS, transcribed concurrently
+(at most STT_CHUNK_FANOUT at a time) and stitched back together. Segment
+timestamps are shifted to the recording's timeline and text repeated in the
+overlaps is dropped.
+"""
+
+import asyncio
+import io
+import os
+import subprocess
+import wave
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from tts_service.transcoder import get_ffmpeg_path
+from .whisper_model import STT_TIMEOUT_SECONDS
+
+
+SAMPLE_RATE = 16000
+STT_CHUNK_SECONDS = float(os.getenv("STT_CHUNK_SECONDS", "30"))
+STT_CHUNK_OVERLAP_SECONDS = float(os.getenv("STT_CHUNK_OVERLAP_SECONDS", "1.5"))
+STT_CHUNK_SEARCH_SECONDS = float(os.getenv("STT_CHUNK_SEARCH_SECONDS", "5"))
+STT_CHUNK_FANOUT = int(os.getenv("STT_CHUNK_FANOUT", "4"))
+# Clips shorter than this stay on the single-shot path
+STT_CHUNK_MIN_SECONDS = float(os.getenv("STT_CHUNK_MIN_SECONDS", "60"))
+# Uploads below this size are assumed short and never decoded just to measure them
+STT_CHUNK_MIN_BYTES = int(os.getenv("STT_CHUNK_MIN_BYTES", str(512 * 1024)))
+
+_FRAME_SECONDS = 0.03
+
+
+@dataclass
+class AudioChunk:
+    start: float  # seconds into the recording, including the leading overlap
+    keep_from: float  # seconds into the recording where this chunk's own (non-overlap) audio starts
+    wav: bytes
+
+
+def decode_pcm(audio: bytes) -> np.ndarray:
+    """Decode any ffmpeg-readable audio to 16 kHz mono int16 samples via pipes."""
+    ffmpeg = get_ffmpeg_path()
+    if not ffmpeg:
+        raise RuntimeError("ffmpeg is required for chunked transcription")
+    proc = subprocess.run(
+        [ffmpeg, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+         "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "pipe:1"],
+        input=audio,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        timeout=STT_TIMEOUT_SECONDS,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not decode audio: {proc.stderr.decode(errors='ignore').strip()}")
+    return np.frombuffer(proc.stdout, dtype=np.int16)
+
+
+def encode_wav(samples: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(samples.tobytes())
+    return buf.getvalue()
+
+
+def find_split_points(samples: np.ndarray, target: float = STT_CHUNK_SECONDS, search: float = STT_CHUNK_SEARCH_SECONDS) -> List[float]:
+    """Cut points (seconds) roughly every ``target`` seconds, each placed at the quietest frame within ±``search``."""
+    frame = int(SAMPLE_RATE * _FRAME_SECONDS)
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return []
+    frames = samples[: n_frames * frame].astype(np.float32).reshape(n_frames, frame)
+    energy = np.sqrt(np.mean(frames ** 2, axis=1))
+
+    duration = len(samples) / SAMPLE_RATE
+    points: List[float] = []
+    last = 0.0
+    while duration - last > target + search:
+        lo = int((last + target - search) / _FRAME_SECONDS)
+        hi = int((last + target + search) / _FRAME_SECONDS)
+        quietest = lo + int(np.argmin(energy[lo:hi]))
+        last = quietest * _FRAME_SECONDS
+        points.append(last)
+    return points
+
+
+def split_audio(samples: np.ndarray, overlap: float = STT_CHUNK_OVERLAP_SECONDS) -> List[AudioChunk]:
+    """Split samples at silence boundaries into WAV chunks, each starting ``overlap`` seconds early."""
+    bounds = [0.0] + find_split_points(samples) + [len(samples) / SAMPLE_RATE]
+    chunks = []
+    for keep_from, end in zip(bounds, bounds[1:]):
+        start = max(0.0, keep_from - overlap)
+        piece = samples[int(start * SAMPLE_RATE): int(end * SAMPLE_RATE)]
+        chunks.append(AudioChunk(start=start, keep_from=keep_from, wav=encode_wav(piece)))
+    return chunks
+
+
+def _dedupe_words(previous: List[str], current: List[str], max_words: int = 12) -> List[str]:
+    """Drop the longest prefix of ``current`` that repeats the tail of ``previous``."""
+    def norm(w: str) -> str:
+        return w.lower().strip(".,!?;:\"'")
+
+    for n in range(min(max_words, len(previous), len(current)), 0, -1):
+        if [norm(w) for w in previous[-n:]] == [norm(w) for w in current[:n]]:
+            return current[n:]
+    return current
+
+
+TimedPiece = Tuple[float, float, List[str]]  # start, end (recording timeline), words
+
+
+def _drop_overlap_repeats(chunk: AudioChunk, timed: List[TimedPiece], words: List[str], word_ends: List[float]) -> None:
+    """Remove the words a chunk's leading pieces repeat from the previous chunk, in place.
+
+    Only text heard in the overlap can be a repeat, so the chunk's pieces that
+    start before ``keep_from`` are compared with the already stitched words that
+    end after ``chunk.start``. Repeated words anywhere else are real speech.
+    """
+    window = 0
+    while window < len(words) and word_ends[-1 - window] > chunk.start:
+        window += 1
+    if not window:
+        return
+    lead = [n for n, (start, _, _) in enumerate(timed) if start < chunk.keep_from]
+    lead_words = [w for n in lead for w in timed[n][2]]
+    drop = len(lead_words) - len(_dedupe_words(words[-window:], lead_words))
+    for n in lead:
+        if drop <= 0:
+            break
+        start, end, piece_words = timed[n]
+        take = min(drop, len(piece_words))
+        timed[n] = (start, end, piece_words[take:])
+        drop -= take
+
+
+def stitch(results: List[Tuple[AudioChunk, List[Dict[str, Any]]]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """Merge per-chunk timed pieces into one transcript on the recording's timeline."""
+    words: List[str] = []
+    word_ends: List[float] = []
+    pieces: List[Dict[str, Any]] = []
+    for chunk, chunk_pieces in results:
+        timed: List[TimedPiece] = []
+        for piece in chunk_pieces:
+            start = chunk.start + float(piece.get("start", 0.0))
+            end = chunk.start + float(piece.get("end", 0.0))
+            # Timed pieces that finish inside the leading overlap were already heard by the previous chunk
+            if chunk.keep_from > 0 and start < end <= chunk.keep_from:
+                continue
+            timed.append((start, end, str(piece.get("text", "")).split()))
+        if chunk.keep_from > 0:
+            _drop_overlap_repeats(chunk, timed, words, word_ends)
+        for start, end, piece_words in timed:
+            if not piece_words:
+                continue
+            words.extend(piece_words)
+            word_ends.extend([end] * len(piece_words))
+            pieces.append({"start": round(start, 2), "end": round(end, 2), "text": " ".join(piece_words)})
+    return " ".join(words), pieces
+
+
+def duration_seconds(samples: np.ndarray) -> float:
+    return len(samples) / SAMPLE_RATE
+
+
+async def transcribe_chunked(samples: np.ndarray, transcriber, granularity: str = "segment", fanout: int = STT_CHUNK_FANOUT) -> Dict[str, Any]:
+    """Transcribe a long recording (decoded with decode_pcm) as concurrent overlapping chunks.
+
+    Returns ``{"transcript", "segments", "chunks"}`` where segments (or words, per
+    ``granularity``) carry start/end seconds on the original timeline.
+    """
+    chunks = await asyncio.to_thread(split_audio, samples)
+    sem = asyncio.Semaphore(fanout)
+
+    async def run(index: int, chunk: AudioChunk):
+        async with sem:
+            return chunk, await transcriber.transcribe_timed(chunk.wav, f"chunk{index}.wav", granularity)
+
+    results = await asyncio.gather(*(run(i, c) for i, c in enumerate(chunks)))
+    transcript, pieces = stitch(list(results))
+    return {"transcript": transcript, "segments": pieces, "chunks": len(chunks)}
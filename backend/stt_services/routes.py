@@ -1,9 +1,14 @@
-from fastapi import APIRouter, UploadFile, status
+from typing import Literal
+from fastapi import APIRouter, Query, UploadFile, status
 from fastapi.params import File
 from .app import stt_endpoint
 
 router = APIRouter()
 
 @router.post("/api/v1/stt", status_code=status.HTTP_200_OK)
-async def get_stt_endpoint(file: UploadFile = File(...)):
-    return await stt_endpoint(file)
+async def get_stt_endpoint(
+    file: UploadFile = File(...),
+    mode: Literal["auto", "single", "chunked"] = Query("auto"),
+    granularity: Literal["segment", "word"] = Query("segment"),
+):
+    return await stt_endpoint(file, mode=mode, granularity=granularity)
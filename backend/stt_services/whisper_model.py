@@ -1,20 +1,41 @@
+import asyncio
 import os
-from groq import Groq
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List
 from dotenv import load_dotenv
+import httpx
+
+if TYPE_CHECKING:
+    from groq import Groq
 
 
 load_dotenv()  # Load environment variables from .env file
 
-def _get_client() -> Groq:
+STT_BACKEND = os.getenv("STT_BACKEND", "groq")  # "groq" or "local"
+STT_MODEL = os.getenv("STT_MODEL", "whisper-large-v3")
+STT_TIMEOUT_SECONDS = float(os.getenv("STT_TIMEOUT_SECONDS", "30"))
+STT_MAX_RETRIES = int(os.getenv("STT_MAX_RETRIES", "2"))
+STT_MAX_CONCURRENCY = int(os.getenv("STT_MAX_CONCURRENCY", "8"))
+
+
+def _get_api_key() -> str:
     api_key = os.getenv("GROQ_API_KEY")
     if not api_key:
         # Defer error until the function is called, not at import time
         raise RuntimeError(
             "Missing GROQ_API_KEY environment variable. Set it before calling the STT endpoint."
         )
-    return Groq(api_key=api_key)
+    return api_key
+
+
+@lru_cache(maxsize=1)
+def _get_client() -> "Groq":
+    from groq import Groq
+
+    return Groq(api_key=_get_api_key())
+
 
-def transcribe_audio_with_groq(audio_file_path: str, model: str = "whisper-large-v3"):
+def transcribe_audio_with_groq(audio_file_path: str, model: str = STT_MODEL):
     """
     Transcribe audio file using Groq STT API.
     Args:
@@ -31,3 +52,72 @@ def transcribe_audio_with_groq(audio_file_path: str, model: str = "whisper-large
             language="en"
         )
     return transcription.text
+
+
+class GroqTranscriber:
+    """Async Groq Whisper client, shared per process.
+
+    Reuses one pooled HTTP client, sends audio bytes directly (no temp files) and
+    lets the SDK retry transient failures (connection errors, 429, 5xx) with backoff.
+    """
+
+    def __init__(self, model: str = STT_MODEL) -> None:
+        from groq import AsyncGroq  # imported when the first transcriber is built
+
+        self.model = model
+        self._client = AsyncGroq(
+            api_key=_get_api_key(),
+            timeout=STT_TIMEOUT_SECONDS,
+            max_retries=STT_MAX_RETRIES,
+            http_client=httpx.AsyncClient(
+                timeout=STT_TIMEOUT_SECONDS,
+                limits=httpx.Limits(max_connections=STT_MAX_CONCURRENCY, max_keepalive_connections=STT_MAX_CONCURRENCY),
+            ),
+        )
+
+    async def transcribe(self, audio: bytes, filename: str = "audio.wav") -> str:
+        transcription = await self._client.audio.transcriptions.create(
+            model=self.model,
+            file=(filename, audio),
+            language="en",
+        )
+        return transcription.text
+
+    async def transcribe_timed(self, audio: bytes, filename: str = "audio.wav", granularity: str = "segment") -> List[Dict[str, Any]]:
+        """Transcribe with timestamps; returns ``[{"start", "end", "text"}]`` per segment or word."""
+        transcription = await self._client.audio.transcriptions.create(
+            model=self.model,
+            file=(filename, audio),
+            language="en",
+            response_format="verbose_json",
+            timestamp_granularities=[granularity],
+        )
+        data = transcription.model_dump() if hasattr(transcription, "model_dump") else dict(transcription)
+        if granularity == "word":
+            return [{"start": w["start"], "end": w["end"], "text": w["word"]} for w in data.get("words") or []]
+        return [{"start": s["start"], "end": s["end"], "text": s["text"].strip()} for s in data.get("segments") or []]
+
+
+class LocalTranscriber:
+    """Offline stand-in for tests and benchmarks: no network, configurable fake latency."""
+
+    def __init__(self, delay_seconds: float = float(os.getenv("STT_LOCAL_DELAY_MS", "0")) / 1000, text: str = "") -> None:
+        self.delay_seconds = delay_seconds
+        self.text = text or os.getenv("STT_LOCAL_TEXT", "")
+
+    async def transcribe(self, audio: bytes, filename: str = "audio.wav") -> str:
+        if self.delay_seconds:
+            await asyncio.sleep(self.delay_seconds)
+        return self.text or f"transcript of {len(audio)} bytes"
+
+    async def transcribe_timed(self, audio: bytes, filename: str = "audio.wav", granularity: str = "segment") -> List[Dict[str, Any]]:
+        text = await self.transcribe(audio, filename)
+        return [{"start": 0.0, "end": 0.0, "text": text}]
+
+
+@lru_cache(maxsize=1)
+def get_transcriber():
+    """Process-wide transcriber selected by ``STT_BACKEND``."""
+    if STT_BACKEND.strip().lower() == "local":
+        return LocalTranscriber()
+    return GroqTranscriber()
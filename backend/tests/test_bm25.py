@@ -0,0 +1,110 @@
+import os
+
+import pytest
+
+from services import bm25_index
+from services.bm25_index import BM25Builder, BM25Index, tokenize
+from services.hybrid_retriever import rrf_fuse
+
+IDS = ["c0", "c1", "c2", "c3"]
+TEXTS = [
+    "Deploying the Node.js service behind nginx",
+    "We rewrote the parser in C++ for speed",
+    "Upgraded to python3.11 and pinned the gpt-4 client",
+    "The team uses Python for data pipelines and Python notebooks",
+]
+
+
+def test_tokenize_keeps_compounds_and_their_parts():
+    assert tokenize("Node.js and C++ on python3.11 with GPT-4") == [
+        "node.js", "node", "js", "c++", "python3.11", "python3", "11", "gpt-4", "gpt", "4",
+    ]
+    assert tokenize("What is the point of it?") == ["point"]
+
+
+def test_search_ranks_exact_technical_terms():
+    index = BM25Index.build(IDS, TEXTS)
+    assert [chunk_id for chunk_id, _ in index.search("node.js", 3)] == ["c0"]
+    assert index.search("c++ parser", 1)[0][0] == "c1"
+    assert index.search("gpt-4", 4)[0][0] == "c2"
+
+
+def test_search_orders_by_score_and_drops_non_matches():
+    index = BM25Index.build(IDS, TEXTS)
+    hits = index.search("python client", 4)
+    assert [chunk_id for chunk_id, _ in hits] == ["c3", "c2"]
+    assert hits[0][1] > hits[1][1] > 0
+    assert index.search("kubernetes", 4) == []
+    assert index.search("python client", 1) == hits[:1]
+
+
+def test_incremental_builder_matches_one_shot_build():
+    builder = BM25Builder()
+    builder.add(IDS[:1], TEXTS[:1])
+    builder.add(IDS[1:], TEXTS[1:])
+    incremental, whole = builder.build(), BM25Index.build(IDS, TEXTS)
+    for query in ("python", "node.js nginx", "c++ speed", "gpt-4 client"):
+        assert incremental.search(query, 4) == whole.search(query, 4)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = BM25Index.build(IDS, TEXTS)
+    path = str(tmp_path / "nested" / "file.npz")
+    index.save(path)
+    loaded = BM25Index.load(path)
+    assert loaded.ids == IDS
+    for query in ("python", "node.js", "c++", "pipelines notebooks"):
+        assert loaded.search(query, 4) == pytest.approx(index.search(query, 4))
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_load_index_caches_and_delete_removes(tmp_path, monkeypatch):
+    monkeypatch.setattr(bm25_index, "BM25_DIR", str(tmp_path))
+    assert bm25_index.load_index("file-1") is None
+    bm25_index.save_index("file-1", BM25Index.build(IDS, TEXTS))
+    first = bm25_index.load_index("file-1")
+    assert first is bm25_index.load_index("file-1")
+    assert first.search("nginx", 1)[0][0] == "c0"
+    bm25_index.delete_index("file-1")
+    assert bm25_index.load_index("file-1") is None
+
+
+def test_empty_index():
+    index = BM25Builder().build()
+    assert len(index) == 0
+    assert index.search("anything", 5) == []
+
+
+def test_rrf_fuse_rewards_agreement():
+    vector = ["a", "b", "c"]
+    lexical = ["c", "d", "a"]
+    assert rrf_fuse([vector, lexical]) == ["a", "c", "b", "d"]
+
+
+def test_rrf_fuse_ties_keep_first_seen_order():
+    assert rrf_fuse([["a", "b"], ["b", "a"]]) == ["a", "b"]
+    assert rrf_fuse([["x"], []]) == ["x"]
+    assert rrf_fuse([]) == []
+
+
+def test_load_cache_is_bounded_lru(tmp_path, monkeypatch):
+    monkeypatch.setattr(bm25_index, "BM25_DIR", str(tmp_path))
+    monkeypatch.setattr(bm25_index, "BM25_CACHE_MAX_FILES", 2)
+    monkeypatch.setattr(bm25_index, "_loaded", bm25_index.OrderedDict())
+    for file_id in ("1", "2", "3"):
+        bm25_index.save_index(file_id, BM25Index.build(IDS, TEXTS))
+
+    first = bm25_index.load_index("1")
+    bm25_index.load_index("2")
+    assert bm25_index.load_index("1") is first  # touch "1" so "2" is least recently used
+    bm25_index.load_index("3")
+    assert set(bm25_index._loaded) == {bm25_index.index_path("1"), bm25_index.index_path("3")}
+
+
+def test_reingest_evicts_the_loaded_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(bm25_index, "BM25_DIR", str(tmp_path))
+    bm25_index.save_index("1", BM25Index.build(IDS, TEXTS))
+    bm25_index.load_index("1")
+    bm25_index.save_index("1", BM25Index.build(["n0"], ["nginx only"]))
+    assert bm25_index.index_path("1") not in bm25_index._loaded
+    assert bm25_index.load_index("1").ids == ["n0"]
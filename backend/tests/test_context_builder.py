@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from services import context_builder
+from services.context_builder import _mmr_order, _overlap, build_context
+from services.hybrid_retriever import Chunk
+
+SHARED = "the overlap both chunks share at the seam. "
+
+
+def _doc(text, chunk_id=None):
+    return Chunk(text, {"chunk_id": chunk_id} if chunk_id else {})
+
+
+@pytest.fixture
+def vectors(monkeypatch):
+    """Maps chunk text to an embedding; unmapped texts get their own orthogonal axis."""
+    table = {}
+
+    def fake_encode(texts):
+        rows = []
+        for text in texts:
+            if text not in table:
+                axis = np.zeros(64, dtype=np.float32)
+                axis[len(table)] = 1.0
+                table[text] = axis
+            rows.append(table[text])
+        return np.vstack(rows)
+
+    monkeypatch.setattr(context_builder, "encode_texts", fake_encode)
+    monkeypatch.setattr(context_builder, "CONTEXT_PACKING", True)
+    return table
+
+
+def test_overlap_finds_shared_seam():
+    assert _overlap("intro text. " + SHARED, SHARED + "more text") == len(SHARED)
+    # Shorter than the minimum is treated as coincidence
+    assert _overlap("ends with the cat", "the cat sat down") == 0
+    assert _overlap("unrelated", "texts") == 0
+
+
+def test_mmr_drops_near_duplicates_and_keeps_rank_order():
+    e1, e2, e3 = np.eye(3, dtype=np.float32)
+    near = (e1 + 0.01 * e2) / np.linalg.norm(e1 + 0.01 * e2)
+    assert _mmr_order(np.vstack([e1, near, e2, e3])) == [0, 2, 3]
+
+
+def test_mmr_prefers_diverse_chunk_over_similar_one():
+    e1, e2 = np.eye(2, dtype=np.float32)
+    similar = (e1 + e2 * 0.6) / np.linalg.norm(e1 + e2 * 0.6)
+    assert _mmr_order(np.vstack([e1, similar, e2]))[:2] == [0, 2]
+
+
+def test_adjacent_chunks_are_joined_without_overlap_in_document_order(vectors):
+    first = "Chapter one opens here. " + SHARED
+    second = SHARED + "Chapter one continues."
+    packed = build_context([_doc(second, "f:1"), _doc(first, "f:0")], "rag", budget=1000)
+    assert packed.text == first + "\n\n" + "Chapter one continues."
+    assert packed.chunks_used == 2
+    assert packed.tokens_saved > 0
+
+
+def test_duplicates_are_dropped(vectors):
+    vectors["copy one"] = vectors["copy two"] = np.eye(64, dtype=np.float32)[10]
+    packed = build_context([_doc("copy one"), _doc("copy two"), _doc("something else")], "rag", budget=1000)
+    assert packed.text == "copy one\n\nsomething else"
+    assert (packed.chunks_in, packed.chunks_used) == (3, 2)
+
+
+def test_budget_limits_packed_chunks(vectors):
+    docs = [_doc(f"{n}" * 400, f"f:{n * 5}") for n in range(3)]
+    packed = build_context(docs, "rag", budget=250)
+    assert packed.chunks_used == 2
+    assert packed.text == "0" * 400 + "\n\n" + "1" * 400
+    assert packed.tokens_used <= 250
+
+
+def test_oversized_best_chunk_is_cut_to_budget(vectors):
+    packed = build_context([_doc("x" * 1000)], "rag", budget=10)
+    assert packed.text == "x" * 40
+    assert packed.chunks_used == 1
+
+
+def test_packing_disabled_joins_as_is(monkeypatch):
+    monkeypatch.setattr(context_builder, "CONTEXT_PACKING", False)
+    packed = build_context([_doc("a" * 100), _doc("a" * 100)], "rag", budget=1)
+    assert packed.text == "a" * 100 + "\n\n" + "a" * 100
+    assert packed.tokens_used == packed.tokens_in
@@ -0,0 +1,45 @@
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import db.session
+from models.profile import DocumentProfile
+from services import document_profile
+from services.answer_cache import AnswerCache, InMemoryAnswerCacheBackend
+from services.document_profile import ProfileData, save_profile
+
+
+@pytest.fixture
+def database(monkeypatch):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    DocumentProfile.__table__.create(engine)
+    session_factory = sessionmaker(bind=engine, future=True)
+    monkeypatch.setattr(db.session, "SessionLocal", session_factory)
+    return session_factory
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = AnswerCache(InMemoryAnswerCacheBackend())
+    monkeypatch.setattr(document_profile, "get_answer_cache", lambda: cache)
+    return cache
+
+
+def test_saving_a_profile_invalidates_cached_answers(database, cache):
+    vector = [1.0, 0.0, 0.0]
+    cache.put("7", "summary", "summarize this", vector, "old summary")
+    cache.put("8", "summary", "summarize this", vector, "other file")
+    assert cache.get("7", "summary", vector) == "old summary"
+
+    save_profile("7", "abc", ProfileData("new summary", "KEY SKILLS: Go", 3))
+
+    assert cache.get("7", "summary", vector) is None
+    assert cache.get("8", "summary", vector) == "other file"
+    with database() as session:
+        record = session.query(DocumentProfile).filter_by(file_id=7).one()
+        assert (record.summary, record.content_hash) == ("new summary", "abc")
@@ -0,0 +1,62 @@
+import threading
+
+import numpy as np
+
+from services import embeddings
+from services.embeddings import EmbeddingBatcher
+
+
+class FakeModel:
+    """Records the texts of every forward pass; row i encodes len(text)."""
+
+    def __init__(self, gate=None):
+        self.calls = []
+        self.gate = gate
+        self.entered = threading.Event()
+
+    def encode(self, texts, normalize_embeddings=False, batch_size=32):
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait()
+        self.calls.append(list(texts))
+        return np.array([[float(len(t))] for t in texts], dtype=np.float32)
+
+
+def _texts(n, prefix="t"):
+    return [f"{prefix}{i}" for i in range(n)]
+
+
+def test_results_are_split_back_per_request():
+    batcher = EmbeddingBatcher(FakeModel(), window_ms=50, max_batch=32)
+    a, b = batcher.submit(["a"]), batcher.submit(["bbb", "cc"])
+    assert a.result(timeout=5).ravel().tolist() == [1.0]
+    assert b.result(timeout=5).ravel().tolist() == [3.0, 2.0]
+
+
+def test_request_that_would_overflow_starts_the_next_batch():
+    gate = threading.Event()
+    model = FakeModel(gate)
+    batcher = EmbeddingBatcher(model, window_ms=200, max_batch=8)
+    # Occupy the worker so the rest queue up together
+    first = batcher.submit(["warm"])
+    assert model.entered.wait(timeout=5)
+    small, large, tail = batcher.submit(_texts(2, "s")), batcher.submit(_texts(20, "l")), batcher.submit(_texts(3, "x"))
+    gate.set()
+    for future in (first, small, large, tail):
+        future.result(timeout=5)
+    sizes = [len(call) for call in model.calls]
+    assert sizes == [1, 2, 20, 3]
+
+
+def test_bulk_encodes_bypass_the_batcher(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(embeddings, "EMBED_BATCHING", True)
+    monkeypatch.setattr(embeddings, "_get_sbert_model", lambda: model)
+
+    def no_batcher():
+        raise AssertionError("bulk encodes must not use the batcher")
+
+    monkeypatch.setattr(embeddings, "get_embedding_batcher", no_batcher)
+    vectors = embeddings.encode_texts(_texts(64), bulk=True)
+    assert vectors.shape == (64, 1)
+    assert model.calls == [_texts(64)]
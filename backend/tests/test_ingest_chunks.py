@@ -0,0 +1,85 @@
+import random
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from services.ingest_pipeline import iter_chunks
+from services.pdf_reader import PageText
+
+WORDS = "alpha beta gamma delta epsilon zeta eta theta iota kappa lambda mu".split()
+
+
+def _pages(count, seed=0):
+    rng = random.Random(seed)
+
+    def paragraph():
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 120))) + "."
+
+    return [
+        PageText(n + 1, "\n\n".join(paragraph() for _ in range(rng.randint(3, 12))))
+        for n in range(count)
+    ]
+
+
+def _spans(document, chunks):
+    """(start, end) of each chunk in ``document``, searched left to right."""
+    spans, cursor = [], 0
+    for chunk in chunks:
+        start = document.find(chunk, cursor)
+        assert start >= 0, f"chunk not found in order: {chunk[:40]!r}"
+        spans.append((start, start + len(chunk)))
+        cursor = start + 1
+    return spans
+
+
+def test_short_document_matches_whole_document_split():
+    pages = _pages(2)
+    document = "\n".join(p.text for p in pages)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
+    assert list(iter_chunks(pages, 1000, 100)) == splitter.split_text(document)
+
+
+def test_chunks_cover_the_document_in_order():
+    pages = _pages(30)
+    document = "\n".join(p.text for p in pages)
+    chunks = list(iter_chunks(pages, 300, 50))
+
+    assert all(len(chunk) <= 300 for chunk in chunks)
+    covered = [False] * len(document)
+    for start, end in _spans(document, chunks):
+        covered[start:end] = [True] * (end - start)
+    assert all(covered[i] for i, ch in enumerate(document) if not ch.isspace())
+    # Re-splitting at most shifts a few boundaries relative to splitting the whole text
+    whole = RecursiveCharacterTextSplitter(chunk_size=300, chunk_overlap=50).split_text(document)
+    assert abs(len(chunks) - len(whole)) <= len(pages) // 5
+
+
+def test_overlap_is_kept_across_page_breaks():
+    # Short pages: chunks span several pages and overlap by whole pages
+    pages = [PageText(n + 1, f"page {n} has words {n}a {n}b") for n in range(60)]
+    document = "\n".join(p.text for p in pages)
+    chunks = list(iter_chunks(pages, 100, 30))
+
+    assert chunks == RecursiveCharacterTextSplitter(chunk_size=100, chunk_overlap=30).split_text(document)
+    assert all("\n" in chunk for chunk in chunks)
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.split("\n")[0] in previous.split("\n")
+
+
+def test_pages_are_consumed_lazily():
+    pulled = []
+
+    def pages():
+        for page in _pages(50, seed=2):
+            pulled.append(page.page)
+            yield page
+
+    chunks = iter_chunks(pages(), 300, 50)
+    next(chunks)
+    assert len(pulled) < 10
+    list(chunks)
+    assert len(pulled) == 50
+
+
+def test_empty_pages_are_skipped():
+    pages = [PageText(1, ""), PageText(2, "only text"), PageText(3, "")]
+    assert list(iter_chunks(pages, 300, 50)) == ["only text"]
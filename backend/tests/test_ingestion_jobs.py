@@ -0,0 +1,32 @@
+import logging
+
+import pytest
+
+from services import ingestion
+from services.ingestion import InMemoryJobBackend, get_job_store
+
+
+@pytest.fixture
+def unreachable_redis(monkeypatch):
+    def refuse(*args, **kwargs):
+        raise ConnectionError("connection refused")
+
+    monkeypatch.setattr(ingestion, "RedisJobBackend", refuse)
+    monkeypatch.setattr(ingestion, "INGEST_JOB_BACKEND", "redis")
+    get_job_store.cache_clear()
+    yield
+    get_job_store.cache_clear()
+
+
+def test_celery_queue_requires_redis(monkeypatch, unreachable_redis):
+    monkeypatch.setattr(ingestion, "INGEST_QUEUE_BACKEND", "celery")
+    with pytest.raises(RuntimeError, match="connection refused"):
+        get_job_store()
+
+
+def test_in_process_queue_falls_back_to_memory(monkeypatch, unreachable_redis, caplog):
+    monkeypatch.setattr(ingestion, "INGEST_QUEUE_BACKEND", "inprocess")
+    with caplog.at_level(logging.WARNING, logger="services.ingestion"):
+        store = get_job_store()
+    assert isinstance(store._backend, InMemoryJobBackend)
+    assert "falling back to in-memory job store" in caplog.text
@@ -0,0 +1,61 @@
+import re
+import zlib
+
+import numpy as np
+import pytest
+
+from services import intent_classifier
+from services.intent_classifier import classify_intent_local
+
+
+def _bag_of_words(texts):
+    """Stand-in for the SBERT model: normalized hashed word counts."""
+    rows = np.zeros((len(texts), 512), dtype=np.float32)
+    for row, text in zip(rows, texts):
+        for word in re.findall(r"[a-z0-9']+", text.lower()):
+            row[zlib.crc32(word.encode()) % 512] += 1.0
+    return rows / np.clip(np.linalg.norm(rows, axis=1, keepdims=True), 1e-12, None)
+
+
+class FakeModel:
+    def encode(self, texts, normalize_embeddings=True, **_):
+        return _bag_of_words(texts)
+
+
+@pytest.fixture(autouse=True)
+def fake_encoder(monkeypatch):
+    monkeypatch.setattr(intent_classifier, "_get_sbert_model", lambda: FakeModel())
+    monkeypatch.setattr(intent_classifier, "encode_texts", _bag_of_words)
+    intent_classifier._prototype_matrix.cache_clear()
+    intent_classifier._classify_short_cached.cache_clear()
+    yield
+    intent_classifier._prototype_matrix.cache_clear()
+    intent_classifier._classify_short_cached.cache_clear()
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "what are the main points of section 3?",
+        "what did the author ask in chapter 2?",
+        "what are the key points of the pricing section?",
+    ],
+)
+def test_near_miss_content_questions_are_not_routed_to_other_flows(question):
+    assert classify_intent_local(question, allow_history=True) in ("rag", None)
+
+
+@pytest.mark.parametrize(
+    "question, intent",
+    [
+        ("give me a summary", "summary"),
+        ("what did I ask before?", "previous_questions"),
+        ("quiz me", "interview"),
+    ],
+)
+def test_clear_requests_are_routed_locally(question, intent):
+    assert classify_intent_local(question, allow_history=True) == intent
+
+
+def test_history_is_not_matched_without_history():
+    assert classify_intent_local("what did I ask before?", allow_history=False) != "previous_questions"
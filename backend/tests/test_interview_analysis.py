@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from services import document_analyzer, interview_engine, orchestrator
+from services.document_analyzer import FALLBACK_ANALYSIS, analyze_document_for_interview
+from services.llm import LLMRateLimitError
+from services.routing import RoutingDecision
+from services.session_store import InMemorySessionBackend, SessionState, SessionStore
+
+
+def test_failed_analysis_returns_empty(monkeypatch):
+    async def rate_limited(file_id):
+        raise LLMRateLimitError("429")
+
+    monkeypatch.setattr(document_analyzer, "aget_profile", rate_limited)
+    assert asyncio.run(analyze_document_for_interview("f1")) == ""
+
+
+@pytest.fixture
+def interview(monkeypatch):
+    """Interview turns with routing, analysis and the LLM stubbed; ``analyses`` are returned in order."""
+    state = {"analyses": [], "prompts": [], "store": SessionStore(InMemorySessionBackend())}
+
+    async def route(question, recent_questions, in_interview):
+        return RoutingDecision("interview_continue", "local")
+
+    async def analyze(file_id):
+        return state["analyses"].pop(0)
+
+    async def generate(prompt, on_token=None, prefix=""):
+        state["prompts"].append(prompt)
+        return "Good answer. Next question? Please share your thoughts and reasoning."
+
+    monkeypatch.setattr(orchestrator, "route_turn", route)
+    monkeypatch.setattr(orchestrator, "get_session_store", lambda: state["store"])
+    monkeypatch.setattr(interview_engine, "analyze_document_for_interview", analyze)
+    monkeypatch.setattr(interview_engine, "agenerate_llm", generate)
+    state["store"].save(SessionState("s1", file_id="f1"))
+    return state
+
+
+def test_fallback_analysis_is_not_persisted(interview):
+    store = interview["store"]
+    interview["analyses"] = ["", "KEY SKILLS: Python, Django"]
+
+    asyncio.run(orchestrator.run_flow("f1", "I used a cache", conversation_session_id="s1"))
+    # The prompt still gets a usable analysis, but the session keeps none
+    assert FALLBACK_ANALYSIS in interview["prompts"][0]
+    assert store.get("s1").document_analysis == ""
+
+    asyncio.run(orchestrator.run_flow("f1", "We profiled it first", conversation_session_id="s1"))
+    assert "KEY SKILLS: Python, Django" in interview["prompts"][1]
+    assert store.get("s1").document_analysis == "KEY SKILLS: Python, Django"
+    assert interview["analyses"] == []
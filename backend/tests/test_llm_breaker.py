@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+from services.llm import CircuitBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    return clock
+
+
+def _opened(threshold=2, cooldown=30.0, probe_timeout=60.0):
+    breaker = CircuitBreaker(threshold=threshold, cooldown=cooldown, probe_timeout=probe_timeout)
+    for _ in range(threshold):
+        breaker.record_rate_limit()
+    return breaker
+
+
+def test_opens_after_threshold_rate_limits(clock):
+    breaker = CircuitBreaker(threshold=2, cooldown=30.0)
+    breaker.record_rate_limit()
+    assert breaker.allow() and breaker.allow()
+    breaker.record_rate_limit()
+    assert not breaker.allow()
+    assert breaker.remaining() == pytest.approx(30.0)
+
+
+def test_half_open_lets_exactly_one_probe_through(clock):
+    breaker = _opened()
+    clock.now += 31
+    assert breaker.allow()
+    assert [breaker.allow() for _ in range(5)] == [False] * 5
+
+
+def test_successful_probe_closes_the_circuit(clock):
+    breaker = _opened()
+    clock.now += 31
+    assert breaker.allow()
+    breaker.record_success()
+    assert all(breaker.allow() for _ in range(5))
+    # Closed again: one rate limit is not enough to re-open
+    breaker.record_rate_limit()
+    assert breaker.allow()
+
+
+def test_rate_limited_probe_reopens_the_circuit(clock):
+    breaker = _opened()
+    clock.now += 31
+    assert breaker.allow()
+    breaker.record_rate_limit()
+    assert not breaker.allow()
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 2
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_probe_slot_is_released_on_other_errors_or_timeout(clock):
+    breaker = _opened(probe_timeout=10.0)
+    clock.now += 31
+    assert breaker.allow()
+    breaker.record_error()
+    assert breaker.allow()
+    # This probe never reports back (e.g. cancelled); the slot frees up after probe_timeout
+    assert not breaker.allow()
+    clock.now += 11
+    assert breaker.allow()
+
+
+def test_trip_opens_immediately(clock):
+    breaker = CircuitBreaker(threshold=3, cooldown=30.0)
+    breaker.trip(120.0)
+    assert not breaker.allow()
+    clock.now += 119
+    assert not breaker.allow()
+    clock.now += 2
+    assert breaker.allow()
+    assert not breaker.allow()
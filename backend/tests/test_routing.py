@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from services import routing
+from services.llm import LLMRateLimitError
+from services.routing import RoutingDecision, fallback_route, parse_routing_response, route_turn
+
+
+@pytest.mark.parametrize(
+    "raw, in_interview, intent",
+    [
+        ('{"history": false, "intent": "rag"}', False, "rag"),
+        ('Sure! ```json\n{"history": false, "intent": "Summary "}\n```', False, "summary"),
+        ('{"history": false, "intent": "end_interview"}', True, "end_interview"),
+        ('{"history": true, "intent": "rag"}', False, "previous_questions"),
+        ('{"history": true}', True, "previous_questions"),
+    ],
+)
+def test_parse_routing_response_accepts_allowed_intents(raw, in_interview, intent):
+    assert parse_routing_response(raw, in_interview) == RoutingDecision(intent=intent)
+
+
+@pytest.mark.parametrize(
+    "raw, in_interview",
+    [
+        ("", False),
+        ("rag", False),
+        ("{not json}", False),
+        ('["rag"]', False),
+        ('{"history": "yes", "intent": "weather"}', False),
+        # Each mode only allows its own intents
+        ('{"history": false, "intent": "interview_continue"}', False),
+        ('{"history": false, "intent": "rag"}', True),
+        ('{"history": false, "intent": "interview"}', True),
+    ],
+)
+def test_parse_routing_response_rejects_unusable_output(raw, in_interview):
+    assert parse_routing_response(raw, in_interview) is None
+
+
+@pytest.mark.parametrize(
+    "question, in_interview, intent",
+    [
+        ("please interview me", False, "interview"),
+        ("summarize the main points", False, "summary"),
+        ("what does chapter 2 say?", False, "rag"),
+        ("ok let's end interview", True, "end_interview"),
+        ("no", True, "interview_continue"),
+    ],
+)
+def test_fallback_route_keywords(question, in_interview, intent):
+    decision = asyncio.run(fallback_route(question, in_interview))
+    assert decision == RoutingDecision(intent=intent, source="fallback")
+
+
+@pytest.fixture
+def llm_routing(monkeypatch):
+    """Forces the LLM path; ``reply`` is the model output or an exception to raise."""
+    state = {"reply": ""}
+
+    async def not_confident(question, in_interview, allow_history=False):
+        return None
+
+    async def fake_llm(prompt):
+        if isinstance(state["reply"], Exception):
+            raise state["reply"]
+        return state["reply"]
+
+    monkeypatch.setattr(routing, "aclassify_intent_local", not_confident)
+    monkeypatch.setattr(routing, "aget_llm_response", fake_llm)
+    return state
+
+
+def test_route_turn_uses_llm_decision(llm_routing):
+    llm_routing["reply"] = '{"history": false, "intent": "summary"}'
+    assert asyncio.run(route_turn("tell me about it", [], False)) == RoutingDecision("summary", "llm")
+
+
+@pytest.mark.parametrize("reply", ["no idea", LLMRateLimitError("quota")])
+def test_route_turn_falls_back_on_garbage_or_errors(llm_routing, reply):
+    llm_routing["reply"] = reply
+    assert asyncio.run(route_turn("quiz me please", [], False)) == RoutingDecision("interview", "fallback")
+
+
+def test_history_without_recent_questions_is_routed_normally(llm_routing):
+    llm_routing["reply"] = '{"history": true}'
+    assert asyncio.run(route_turn("what did I ask?", [], False)).source == "fallback"
+    assert asyncio.run(route_turn("what did I ask?", ["q1"], False)).intent == "previous_questions"
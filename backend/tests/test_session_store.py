@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+from services.session_store import (
+    SESSION_HISTORY_SIZE,
+    InMemorySessionBackend,
+    SessionState,
+    SessionStore,
+    SQLiteSessionBackend,
+)
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    def make(ttl_seconds=60, max_sessions=100):
+        if request.param == "sqlite":
+            return SQLiteSessionBackend(str(tmp_path / "sessions.db"), ttl_seconds, max_sessions)
+        return InMemorySessionBackend(ttl_seconds, max_sessions)
+
+    return make
+
+
+def test_round_trip_keeps_state(clock, make_backend):
+    store = SessionStore(make_backend())
+    state = store.get_or_create("s1", file_id="f1")
+    state.add_turn("what is it?")
+    state.document_analysis = "analysis"
+    state.add_topic("caching")
+    store.save(state)
+
+    loaded = store.get("s1")
+    assert loaded.file_id == "f1"
+    assert list(loaded.recent_turns) == ["what is it?"]
+    assert loaded.document_analysis == "analysis"
+    assert loaded.asked_topics == ["caching"]
+
+
+def test_idle_sessions_expire_after_ttl(clock, make_backend):
+    store = SessionStore(make_backend(ttl_seconds=60))
+    store.save(SessionState("s1"))
+    clock.now += 59
+    assert store.get("s1") is not None
+    clock.now += 2
+    assert store.get("s1") is None
+    # A new session is created in its place
+    assert list(store.get_or_create("s1").recent_turns) == []
+
+
+def test_least_recently_used_session_is_evicted(clock, make_backend):
+    store = SessionStore(make_backend(max_sessions=2))
+    store.save(SessionState("a"))
+    clock.now += 1
+    store.save(SessionState("b"))
+    clock.now += 1
+    # Touch "a" so "b" becomes the least recently used
+    store.save(store.get("a"))
+    clock.now += 1
+    store.save(SessionState("c"))
+
+    assert store.get("a") is not None
+    assert store.get("b") is None
+    assert store.get("c") is not None
+
+
+def test_delete_and_missing_ids(make_backend):
+    store = SessionStore(make_backend())
+    store.save(SessionState("s1"))
+    store.delete("s1")
+    assert store.get("s1") is None
+    assert store.get(None) is None
+    store.delete(None)
+
+
+def test_recent_turns_are_a_ring_buffer():
+    state = SessionState("s1")
+    for n in range(SESSION_HISTORY_SIZE + 3):
+        state.add_turn(f"q{n}")
+    restored = SessionState.from_dict(state.to_dict())
+    expected = [f"q{n}" for n in range(3, SESSION_HISTORY_SIZE + 3)]
+    assert list(state.recent_turns) == expected
+    assert list(restored.recent_turns) == expected
+    restored.add_turn("next")
+    assert len(restored.recent_turns) == SESSION_HISTORY_SIZE
@@ -0,0 +1,48 @@
+from stt_services.chunking import AudioChunk, stitch
+
+
+def chunk(start: float, keep_from: float) -> AudioChunk:
+    return AudioChunk(start=start, keep_from=keep_from, wav=b"")
+
+
+def word(text: str, start: float, end: float) -> dict:
+    return {"text": text, "start": start, "end": end}
+
+
+def test_repeated_words_inside_a_chunk_are_kept():
+    pieces = [word("I", 0.0, 0.2), word("had", 0.2, 0.4), word("had", 0.4, 0.6), word("enough", 0.6, 1.0)]
+    transcript, out = stitch([(chunk(0.0, 0.0), pieces)])
+    assert transcript == "I had had enough"
+    assert [p["text"] for p in out] == ["I", "had", "had", "enough"]
+
+
+def test_repeat_outside_the_overlap_is_kept():
+    first = [{"text": "Did it work? No.", "start": 0.0, "end": 29.0}]
+    # Second chunk starts at 28.5 with its own audio from 30.0; this segment is after the overlap
+    second = [{"text": "No, it failed.", "start": 2.0, "end": 4.0}]
+    transcript, _ = stitch([(chunk(0.0, 0.0), first), (chunk(28.5, 30.0), second)])
+    assert transcript == "Did it work? No. No, it failed."
+
+
+def test_text_repeated_in_the_overlap_is_dropped():
+    first = [word("we", 27.0, 27.5), word("had", 28.6, 29.0), word("enough", 29.0, 29.8)]
+    # The chunk re-hears "had enough" in its leading overlap (28.5 - 30.0)
+    second = [word("had", 0.1, 0.5), word("enough", 0.5, 1.6), word("now", 1.6, 2.0)]
+    transcript, out = stitch([(chunk(0.0, 0.0), first), (chunk(28.5, 30.0), second)])
+    assert transcript == "we had enough now"
+    assert out[-1] == {"start": 30.1, "end": 30.5, "text": "now"}
+
+
+def test_pieces_ending_inside_the_overlap_are_skipped():
+    first = [{"text": "hello there", "start": 0.0, "end": 29.5}]
+    second = [{"text": "there", "start": 0.5, "end": 1.0}, {"text": "general", "start": 1.6, "end": 2.5}]
+    transcript, _ = stitch([(chunk(0.0, 0.0), first), (chunk(28.5, 30.0), second)])
+    assert transcript == "hello there general"
+
+
+def test_segment_straddling_keep_from_loses_only_the_repeat():
+    first = [{"text": "the build was green", "start": 0.0, "end": 29.6}]
+    second = [{"text": "was green and we shipped", "start": 0.5, "end": 4.0}]
+    transcript, out = stitch([(chunk(0.0, 0.0), first), (chunk(28.5, 30.0), second)])
+    assert transcript == "the build was green and we shipped"
+    assert out[-1]["text"] == "and we shipped"
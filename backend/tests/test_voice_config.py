@@ -0,0 +1,35 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers import voice
+
+
+def client() -> TestClient:
+    app = FastAPI()
+    app.include_router(voice.router)
+    return TestClient(app)
+
+
+def test_bad_frames_get_errors_and_keep_the_connection():
+    with client().websocket_connect("/voice/ws") as ws:
+        assert ws.receive_json()["type"] == "ready"
+
+        ws.send_text("[]")
+        assert ws.receive_json()["status_code"] == 400
+
+        ws.send_json({"type": "config", "voice": "com@internal-host:8080/x#"})
+        error = ws.receive_json()
+        assert error["type"] == "error" and error["status_code"] == 422
+
+        ws.send_json({"type": "config", "lang": "not-a-language"})
+        assert ws.receive_json()["status_code"] == 422
+
+        ws.send_json({"type": "config", "speed": "fast"})
+        assert ws.receive_json()["status_code"] == 422
+
+        ws.send_json({"type": "text", "question": ["not", "a", "string"]})
+        assert ws.receive_json()["status_code"] == 400
+
+        # Still usable after all of the above; speed is clamped to the TTS range
+        ws.send_json({"type": "config", "speed": 10, "voice": "co.uk", "format": "opus"})
+        assert ws.receive_json() == {"type": "ready", "file_id": None, "conversation_session_id": None, "format": "opus"}
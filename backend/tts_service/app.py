@@ -1,19 +1,116 @@
 from fastapi import APIRouter
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
-import tempfile, os
-from .tts_model import normalize_text, speed_up_wav, generate_tts
-from .schema import TTSRequest
+from collections import deque
+from typing import AsyncIterator, Iterable, Optional
+import asyncio, os
+from .tts_model import normalize_text, split_sentences, generate_tts_bytes
+from .audio_cache import TTS_CACHE_ENABLED, audio_cache_key, get_audio_cache
+from .transcoder import get_transcoder, media_type
+from .schema import TTSRequest, TTSStreamRequest
+from services.timing import stage
 router = APIRouter()
 
+# Max sentences synthesized at once per streaming request
+TTS_STREAM_CONCURRENCY = int(os.getenv("TTS_STREAM_CONCURRENCY", "4"))
+TTS_PREWARM_CONCURRENCY = int(os.getenv("TTS_PREWARM_CONCURRENCY", "2"))
 
-async def tts_endpoint(req: TTSRequest):
+
+async def synthesize(text: str, speed: float = 1.0, lang: str = "en", voice: str = "com", fmt: str = "mp3") -> bytes:
+    """Synthesize normalized text to audio bytes, going through the audio cache.
+
+    gTTS runs in a worker thread; speed/format changes go through the bounded
+    ffmpeg pool, so nothing here blocks the event loop.
+    """
+    key = audio_cache_key(text, speed, lang, voice, fmt)
+    cache = get_audio_cache() if TTS_CACHE_ENABLED else None
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.get_bytes, key)
+        if cached is not None:
+            return cached
+    with stage(None, "tts_synthesis"):
+        mp3 = await asyncio.to_thread(generate_tts_bytes, text, lang, voice)
+    data = await get_transcoder().transcode(mp3, speed, fmt)
+    if cache is not None:
+        await asyncio.to_thread(cache.put, key, data)
+    return data
+
+
+async def tts_endpoint(req: TTSRequest, if_none_match: Optional[str] = None):
     text = normalize_text(req.text)
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
-    tmp.close()
-    generate_tts(text, tmp.name)
-    out_path = speed_up_wav(tmp.name, req.speed)
-    if out_path != tmp.name:
-        os.remove(tmp.name)
-
-    return FileResponse(out_path, media_type="audio/mpeg", filename="speech.mp3")
+    key = audio_cache_key(text, req.speed, req.lang, req.voice, req.format)
+    filename = "speech.ogg" if req.format == "opus" else f"speech.{req.format}"
+    headers = {"ETag": f'"{key}"', "Cache-Control": "public, max-age=86400"}
+
+    if TTS_CACHE_ENABLED:
+        path = get_audio_cache().get_path(key)
+        if path is not None:
+            if if_none_match and f'"{key}"' in if_none_match:
+                return Response(status_code=304, headers=headers)
+            return FileResponse(path, media_type=media_type(req.format), filename=filename, headers=headers)
+
+    data = await synthesize(text, req.speed, req.lang, req.voice, req.format)
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return Response(content=data, media_type=media_type(req.format), headers=headers)
+
+
+async def stream_tts_audio(
+    text: str,
+    speed: float = 1.0,
+    lang: str = "en",
+    voice: str = "com",
+    fmt: str = "mp3",
+    concurrency: int = TTS_STREAM_CONCURRENCY,
+) -> AsyncIterator[bytes]:
+    """Synthesize sentences in parallel (at most ``concurrency`` in flight) and yield audio chunks in order."""
+    pending: "deque[asyncio.Task]" = deque()
+    try:
+        for sentence in split_sentences(text):
+            pending.append(asyncio.create_task(synthesize(sentence, speed, lang, voice, fmt)))
+            if len(pending) >= concurrency:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        # Client disconnected or synthesis failed: drop work that is still queued
+        for task in pending:
+            task.cancel()
+
+
+async def tts_stream_endpoint(req: TTSStreamRequest):
+    text = normalize_text(req.text)
+    return StreamingResponse(
+        stream_tts_audio(text, req.speed, req.lang, req.voice, req.format),
+        media_type=media_type(req.format),
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+async def prewarm_tts_cache(phrases: Iterable[str], speed: float = 1.0) -> int:
+    """Pre-render fixed phrases (whole text and per-sentence pieces) into the audio cache.
+
+    Returns the number of clips synthesized; already-cached clips are skipped.
+    """
+    if not TTS_CACHE_ENABLED:
+        return 0
+    texts = []
+    for phrase in phrases:
+        text = normalize_text(phrase)
+        texts.append(text)
+        texts.extend(split_sentences(text))
+    cache = get_audio_cache()
+    todo = [t for t in dict.fromkeys(texts) if t and cache.get_path(audio_cache_key(t, speed)) is None]
+
+    sem = asyncio.Semaphore(TTS_PREWARM_CONCURRENCY)
+
+    async def render(text: str) -> bool:
+        async with sem:
+            try:
+                await synthesize(text, speed)
+                return True
+            except Exception as e:
+                print(f"TTS pre-warm failed for {text[:40]!r}: {e}")
+                return False
+
+    results = await asyncio.gather(*(render(t) for t in todo))
+    return sum(results)
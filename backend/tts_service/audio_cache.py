@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from functools import lru_cache
+from typing import Optional
+
+
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "./tts_cache")
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+def audio_cache_key(text: str, speed: float, lang: str = "en", voice: str = "com", fmt: str = "mp3") -> str:
+    """Content address for synthesized audio. ``text`` must already be normalize_text() output."""
+    payload = json.dumps([text, round(float(speed), 3), lang, voice, fmt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """Disk-backed, size-bounded LRU cache of synthesized audio clips.
+
+    Files are written to a temp file and atomically renamed into place, so several
+    workers can share one directory. Recency is tracked with file mtimes (touched on
+    every hit) and the oldest files are evicted once the total exceeds ``max_bytes``.
+    """
+
+    def __init__(self, root: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._size_estimate: Optional[int] = None
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.clip")
+
+    def get_path(self, key: str) -> Optional[str]:
+        """Path of the cached audio for ``key`` (refreshing its LRU position), or None on a miss."""
+        path = self.path(key)
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            # Evicted by another worker between the touch and the read
+            return None
+
+    def put(self, key: str, data: bytes) -> str:
+        path = self.path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._account(len(data))
+        return path
+
+    def _account(self, added: int) -> None:
+        with self._lock:
+            if self._size_estimate is None:
+                self._size_estimate = self._scan_size()
+            else:
+                self._size_estimate += added
+            if self._size_estimate <= self.max_bytes:
+                return
+            self._size_estimate = self._evict()
+
+    def _entries(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if not name.endswith(".clip"):
+                    continue
+                full = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(full)
+                except FileNotFoundError:
+                    continue
+                yield full, st.st_size, st.st_mtime
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> int:
+        """Remove least-recently-used files until the cache is at 90% of its budget; returns the new size."""
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        for full, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(full)
+                total -= size
+            except FileNotFoundError:
+                total -= size
+        return total
+
+
+@lru_cache(maxsize=1)
+def get_audio_cache() -> AudioCache:
+    return AudioCache()
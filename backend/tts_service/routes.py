@@ -1,10 +1,16 @@
-from fastapi import APIRouter, status
-from .schema import TTSRequest
-from .app import tts_endpoint
+from fastapi import APIRouter, Header, status
+from typing import Optional
+from .schema import TTSRequest, TTSStreamRequest
+from .app import tts_endpoint, tts_stream_endpoint
 
 
 router = APIRouter()
 
 @router.post("/api/v1/tts", status_code=status.HTTP_200_OK)
-async def get_tts_endpoint(req: TTSRequest):
-    return await tts_endpoint(req)
\ No newline at end of file
+async def get_tts_endpoint(req: TTSRequest, if_none_match: Optional[str] = Header(None)):
+    return await tts_endpoint(req, if_none_match)
+
+
+@router.post("/api/v1/tts/stream", status_code=status.HTTP_200_OK)
+async def get_tts_stream_endpoint(req: TTSStreamRequest):
+    return await tts_stream_endpoint(req)
@@ -1,6 +1,49 @@
-from pydantic import BaseModel, Field
+from functools import lru_cache
+from pydantic import BaseModel, Field, field_validator
+from typing import FrozenSet, Literal, get_args
 
-# ---------- Request Model ----------
-class TTSRequest(BaseModel):
+# gTTS accents are selected by Google Translate host (translate.google.<tld>);
+# only these hosts may be contacted
+VoiceTld = Literal[
+    "com", "us", "ca", "co.uk", "ie", "com.au", "co.in", "co.za", "com.ng",
+    "fr", "com.br", "pt", "com.mx", "es",
+]
+GTTS_TLDS = frozenset(get_args(VoiceTld))
+
+TTS_MIN_SPEED = 0.5
+TTS_MAX_SPEED = 2.0
+
+
+@lru_cache(maxsize=1)
+def supported_langs() -> FrozenSet[str]:
+    """Language codes gTTS accepts (its bundled list; no network access)."""
+    from gtts.lang import tts_langs
+
+    return frozenset(tts_langs())
+
+
+# ---------- Request Models ----------
+class TTSOptions(BaseModel):
+    """Voice settings shared by the TTS endpoints and the voice WebSocket."""
+
+    speed: float = Field(1.0, ge=TTS_MIN_SPEED, le=TTS_MAX_SPEED)
+    lang: str = "en"
+    voice: VoiceTld = "com"  # gTTS top-level domain, selects the accent
+    format: Literal["mp3", "opus", "wav"] = "mp3"
+
+    @field_validator("lang")
+    @classmethod
+    def _check_lang(cls, value: str) -> str:
+        if value not in supported_langs():
+            raise ValueError(f"Unsupported language: {value}")
+        return value
+
+
+class TTSRequest(TTSOptions):
     text: str
-    speed: float = Field(1.0, ge=0.5, le=2.0)
\ No newline at end of file
+
+
+class TTSStreamRequest(TTSRequest):
+    # Sentences are encoded as separate files and concatenated: fine for MP3
+    # frames and chained Ogg/Opus, but back-to-back RIFF headers are not valid WAV
+    format: Literal["mp3", "opus"] = "mp3"
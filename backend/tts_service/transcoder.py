@@ -0,0 +1,104 @@
+import asyncio
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+from services.metrics import register_queue
+from services.timing import stage
+
+
+FFMPEG_WORKERS = int(os.getenv("FFMPEG_WORKERS", str(min(4, os.cpu_count() or 1))))
+FFMPEG_TIMEOUT_SECONDS = float(os.getenv("FFMPEG_TIMEOUT_SECONDS", "30"))
+
+T = TypeVar("T")
+
+# Output format -> (ffmpeg output args, media type)
+AUDIO_FORMATS: Dict[str, Tuple[List[str], str]] = {
+    "mp3": (["-f", "mp3"], "audio/mpeg"),
+    # Low-bitrate Opus tuned for speech; ~4x smaller than gTTS's MP3
+    "opus": (["-c:a", "libopus", "-b:a", "24k", "-application", "voip", "-f", "ogg"], "audio/ogg"),
+    "wav": (["-f", "wav"], "audio/wav"),
+}
+
+
+def media_type(fmt: str) -> str:
+    return AUDIO_FORMATS[fmt][1]
+
+
+@lru_cache(maxsize=1)
+def get_ffmpeg_path() -> Optional[str]:
+    """Resolve the ffmpeg binary once per process (None if it isn't installed)."""
+    return os.getenv("FFMPEG_PATH") or shutil.which("ffmpeg")
+
+
+def _build_command(ffmpeg: str, speed: float, fmt: str) -> List[str]:
+    cmd = [ffmpeg, "-hide_banner", "-loglevel", "error", "-i", "pipe:0", "-vn"]
+    if abs(speed - 1.0) >= 1e-6:
+        cmd += ["-filter:a", f"atempo={speed}"]
+    return cmd + AUDIO_FORMATS[fmt][0] + ["pipe:1"]
+
+
+def needs_transcode(speed: float, fmt: str) -> bool:
+    return fmt != "mp3" or abs(speed - 1.0) >= 1e-6
+
+
+def transcode_bytes(data: bytes, speed: float = 1.0, fmt: str = "mp3") -> bytes:
+    """Re-encode MP3 bytes through ffmpeg stdin/stdout pipes (blocking, no temp files).
+
+    Returns the input unchanged if nothing needs to change or ffmpeg isn't available
+    and the requested format is MP3.
+    """
+    if fmt not in AUDIO_FORMATS:
+        raise ValueError(f"Unsupported audio format: {fmt}")
+    if not needs_transcode(speed, fmt):
+        return data
+    ffmpeg = get_ffmpeg_path()
+    if not ffmpeg:
+        if fmt == "mp3":
+            return data
+        raise RuntimeError(f"ffmpeg is required to produce {fmt} audio")
+    with stage(None, "ffmpeg"):
+        proc = subprocess.run(
+            _build_command(ffmpeg, speed, fmt),
+            input=data,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=FFMPEG_TIMEOUT_SECONDS,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {proc.stderr.decode(errors='ignore').strip()}")
+    return proc.stdout
+
+
+class AudioTranscoder:
+    """Runs ffmpeg re-encodes on a bounded pool of worker threads, off the event loop.
+
+    ffmpeg handles one input per process, so each job still spawns a process; the
+    pool caps how many run at once so a burst can't oversubscribe the CPU.
+    """
+
+    def __init__(self, max_workers: int = FFMPEG_WORKERS) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ffmpeg")
+        # Jobs submitted but not yet picked up by a worker
+        register_queue("ffmpeg", self._executor._work_queue.qsize)
+
+    async def transcode(self, data: bytes, speed: float = 1.0, fmt: str = "mp3") -> bytes:
+        if not needs_transcode(speed, fmt):
+            return data
+        return await self.run(transcode_bytes, data, speed, fmt)
+
+    async def run(self, job: Callable[..., T], *args) -> T:
+        """Run another blocking ffmpeg job (e.g. STT decoding) on the same bounded pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, job, *args)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache(maxsize=1)
+def get_transcoder() -> AudioTranscoder:
+    return AudioTranscoder()
@@ -1,5 +1,8 @@
-from gtts import gTTS
-import re, unicodedata, shutil, subprocess, tempfile
+from io import BytesIO
+from typing import List
+import re, unicodedata, tempfile
+from .schema import GTTS_TLDS
+from .transcoder import get_ffmpeg_path, transcode_bytes
 
 
 def normalize_text(s: str) -> str:
@@ -35,21 +38,64 @@ def normalize_text(s: str) -> str:
 
 def generate_tts(text: str, output_path: str):
     """Generate speech from text using gTTS and save as MP3"""
+    from gtts import gTTS
+
     tts = gTTS(text=text, lang="en")
     tts.save(output_path)
 
 
 def speed_up_wav(input_path: str, speed: float = 1.0) -> str:
-    """Adjust playback speed using FFmpeg (if available)"""
-    ffmpeg_path = shutil.which("ffmpeg")
-    if not ffmpeg_path or abs(speed - 1.0) < 1e-6:
+    """Adjust playback speed of an MP3 file using FFmpeg (if available).
+
+    File-based wrapper kept for compatibility; the service itself works on bytes
+    via ``transcoder.get_transcoder()``.
+    """
+    if not get_ffmpeg_path() or abs(speed - 1.0) < 1e-6:
         return input_path
 
-    out_path = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3").name
-    subprocess.run(
-        [ffmpeg_path, "-y", "-i", input_path, "-filter:a", f"atempo={speed}", "-vn", out_path],
-        check=True,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    )
-    return out_path
+    with open(input_path, "rb") as f:
+        data = transcode_bytes(f.read(), speed, "mp3")
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as out:
+        out.write(data)
+    return out.name
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text: str, min_chars: int = 40, max_chars: int = 300) -> List[str]:
+    """Split normalized text into sentence-sized pieces for incremental synthesis.
+
+    Short sentences are merged with the next one (each piece costs a gTTS round trip)
+    and overly long ones are cut at the last space before ``max_chars``.
+    """
+    pieces: List[str] = []
+    buf = ""
+    for sentence in _SENTENCE_END.split(text.strip()):
+        if not sentence:
+            continue
+        buf = f"{buf} {sentence}".strip() if buf else sentence
+        while len(buf) > max_chars:
+            cut = buf.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            pieces.append(buf[:cut].strip())
+            buf = buf[cut:].strip()
+        if len(buf) >= min_chars:
+            pieces.append(buf)
+            buf = ""
+    if buf:
+        pieces.append(buf)
+    return pieces
+
+
+def generate_tts_bytes(text: str, lang: str = "en", voice: str = "com") -> bytes:
+    """Generate speech from text using gTTS and return the MP3 bytes (no temp files)."""
+    from gtts import gTTS
+
+    # The tld becomes part of the request host, so never pass through an unchecked value
+    if voice not in GTTS_TLDS:
+        raise ValueError(f"Unsupported voice: {voice}")
+
+    buf = BytesIO()
+    gTTS(text=text, lang=lang, tld=voice).write_to_fp(buf)
+    return buf.getvalue()
@@ -1,12 +1,13 @@
 from dotenv import load_dotenv
 import os
-import cloudinary
 
 # Load .env so either CLOUDINARY_URL or individual vars are available
 load_dotenv()
 
 
 def _configure_from_env() -> None:
+    import cloudinary
+
     cloudinary_url = os.getenv("CLOUDINARY_URL")
     if cloudinary_url:
         cloudinary.config(cloudinary_url=cloudinary_url, secure=True)
@@ -20,6 +21,8 @@ def _configure_from_env() -> None:
 
 def ensure_configured() -> None:
     """Ensure Cloudinary is configured from environment or raise RuntimeError."""
+    import cloudinary  # imported on first upload rather than at app start-up
+
     _configure_from_env()
     cfg = cloudinary.config()
     if not (cfg.api_key and cfg.api_secret and cfg.cloud_name):
@@ -57,39 +57,72 @@ export async function uploadPdf(file) {
     }
   }
 
+  let accepted
   try {
     // First attempt with default (configurable) timeout
-    return await doUpload(DEFAULT_UPLOAD_TIMEOUT_MS)
+    accepted = await doUpload(DEFAULT_UPLOAD_TIMEOUT_MS)
   } catch (err) {
     console.warn('Upload attempt 1 failed:', err?.name || err)
     if (err?.name === 'AbortError') {
       // One automatic retry with extended timeout
       try {
-        return await doUpload(DEFAULT_UPLOAD_TIMEOUT_MS * 1.5)
+        accepted = await doUpload(DEFAULT_UPLOAD_TIMEOUT_MS * 1.5)
       } catch (err2) {
         if (err2?.name === 'AbortError') {
           throw new Error('Upload timed out. Please try again or try a smaller PDF.')
         }
         throw err2
       }
+    } else {
+      throw err
     }
-    throw err
   }
+
+  // Extraction and embedding run in the background; wait until the file is ready
+  if (!accepted?.job_id) return accepted
+  const job = await waitForIngestion(accepted.job_id)
+  return { id: accepted.id, url: job.url, message: job.message }
+}
+
+export async function getIngestionJob(jobId) {
+  const res = await fetch(`${getBaseUrl()}/upload/jobs/${jobId}`)
+  return handleResponse(res)
+}
+
+async function waitForIngestion(jobId, { intervalMs = 1000, timeoutMs = 10 * 60 * 1000 } = {}) {
+  const deadline = Date.now() + timeoutMs
+  while (Date.now() < deadline) {
+    const job = await getIngestionJob(jobId)
+    if (job.status === 'ready') return job
+    if (job.status === 'failed') throw new Error(job.error || 'PDF processing failed')
+    await new Promise((resolve) => setTimeout(resolve, intervalMs))
+  }
+  throw new Error('PDF processing is taking too long. Please try again later.')
 }
 
+// Issued by the backend on the first /flow/ask; keeps this tab's question history private
+let clientSessionId = null
+
 // Flow (intent: rag/quiz/summary)
 export async function flowAsk(fileId, question, conversationSessionId = null) {
   const body = { file_id: Number(fileId), question }
   if (conversationSessionId) {
     body.conversation_session_id = conversationSessionId
   }
+  if (clientSessionId) {
+    body.client_session_id = clientSessionId
+  }
   
   const res = await fetch(`${getBaseUrl()}/flow/ask`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify(body),
   })
-  return handleResponse(res)
+  const data = await handleResponse(res)
+  if (data?.client_session_id) {
+    clientSessionId = data.client_session_id
+  }
+  return data
 }
 
 
@@ -124,6 +157,7 @@ export function playAudioBlob(blob) {
 export default {
   getBaseUrl,
   uploadPdf,
+  getIngestionJob,
   flowAsk,
   sttTranscribe,
   ttsSynthesize,